@@ -9,12 +9,18 @@ from app.repositories.user_repository import UserRepository
 from app.repositories.token_repository import TokenRepository
 from app.repositories.comment_repository import CommentRepository
 from app.repositories.notification_repository import NotificationRepository
+from app.repositories.post_tag_repository import PostTagRepository
+from app.repositories.reaction_repository import ReactionRepository
 from app.services.auth_service import AuthService
+from app.services.author_snapshot_service import AuthorSnapshotService
 from app.services.conversation_service import ConversationService
+from app.services.entity_loader import EntityLoader
 from app.services.media_service import MediaService
 from app.services.message_service import MessageService
 from app.services.news_service import PostService
 from app.services.notification_service import NotificationService
+from app.services.post_tag_service import PostTagService
+from app.services.reaction_service import ReactionService
 from app.services.upload_service import UploadService
 from app.services.user_profile_service import UserProfileService
 from app.services.user_service import UserService
@@ -50,6 +56,30 @@ def get_comment_repository() -> CommentRepository:
 def get_notification_repository() -> NotificationRepository:
     return NotificationRepository()
 
+def get_post_tag_repository() -> PostTagRepository:
+    return PostTagRepository()
+
+def get_post_tag_service() -> PostTagService:
+    return PostTagService(post_tag_repo=get_post_tag_repository())
+
+def get_reaction_repository() -> ReactionRepository:
+    return ReactionRepository()
+
+def get_reaction_service(
+    reaction_repo: Annotated[ReactionRepository, Depends(get_reaction_repository)],
+    post_repo: Annotated[PostRepository, Depends(get_post_repository)],
+    comment_repo: Annotated[CommentRepository, Depends(get_comment_repository)]
+) -> ReactionService:
+    return ReactionService(reaction_repo=reaction_repo, post_repo=post_repo, comment_repo=comment_repo)
+
+# Mỗi request 1 loader (FastAPI cache dependency trong phạm vi request) => các service dùng chung kết quả đã nạp
+def get_entity_loader(
+    user_profile_repo: Annotated[UserProfileRepository, Depends(get_user_profile_repository)],
+    media_repo: Annotated[MediaRepository, Depends(get_media_repository)],
+    user_repo: Annotated[UserRepository, Depends(get_user_repository)]
+) -> EntityLoader:
+    return EntityLoader(user_profile_repo=user_profile_repo, media_repo=media_repo, user_repo=user_repo)
+
 def get_token_service(
     token_repo: Annotated[TokenRepository, Depends(get_token_repository)]
 ) -> TokenService:
@@ -68,12 +98,17 @@ def get_user_service(
 ) -> UserService:
     return UserService(user_repo=user_repo)
 
-def get_post_service() -> PostService:
+def get_post_service(
+    entity_loader: Annotated[EntityLoader, Depends(get_entity_loader)]
+) -> PostService:
     post_repo = get_post_repository()
     media_service = get_media_services()
     media_repo = get_media_repository()
     user_profile_repo = get_user_profile_repository()
-    return PostService(post_repo=post_repo,media_service=media_service, user_profile_repo=user_profile_repo, media_repo=media_repo)
+    post_tag_service = get_post_tag_service()
+    return PostService(post_repo=post_repo,media_service=media_service, user_profile_repo=user_profile_repo, media_repo=media_repo,
+                       entity_loader=entity_loader, post_tag_service=post_tag_service,
+                       author_snapshot_service=get_author_snapshot_service())
 
 def get_notification_service(
     notification_repo: Annotated[NotificationRepository, Depends(get_notification_repository)]
@@ -88,23 +123,38 @@ def get_media_services() -> MediaService:
     media_repo = get_media_repository()
     return MediaService(upload_service, media_repo=media_repo)
 
+def get_author_snapshot_service() -> AuthorSnapshotService:
+    return AuthorSnapshotService(
+        post_repo=get_post_repository(),
+        comment_repo=get_comment_repository(),
+        user_profile_repo=get_user_profile_repository(),
+        media_repo=get_media_repository()
+    )
+
 def get_user_profile_service() -> UserProfileService:
     user_profile_repo = get_user_profile_repository()
     upload_service = get_upload_service()
     media_repo = get_media_repository()
     user_repo = get_user_repository()
-    return UserProfileService(user_profile_repo, upload_service, media_repo=media_repo, user_repo=user_repo)
+    author_snapshot_service = get_author_snapshot_service()
+    return UserProfileService(user_profile_repo, upload_service, media_repo=media_repo, user_repo=user_repo,
+                              author_snapshot_service=author_snapshot_service)
 
-def get_conversation_service() -> ConversationService:
+def get_conversation_service(
+    entity_loader: Annotated[EntityLoader, Depends(get_entity_loader)]
+) -> ConversationService:
     conversation_repo = get_conversation_repository()
     media_repo = get_media_repository()
     user_profile_repo = get_user_profile_repository()
     message_repo = get_message_repository()
-    return ConversationService(conversation_repo=conversation_repo, media_repo=media_repo, user_profile_repo=user_profile_repo, message_repo=message_repo)
+    return ConversationService(conversation_repo=conversation_repo, media_repo=media_repo, user_profile_repo=user_profile_repo, message_repo=message_repo,
+                               entity_loader=entity_loader)
 
-def get_message_service() -> MessageService:
+def get_message_service(
+    entity_loader: Annotated[EntityLoader, Depends(get_entity_loader)]
+) -> MessageService:
     message_repo = get_message_repository()
-    conversation_service = get_conversation_service()
+    conversation_service = get_conversation_service(entity_loader)
     conversation_repo = get_conversation_repository()
     return MessageService(message_repo=message_repo, conversation_service=conversation_service, conversation_repo=conversation_repo)
 
@@ -114,11 +164,17 @@ def get_comment_service(
     user_profile_repo: Annotated[UserProfileRepository, Depends(get_user_profile_repository)],
     media_repo: Annotated[MediaRepository, Depends(get_media_repository)],
     notification_service: Annotated[NotificationService, Depends(get_notification_service)],
+    entity_loader: Annotated[EntityLoader, Depends(get_entity_loader)],
+    post_tag_service: Annotated[PostTagService, Depends(get_post_tag_service)],
+    author_snapshot_service: Annotated[AuthorSnapshotService, Depends(get_author_snapshot_service)],
 ) -> CommentService:
     return CommentService(
         comment_repo=comment_repo,
         post_repo=post_repo,
         user_profile_repo=user_profile_repo,
         media_repo=media_repo,
-        notification_service=notification_service
+        notification_service=notification_service,
+        entity_loader=entity_loader,
+        post_tag_service=post_tag_service,
+        author_snapshot_service=author_snapshot_service
     )
\ No newline at end of file
@@ -1,11 +1,12 @@
 from typing import Annotated, Optional, Dict
 
 import redis.asyncio as redis
-from fastapi import APIRouter, Depends, status, Response, Cookie, HTTPException, BackgroundTasks
+from fastapi import APIRouter, Depends, status, Request, Response, Cookie, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from slowapi.util import get_remote_address
 
 from app.api.deps import get_auth_service, get_token_service, get_user_repository
-from app.core.dependencies import get_current_user, oauth2_scheme
+from app.core.dependencies import get_current_user, get_current_user_claims, oauth2_scheme
 from app.core.redis_client import get_redis_client
 from app.core.security import create_access_token
 from app.repositories.user_repository import UserRepository
@@ -28,10 +29,9 @@ router = APIRouter()
              status_code=status.HTTP_201_CREATED, summary="Đăng ký")
 async def register(
         user_data: UserRegister,
-        background_tasks: BackgroundTasks,
         auth_service: Annotated[AuthService, Depends(get_auth_service)]
 ):
-    user_register = await auth_service.register(user_data, background_tasks)
+    user_register = await auth_service.register(user_data)
     return ResponseModel(data=user_register, message="Đăng ký user thành công")
 
 
@@ -51,10 +51,9 @@ async def verify_email(
 @router.post("/resend-verification", status_code=status.HTTP_200_OK, summary="Gửi lại mã xác minh")
 async def resend_verification(
     request: ResendVerificationRequest,
-    background_tasks: BackgroundTasks,
     auth_service: Annotated[AuthService, Depends(get_auth_service)]
 ):
-    return await auth_service.resend_verification_email(str(request.email), background_tasks)
+    return await auth_service.resend_verification_email(str(request.email))
 
 
 
@@ -62,10 +61,9 @@ async def resend_verification(
 @router.post("/forgot-password", status_code=status.HTTP_200_OK, summary="Quên mật khẩu")
 async def forgot_password(
     request: ForgotPasswordRequest,
-    background_tasks: BackgroundTasks,
     auth_service: Annotated[AuthService, Depends(get_auth_service)]
 ):
-    user_forgot_password = await auth_service.forgot_password(str(request.email), background_tasks)
+    user_forgot_password = await auth_service.forgot_password(str(request.email))
     return user_forgot_password
 
 
@@ -94,6 +92,7 @@ async def reset_password(
 # ==================== LOGIN ===========================================================================================
 @router.post("/login", response_model=Token, summary="Đăng nhập")
 async def login(
+    request: Request,
     response: Response,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
@@ -103,7 +102,8 @@ async def login(
         response=response,
         token_service=token_service,
         email=form_data.username,
-        password=form_data.password))
+        password=form_data.password,
+        client_ip=get_remote_address(request)))
     return user_login
 
 
@@ -132,7 +132,7 @@ async def get_current_user_info(
 @router.post("/logout", status_code=status.HTTP_200_OK, summary="Đăng xuất")
 async def logout(
     response: Response,
-    current_user: Annotated[dict, Depends(get_current_user)],
+    current_user: Annotated[dict, Depends(get_current_user_claims)],
     redis_client: Annotated[redis.Redis, Depends(get_redis_client)],
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
     token_service: Annotated[TokenService, Depends(get_token_service)],
@@ -153,3 +153,17 @@ async def logout(
     )
 
 
+
+# ==================== LOGOUT ALL DEVICES ==============================================================================
+@router.post("/logout-all", status_code=status.HTTP_200_OK, summary="Đăng xuất khỏi tất cả thiết bị")
+async def logout_all_devices(
+    response: Response,
+    current_user: Annotated[dict, Depends(get_current_user_claims)],
+    auth_service: Annotated[AuthService, Depends(get_auth_service)],
+):
+    """
+    Thu hồi toàn bộ phiên đăng nhập của người dùng:
+    1. Tăng thế hệ token => mọi access token đã cấp bị từ chối.
+    2. Thu hồi toàn bộ refresh token trong 1 lệnh update_many.
+    """
+    return await auth_service.logout_all_devices(response=response, user_id=current_user["_id"])
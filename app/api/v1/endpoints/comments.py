@@ -1,10 +1,12 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, status, HTTPException, Query
+from fastapi import APIRouter, Depends, status, HTTPException, Query, Request
 from app.api.deps import get_comment_service
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_active_user
 from app.schemas.comment import CommentCreate, CommentResponse, CommentCreateResponse, CommentReplyResponse
 from app.schemas.response import ResponseModel
+from app.core.responses import negotiated_response
 from app.services.comment_service import CommentService
+from app.utils.etag import etag_headers, etag_matches, not_modified
 
 router = APIRouter()
 
@@ -16,7 +18,7 @@ router = APIRouter()
 )
 async def create_comment(
     data: CommentCreate,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_active_user),
     service: CommentService = Depends(get_comment_service)
 ):
     new_comment = await service.create_comment(user_id=str(current_user["_id"]),data=data)
@@ -30,12 +32,18 @@ async def create_comment(
 )
 async def get_root_comments_for_post(
     post_id: str,
+    request: Request,
     limit: int = Query(default=10, le=100),
     cursor: Optional[str] = Query(None),
     service: CommentService = Depends(get_comment_service)
 ):
+    # Chưa có bình luận mới kể từ lần tải trước => 304
+    etag = await service.get_root_comments_etag(post_id, limit, cursor)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     comments = await service.get_root_comments_for_post(post_id, limit, cursor)
-    return ResponseModel(data=comments)
+    return negotiated_response(request, ResponseModel(data=comments), headers=etag_headers(etag))
 
 
 @router.get(
@@ -45,10 +53,10 @@ async def get_root_comments_for_post(
 )
 async def get_replies_for_comment_thread(
     root_comment_id: str,
+    request: Request,
     limit: int = Query(default=50, le=100),
     cursor: Optional[str] = Query(None),
     service: CommentService = Depends(get_comment_service)
 ):
-    print(f" đi vào đây")
     replies = await service.get_replies_for_comment_thread(root_comment_id, limit, cursor)
-    return ResponseModel(data=replies)
+    return negotiated_response(request, ResponseModel(data=replies))
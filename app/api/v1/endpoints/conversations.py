@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Optional
 from app.api import deps
 from app.api.deps import get_message_service, get_conversation_service
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_active_user
+from app.core.responses import negotiated_response
 from app.schemas.conversation import ConversationResponse, ConversationFindOrCreate, ConversationListItem
 from app.schemas.message import MessageCreate, MessageResponse
 from app.schemas.response import ResponseModel
@@ -10,6 +12,7 @@ from app.services.message_service import MessageService
 from app.repositories.message_repository import MessageRepository
 from app.services.conversation_service import ConversationService
 from app.repositories.conversation_repository import ConversationRepository
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson
 
 router = APIRouter()
 
@@ -22,7 +25,7 @@ router = APIRouter()
 async def find_or_create_conversation(
         *,
         data: ConversationFindOrCreate,
-        current_user: dict = Depends(get_current_user),
+        current_user: dict = Depends(get_active_user),
         service: ConversationService = Depends(get_conversation_service)
 ):
     conversation = await service.find_or_create_private_conversation(
@@ -39,7 +42,7 @@ async def find_or_create_conversation(
 )
 async def hide_conversation_for_oneself(
         conversation_id: str,
-        current_user: dict = Depends(get_current_user),
+        current_user: dict = Depends(get_active_user),
         service: ConversationService = Depends(get_conversation_service)
 ):
     deleted_at = await service.hide_conversation_for_user(
@@ -55,18 +58,24 @@ async def hide_conversation_for_oneself(
 )
 async def get_messages(
     *,
+    request: Request,
     conversation_id: str,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_active_user),
     message_service: MessageService = Depends(get_message_service),
     cursor: Optional[str] = None,
     limit: int = 15
 ):
+    if wants_ndjson(request):
+        return StreamingResponse(
+            message_service.stream_messages(conversation_id=conversation_id, cursor=cursor, limit=limit),
+            media_type=NDJSON_MEDIA_TYPE
+        )
     result = await message_service.get_messages(
         conversation_id=conversation_id,
         cursor=cursor,
         limit=limit
     )
-    return result
+    return negotiated_response(request, result)
 
 
 # ======================================================================================================================
@@ -78,7 +87,7 @@ async def get_messages(
 async def send_message(
     conversation_id: str,
     message_in: MessageCreate,
-    current_user: Dict = Depends(get_current_user),
+    current_user: Dict = Depends(get_active_user),
     message_service: MessageService = Depends(get_message_service)
 ):
     message = await message_service.send_message(
@@ -97,7 +106,7 @@ async def send_message(
 )
 async def get_conversations(
     *,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_active_user),
     conversation_service: ConversationService = Depends(get_conversation_service)
 ):
     conversations = await conversation_service.get_conversations_for_user(user_id=current_user["_id"])
@@ -112,7 +121,7 @@ async def get_conversations(
 async def delete_message(
         conversation_id: str,
         message_id: str,
-        current_user: dict = Depends(get_current_user),
+        current_user: dict = Depends(get_active_user),
         message_service: MessageService = Depends(get_message_service)
 ):
     success = await message_service.delete_message(
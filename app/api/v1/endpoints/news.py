@@ -1,26 +1,94 @@
-from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File, Form, Query
-from typing import List, Optional
+from fastapi import APIRouter, Depends, status, HTTPException, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Literal, Optional
 
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_active_user, get_viewer_key
 
 from app.schemas.response import ResponseModel
 from app.schemas.posts import PostCreateResponse, PostCreate, PostType, PostsListResponse, \
-    PaginatedPostsResponse, PostDetailResponse
+    PaginatedPostsResponse, PostDetailResponse, TrendingTag
 
 from app.services.news_service import PostService
 from app.api.deps import get_post_service
+from app.core.responses import negotiated_response
+from app.utils.etag import etag_matches, not_modified, set_etag
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson
 
 router = APIRouter()
 
 # GET lấy danh sách bài viết ===========================================================================================
 @router.get("/", summary="Lấy danh sách bài viết")
 async def get_news(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=5, le=50),
+        sort: Literal["new", "top"] = Query(default="new", description="new: mới nhất, top: theo điểm tương tác"),
+        service: PostService = Depends(get_post_service),
+        viewer: str = Depends(get_viewer_key)):
+
+    # sort=top: xếp theo điểm hot (cursor dạng "<score>_<post_id>")
+    if sort == "top":
+        if wants_ndjson(request):
+            return StreamingResponse(service.stream_top_posts(cursor=cursor, limit=limit, viewer=viewer),
+                                     media_type=NDJSON_MEDIA_TYPE)
+        return negotiated_response(request, await service.get_top_posts(cursor=cursor, limit=limit, viewer=viewer))
+
+    # Client gửi Accept: application/x-ndjson => stream từng bài viết, pagination ở dòng cuối
+    if wants_ndjson(request):
+        return StreamingResponse(service.stream_all_posts(cursor=cursor, limit=limit, viewer=viewer),
+                                 media_type=NDJSON_MEDIA_TYPE)
+
+    # Trả thẳng JSON đã serialize (có thể lấy từ cache), không qua jsonable_encoder
+    payload = await service.get_feed_json(cursor=cursor, limit=limit, viewer=viewer)
+    return Response(content=payload, media_type="application/json")
+
+
+# Tìm kiếm bài viết (khai báo trước /{post_id} để "search" không bị hiểu là post_id) ===================================
+@router.get("/search", response_model=PaginatedPostsResponse, summary="Tìm kiếm bài viết")
+async def search_posts(
+        q: str = Query(..., min_length=1, max_length=100),
         cursor: Optional[str] = None,
         limit: int = Query(default=5, le=50),
         service: PostService = Depends(get_post_service)):
 
-    posts = await service.get_all_posts(cursor=cursor, limit=limit)
-    return posts
+    payload = await service.search_posts_json(query=q, cursor=cursor, limit=limit)
+    return Response(content=payload, media_type="application/json")
+
+
+# Hashtag thịnh hành ===================================================================================================
+@router.get("/trending", response_model=ResponseModel[List[TrendingTag]], summary="Hashtag thịnh hành")
+async def get_trending_tags(
+        limit: int = Query(default=10, ge=1, le=50),
+        service: PostService = Depends(get_post_service)):
+
+    tags = await service.get_trending_tags(limit=limit)
+    return ResponseModel(data=tags, message="Lấy hashtag thịnh hành thành công")
+
+
+# Bài viết gắn hashtag =================================================================================================
+@router.get("/tags/{tag}", response_model=PaginatedPostsResponse, summary="Bài viết theo hashtag")
+async def get_tag_posts(
+        tag: str,
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=5, le=50),
+        service: PostService = Depends(get_post_service)):
+
+    posts = await service.get_tag_posts(tag=tag, cursor=cursor, limit=limit)
+    return negotiated_response(request, posts)
+
+
+# Bài viết / bình luận nhắc tới người dùng hiện tại (@mention) =========================================================
+@router.get("/mentions", response_model=PaginatedPostsResponse, summary="Bài viết nhắc tới tôi")
+async def get_mention_posts(
+        request: Request,
+        cursor: Optional[str] = None,
+        limit: int = Query(default=5, le=50),
+        service: PostService = Depends(get_post_service),
+        current_user: dict = Depends(get_active_user)):
+
+    posts = await service.get_mention_posts(user_id=current_user['_id'], cursor=cursor, limit=limit)
+    return negotiated_response(request, posts)
 
 
 # Thêm bài viết mới ====================================================================================================
@@ -35,7 +103,7 @@ async def create_post(
     privacy: PostType = Form(...),
     files: Optional[List[UploadFile]] = File(None),
     service: PostService = Depends(get_post_service),
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_active_user),
 ):
     post_data = PostCreate(
         content=content,
@@ -57,9 +125,21 @@ async def create_post(
 @router.get("/{post_id}", response_model=ResponseModel[PostDetailResponse], summary="Xem chi tiết bài viết")
 async def get_post(
         post_id:str,
-        service: PostService = Depends(get_post_service)):
+        request: Request,
+        response: Response,
+        service: PostService = Depends(get_post_service),
+        viewer: str = Depends(get_viewer_key)):
+
+    # Client đang giữ bản mới nhất => 304, không phải build lại response
+    etag = await service.get_post_etag(post_id)
+    # Bài viết tồn tại thì tính lượt xem (kể cả khi trả 304)
+    if etag:
+        await service.record_views(viewer, [post_id])
+    if etag_matches(request, etag):
+        return not_modified(etag)
 
     post = await service.get_detail_post(post_id)
+    set_etag(response, etag)
     return ResponseModel(data=post, message="Lấy thông tin bài viết thành công")
 
 
@@ -72,7 +152,7 @@ async def update_post(
         keep_media_ids: Optional[List[str]] = Form(None),  # Nhận list ID dạng form data
         files: Optional[List[UploadFile]] = File(None),  # Nhận file mới
         service: PostService = Depends(get_post_service),
-        current_user: dict = Depends(get_current_user)
+        current_user: dict = Depends(get_active_user)
 ):
     # Xử lý trường hợp list gửi lên là None
     if keep_media_ids is None:
@@ -97,7 +177,7 @@ async def update_post(
 async def delete_post(
         post_id:str,
         service: PostService = Depends(get_post_service),
-        current_user: dict = Depends(get_current_user)):
+        current_user: dict = Depends(get_active_user)):
 
     print(f"id người dùng: {current_user['_id']}")
     post = await service.delete_post(post_id, current_user['_id'])
@@ -1,11 +1,14 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
 
 from app.api.deps import get_notification_service
-from app.core.dependencies import get_current_user
+from app.core.responses import negotiated_response
+from app.core.dependencies import get_active_user
 from app.schemas.notification import Notification
 from app.schemas.response import ResponseModel
 from app.services.notification_service import NotificationService
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson
 
 router = APIRouter()
 
@@ -15,13 +18,20 @@ router = APIRouter()
     summary="Lấy danh sách thông báo của người dùng"
 )
 async def get_my_notifications(
-    current_user: dict = Depends(get_current_user),
+    request: Request,
+    current_user: dict = Depends(get_active_user),
     limit: int = Query(20, ge=1, le=100),
     cursor: Optional[str] = Query(None),
     service: NotificationService = Depends(get_notification_service)
 ):
+    # Stream NDJSON: mỗi dòng 1 thông báo, dòng cuối là pagination (có next_cursor)
+    if wants_ndjson(request):
+        return StreamingResponse(
+            service.stream_notifications_for_user(user_id=str(current_user["_id"]), limit=limit, cursor=cursor),
+            media_type=NDJSON_MEDIA_TYPE
+        )
     notifications = await service.get_notifications_for_user(user_id=str(current_user["_id"]), limit=limit, cursor=cursor)
-    return ResponseModel(data=notifications)
+    return negotiated_response(request, ResponseModel(data=notifications))
 
 @router.post(
     "/{notification_id}/read",
@@ -30,7 +40,7 @@ async def get_my_notifications(
 )
 async def mark_notification_as_read(
     notification_id: str,
-    current_user: dict = Depends(get_current_user),
+    current_user: dict = Depends(get_active_user),
     service: NotificationService = Depends(get_notification_service)
 ):
     await service.mark_notification_as_read(notification_id=notification_id, user_id=str(current_user["_id"]))
@@ -1,5 +1,6 @@
 from typing import Annotated, Optional
-from fastapi import APIRouter, Depends, status, UploadFile, File, Form, Query
+from fastapi import APIRouter, Depends, status, UploadFile, File, Form, Query, Request, Response
+from fastapi.responses import StreamingResponse
 
 from app.schemas.media import MediaResponse, MediaType
 from app.schemas.response import ResponseModel
@@ -9,8 +10,11 @@ from app.services.upload_service import UploadService
 from app.services.user_profile_service import UserProfileService
 
 from app.services.user_service import UserService
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_active_user
 from app.api.deps import get_user_service, get_user_profile_service, get_post_service
+from app.core.responses import negotiated_response
+from app.utils.etag import etag_matches, not_modified, set_etag
+from app.utils.ndjson import NDJSON_MEDIA_TYPE, wants_ndjson
 
 router = APIRouter()
 
@@ -23,7 +27,7 @@ router = APIRouter()
 async def upload_avatar(
         file: UploadFile = File(...),
         service: UserProfileService = Depends(get_user_profile_service),
-        user: dict = Depends(get_current_user)
+        user: dict = Depends(get_active_user)
 ):
     updated_avatar = await service.update_profile_avatar(file=file, user_id=user['_id'])
     return ResponseModel(data=updated_avatar)
@@ -38,7 +42,7 @@ async def upload_avatar(
 async def upload_cover(
         file: UploadFile = File(...),
         service: UserProfileService = Depends(get_user_profile_service),
-        user: dict = Depends(get_current_user)
+        user: dict = Depends(get_active_user)
 ):
     updated_cover = await service.update_profile_cover(file=file, user_id=user['_id'])
     return ResponseModel(data=updated_cover)
@@ -46,22 +50,36 @@ async def upload_cover(
 
 @router.get("/{user_id}/posts", summary="Lấy danh sách bài viết của một người dùng")
 async def get_user_posts(
+        request: Request,
         user_id: str,
         cursor: Optional[str] = None,
         limit: int = Query(default=5, le=50),
         service: PostService = Depends(get_post_service),
-        current_user: dict = Depends(get_current_user)):
-    return await service.get_user_posts(
+        current_user: dict = Depends(get_active_user)):
+    if wants_ndjson(request):
+        return StreamingResponse(
+            service.stream_user_posts(user_id=user_id, current_user_id=current_user["_id"], cursor=cursor, limit=limit),
+            media_type=NDJSON_MEDIA_TYPE
+        )
+    posts = await service.get_user_posts(
         user_id=user_id,
         current_user_id=current_user["_id"],
         cursor=cursor,
         limit=limit
     )
+    return negotiated_response(request, posts)
 
 @router.get("/{user_id}", response_model=ResponseModel[UserProfileDetail], summary="Lấy thông tin profile của người dùng")
 async def get_profile_user(
         user_id: str,
+        request: Request,
+        response: Response,
         service: UserProfileService = Depends(get_user_profile_service),
-        current_user: dict = Depends(get_current_user)):
+        current_user: dict = Depends(get_active_user)):
+    etag = await service.get_profile_etag(user_id)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     profile_user = await service.get_profile_by_id(user_id)
+    set_etag(response, etag)
     return ResponseModel(data=profile_user, message="Lấy thông tin user thành công")
@@ -0,0 +1,59 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from app.api.deps import get_reaction_service
+from app.core.dependencies import get_active_user
+from app.schemas.reaction import MyReactionsResponse, ReactionCreate, ReactionResponse, ReactionTarget
+from app.schemas.response import ResponseModel
+from app.services.reaction_service import ReactionService
+
+router = APIRouter()
+
+# Cảm xúc của tôi trên nhiều bài viết / bình luận (vd: cả 1 trang feed) ================================================
+@router.get(
+    "/{target_type}/mine",
+    response_model=ResponseModel[MyReactionsResponse],
+    summary="Cảm xúc của tôi trên danh sách bài viết / bình luận"
+)
+async def get_my_reactions(
+    target_type: ReactionTarget,
+    ids: List[str] = Query(..., max_length=100),
+    current_user: dict = Depends(get_active_user),
+    service: ReactionService = Depends(get_reaction_service)
+):
+    reactions = await service.get_my_reactions(user_id=str(current_user["_id"]), target_type=target_type,
+                                               target_ids=ids)
+    return ResponseModel(data=reactions)
+
+
+# Thả / đổi cảm xúc ====================================================================================================
+@router.put(
+    "/{target_type}/{target_id}",
+    response_model=ResponseModel[ReactionResponse],
+    summary="Thả cảm xúc"
+)
+async def react(
+    target_type: ReactionTarget,
+    target_id: str,
+    data: ReactionCreate,
+    current_user: dict = Depends(get_active_user),
+    service: ReactionService = Depends(get_reaction_service)
+):
+    reaction = await service.react(user_id=str(current_user["_id"]), target_type=target_type,
+                                   target_id=target_id, reaction=data.type)
+    return ResponseModel(data=reaction)
+
+
+# Bỏ cảm xúc ===========================================================================================================
+@router.delete(
+    "/{target_type}/{target_id}",
+    response_model=ResponseModel[ReactionResponse],
+    summary="Bỏ cảm xúc"
+)
+async def unreact(
+    target_type: ReactionTarget,
+    target_id: str,
+    current_user: dict = Depends(get_active_user),
+    service: ReactionService = Depends(get_reaction_service)
+):
+    reaction = await service.unreact(user_id=str(current_user["_id"]), target_type=target_type, target_id=target_id)
+    return ResponseModel(data=reaction)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter
 from app.api.v1.endpoints import auth, users, news, uploads, profiles, conversations, comments
-from app.api.v1.endpoints import notifications
+from app.api.v1.endpoints import notifications, reactions
 
 api_router = APIRouter()
 
@@ -12,6 +12,12 @@ api_router.include_router(
     tags=["Comments"]
 )
 
+api_router.include_router(
+    reactions.router,
+    prefix="/reactions",
+    tags=["Reactions"]
+)
+
 api_router.include_router(
     conversations.router,
     prefix="/conversations",
@@ -0,0 +1,272 @@
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+
+# Chuyển dữ liệu Mongo (ObjectId, datetime) sang dạng lưu được vào Redis
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+class LocalTTLCache:
+    """
+    Cache LRU trong tiến trình, mỗi key có thời gian sống riêng.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            self._data.pop(key, None)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        if ttl <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+
+        # Vượt quá kích thước => bỏ key ít dùng nhất
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TieredCache:
+    """
+    Cache 2 tầng: L1 trong tiến trình (LRU) đứng trước L2 là Redis.
+    Lỗi Redis không làm hỏng request, chỉ coi như cache miss.
+    """
+
+    def __init__(self, namespace: str, redis_ttl_seconds: int, local_ttl_seconds: float, max_size: int):
+        self.namespace = namespace
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.local = LocalTTLCache(max_size=max_size, ttl_seconds=local_ttl_seconds)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    # Lấy 1 key ========================================================================================================
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        results = await self.get_many([key])
+        return results.get(key)
+
+    # Lấy nhiều key (L1 trước, phần còn thiếu lấy bằng 1 lệnh MGET) ====================================================
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+        missing: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                results[key] = value
+            else:
+                missing.append(key)
+
+        if not missing:
+            return results
+
+        try:
+            redis = await get_direct_redis_client()
+            raw_values = await redis.mget([self._key(k) for k in missing])
+        except Exception as e:
+            logger.warning(f"Không đọc được cache {self.namespace} từ Redis: {e}")
+            return results
+
+        for key, raw in zip(missing, raw_values):
+            if raw is None:
+                continue
+            value = json.loads(raw)
+            self.local.set(key, value)
+            results[key] = value
+
+        return results
+
+    # Ghi 1 key ========================================================================================================
+    async def set(self, key: str, value: Dict[str, Any]) -> None:
+        await self.set_many({key: value})
+
+    # Ghi nhiều key bằng 1 pipeline ====================================================================================
+    async def set_many(self, values: Dict[str, Dict[str, Any]]) -> None:
+        if not values:
+            return
+
+        encoded = {}
+        for key, value in values.items():
+            raw = json.dumps(value, default=_json_default)
+            # Lưu bản đã qua JSON để L1 và L2 trả về cùng một dạng dữ liệu
+            self.local.set(key, json.loads(raw))
+            encoded[key] = raw
+
+        try:
+            redis = await get_direct_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, raw in encoded.items():
+                    pipe.setex(self._key(key), self.redis_ttl_seconds, raw)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Không ghi được cache {self.namespace} vào Redis: {e}")
+
+    # Xóa key ở cả 2 tầng ==============================================================================================
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+
+        for key in keys:
+            self.local.delete(key)
+
+        try:
+            redis = await get_direct_redis_client()
+            await redis.delete(*[self._key(k) for k in keys])
+        except Exception as e:
+            logger.warning(f"Không xóa được cache {self.namespace} trên Redis: {e}")
+
+
+class HashCache:
+    """
+    Cache 2 tầng với L2 là Redis hash (mỗi key 1 hash), đọc / ghi nhiều key bằng 1 pipeline.
+    Giá trị là dict phẳng kiểu {str: str}, None được lưu thành chuỗi rỗng.
+    """
+
+    def __init__(self, namespace: str, redis_ttl_seconds: int, local_ttl_seconds: float, max_size: int):
+        self.namespace = namespace
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self.local = LocalTTLCache(max_size=max_size, ttl_seconds=local_ttl_seconds)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    # Lấy nhiều key (L1 trước, phần còn thiếu lấy bằng 1 pipeline HGETALL) =============================================
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, str]]:
+        results: Dict[str, Dict[str, str]] = {}
+        missing: List[str] = []
+
+        for key in dict.fromkeys(keys):
+            value = self.local.get(key)
+            if value is not None:
+                results[key] = value
+            else:
+                missing.append(key)
+
+        if not missing:
+            return results
+
+        try:
+            redis = await get_direct_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key in missing:
+                    pipe.hgetall(self._key(key))
+                values = await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Không đọc được cache {self.namespace} từ Redis: {e}")
+            return results
+
+        for key, value in zip(missing, values):
+            if not value:
+                continue
+            self.local.set(key, value)
+            results[key] = value
+
+        return results
+
+    # Ghi nhiều key bằng 1 pipeline (HSET + EXPIRE) ====================================================================
+    async def set_many(self, values: Dict[str, Dict[str, Any]]) -> None:
+        if not values:
+            return
+
+        encoded = {}
+        for key, value in values.items():
+            mapping = {field: "" if item is None else str(item) for field, item in value.items()}
+            self.local.set(key, mapping)
+            encoded[key] = mapping
+
+        try:
+            redis = await get_direct_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                for key, mapping in encoded.items():
+                    pipe.hset(self._key(key), mapping=mapping)
+                    pipe.expire(self._key(key), self.redis_ttl_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Không ghi được cache {self.namespace} vào Redis: {e}")
+
+    # Xóa key ở cả 2 tầng ==============================================================================================
+    async def delete(self, *keys: str) -> None:
+        if not keys:
+            return
+
+        for key in keys:
+            self.local.delete(key)
+
+        try:
+            redis = await get_direct_redis_client()
+            await redis.delete(*[self._key(k) for k in keys])
+        except Exception as e:
+            logger.warning(f"Không xóa được cache {self.namespace} trên Redis: {e}")
+
+
+# Cache thông tin người dùng đã xác thực (user + profile + avatar + cover) =============================================
+principal_cache = TieredCache(
+    namespace="auth:principal",
+    redis_ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl_seconds=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+# Cache trạng thái tài khoản (status, email_verified) cho các endpoint chỉ cần user_id =================================
+user_status_cache = TieredCache(
+    namespace="auth:user-status",
+    redis_ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl_seconds=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    max_size=settings.PRINCIPAL_CACHE_MAX_SIZE,
+)
+
+
+# Xóa cache người dùng khi avatar, cover, trạng thái thay đổi ==========================================================
+async def invalidate_principal(user_id: Any) -> None:
+    await principal_cache.delete(str(user_id))
+    await user_status_cache.delete(str(user_id))
+
+
+# Cache thẻ người dùng công khai (id, display_name, avatar) dùng ở feed, bình luận, danh sách trò chuyện ===============
+profile_card_cache = HashCache(
+    namespace="profile:card",
+    redis_ttl_seconds=settings.PROFILE_CARD_CACHE_TTL_SECONDS,
+    local_ttl_seconds=settings.PROFILE_CARD_CACHE_LOCAL_TTL_SECONDS,
+    max_size=settings.PROFILE_CARD_CACHE_MAX_SIZE,
+)
+
+
+# Xóa thẻ người dùng khi avatar, cover, tên hiển thị thay đổi ==========================================================
+async def invalidate_profile_card(user_id: Any) -> None:
+    await profile_card_cache.delete(str(user_id))
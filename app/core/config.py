@@ -35,6 +35,25 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_SECONDS: int
+    # Refresh token vừa xoay vòng bị gửi lại trong khoảng này => request song song (2 tab), không phải bị đánh cắp
+    REFRESH_TOKEN_REUSE_GRACE_SECONDS: int = 10
+
+    # Cấu hình băm mật khẩu (bcrypt chạy trên thread pool riêng)
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Chặn dò mật khẩu khi đăng nhập (khóa theo tài khoản / IP, thời gian khóa tăng gấp đôi mỗi lần)
+    LOGIN_MAX_FAILURES_PER_ACCOUNT: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 20
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+    LOGIN_LOCKOUT_BASE_SECONDS: int = 30
+    LOGIN_LOCKOUT_MAX_SECONDS: int = 3600
+
+    # Cấu hình OTP (xác minh email / quên mật khẩu)
+    OTP_TTL_SECONDS: int = 300
+    OTP_RESEND_COOLDOWN_SECONDS: int = 60
+    OTP_MAX_ATTEMPTS: int = 5
 
     # Cấu hình email
     MAIL_USERNAME: str
@@ -45,6 +64,16 @@ class Settings(BaseSettings):
     MAIL_STARTTLS: bool = True
     MAIL_SSL_TLS: bool = False
     MAIL_FROM_NAME: str = PROJECT_NAME
+    MAIL_USE_CREDENTIALS: bool = True
+    MAIL_VALIDATE_CERTS: bool = True
+
+    # Hàng đợi gửi email (mỗi worker giữ 1 kết nối SMTP)
+    MAIL_WORKERS: int = 2
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_QUEUE_MAX_SIZE: int = 10000
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_RETRY_BACKOFF_SECONDS: float = 2.0
+    MAIL_IDLE_TIMEOUT_SECONDS: float = 60.0
 
     # Địa chỉ url back-end
     SERVER_BASE_URL: str
@@ -66,6 +95,48 @@ class Settings(BaseSettings):
     REDIS_PASSWORD: str
     REDIS_DB: int
 
+    # Cache thông tin người dùng đã xác thực (get_current_user)
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 60
+    PRINCIPAL_CACHE_LOCAL_TTL_SECONDS: int = 5
+    PRINCIPAL_CACHE_MAX_SIZE: int = 10000
+    VERIFIED_TOKEN_CACHE_MAX_SIZE: int = 50000
+
+    # Cache thẻ người dùng công khai (tên hiển thị + avatar của tác giả bài viết, bình luận...)
+    PROFILE_CARD_CACHE_TTL_SECONDS: int = 300
+    PROFILE_CARD_CACHE_LOCAL_TTL_SECONDS: int = 5
+    PROFILE_CARD_CACHE_MAX_SIZE: int = 20000
+
+    # Cache các trang đầu của feed công khai (JSON đã serialize)
+    FEED_CACHE_PAGES: int = 3
+    FEED_CACHE_TTL_SECONDS: int = 60
+    FEED_CACHE_LOCK_SECONDS: int = 5
+    FEED_CACHE_LOCK_WAIT_SECONDS: float = 2.0
+
+    # Cache kết quả tìm kiếm bài viết
+    SEARCH_CACHE_TTL_SECONDS: int = 30
+
+    # Hashtag thịnh hành (bucket 5 phút, cửa sổ 24h)
+    TRENDING_BUCKET_SECONDS: int = 300
+    TRENDING_WINDOW_SECONDS: int = 86400
+    TRENDING_HALF_LIFE_SECONDS: int = 21600
+    TRENDING_FLUSH_SECONDS: float = 10.0
+    TRENDING_CANDIDATES: int = 200
+    TRENDING_BUCKET_MAX_KEYS: int = 1000
+    TRENDING_CACHE_SECONDS: int = 30
+    TRENDING_TOP_K: int = 50
+
+    # Bộ đếm bình luận / cảm xúc (cộng dồn trên Redis, ghi xuống Mongo định kỳ)
+    COUNTER_SHARDS: int = 8
+    COUNTER_FLUSH_SECONDS: float = 5.0
+    COUNTER_LOCK_SECONDS: int = 30
+
+    # Cache cảm xúc của từng người dùng (tôi đã thả cảm xúc chưa)
+    REACTION_CACHE_TTL_SECONDS: int = 86400
+
+    # Lượt xem bài viết (HyperLogLog trên Redis, ghi số người xem xuống Mongo định kỳ)
+    VIEW_FLUSH_SECONDS: float = 30.0
+    VIEW_FLUSH_BATCH: int = 500
+
     # Cấu hình cài đặt Redis
     RATE_LIMIT_ENABLED: bool = False
     RATE_LIMIT_DEFAULT: str = "100/minute"
@@ -0,0 +1,182 @@
+import asyncio
+import random
+from collections import defaultdict
+import secrets
+from typing import Awaitable, Callable, Dict, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+# Lấy số đếm của 1 shard để ghi xuống Mongo
+# KEYS[1] = shard đang nhận số đếm, KEYS[2] = shard đang ghi dở
+# Lần trước ghi lỗi (KEYS[2] còn) thì ghi lại lần đó trước, nếu không thì đổi tên shard => request mới ghi vào shard mới
+_TAKE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    if redis.call('EXISTS', KEYS[1]) == 0 then
+        return {}
+    end
+    redis.call('RENAME', KEYS[1], KEYS[2])
+end
+return redis.call('HGETALL', KEYS[2])
+"""
+
+# Chỉ gia hạn khóa nếu vẫn là của mình; ARGV[1] = token, ARGV[2] = TTL (ms)
+_EXTEND_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('PEXPIRE', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Chỉ xóa khóa nếu vẫn là của mình
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class ShardedCounters:
+    """
+    Bộ đếm hấp thụ ghi (số bình luận, lượt cảm xúc...) thay cho $inc trực tiếp lên document.
+    - Mỗi lần tăng chỉ là HINCRBY vào 1 trong N hash shard (chọn ngẫu nhiên) => bài viết hot không dồn ghi vào
+      1 document Mongo / 1 key Redis
+    - Task nền định kỳ lấy từng shard (RENAME nguyên tử), cộng dồn theo field của mọi shard rồi gọi apply() 1 lần
+      để ghi xuống Mongo bằng bulk_write, ghi xong mới xóa shard đã lấy; ghi lỗi thì lần sau ghi lại
+    - Mỗi shard có khóa (SET NX, TTL lock_seconds) nên nhiều worker cùng chạy không ghi trùng. Khóa được gia hạn
+      mỗi lock_seconds / 3 cho tới khi ghi xong => apply() chạy lâu hơn TTL cũng không bị worker khác lấy mất
+      shard đang ghi dở
+    Số đếm trên Mongo chậm tối đa khoảng flush_seconds. Vẫn có thể cộng trùng 1 lô (at-least-once) khi worker chết
+    giữa lúc bulk_write xong và xóa shard, hoặc khi không gia hạn được khóa (mất kết nối Redis lâu hơn TTL) trong
+    lúc đang ghi - trường hợp sau có log lỗi.
+    """
+
+    def __init__(self, namespace: str, shards: int, flush_seconds: float, lock_seconds: int):
+        self.namespace = namespace
+        self.shards = shards
+        self.flush_seconds = flush_seconds
+        self.lock_seconds = lock_seconds
+        self._apply: Optional[Callable[[Dict[str, int]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _shard_key(self, shard: int) -> str:
+        return f"{self.namespace}:{shard}"
+
+    # Cộng nhiều field trong 1 round trip ==============================================================================
+    async def incr_many(self, deltas: Dict[str, int]) -> None:
+        deltas = {field: amount for field, amount in deltas.items() if amount}
+        if not deltas:
+            return
+
+        key = self._shard_key(random.randrange(self.shards))
+        redis = await get_direct_redis_client()
+        async with redis.pipeline(transaction=False) as pipe:
+            for field, amount in deltas.items():
+                pipe.hincrby(key, field, amount)
+            await pipe.execute()
+
+    async def incr(self, field: str, amount: int = 1) -> None:
+        await self.incr_many({field: amount})
+
+    # Gia hạn các khóa đang giữ cho tới khi bị hủy =====================================================================
+    async def _keep_locks(self, extend, locks: Dict[str, str]) -> None:
+        while True:
+            await asyncio.sleep(self.lock_seconds / 3)
+            for lock_key, token in list(locks.items()):
+                try:
+                    if not await extend(keys=[lock_key], args=[token, self.lock_seconds * 1000]):
+                        logger.error(f"Mất khóa {lock_key} khi đang ghi số đếm, lô này có thể bị cộng trùng")
+                except Exception as e:
+                    logger.warning(f"Không gia hạn được khóa {lock_key}: {e}")
+
+    # Ghi số đếm của mọi shard xuống Mongo (gộp tất cả shard thành 1 lần apply) ========================================
+    async def flush(self) -> int:
+        """
+        Trả về số field đã ghi.
+        """
+        if self._apply is None:
+            return 0
+
+        redis = await get_direct_redis_client()
+        take = redis.register_script(_TAKE_SCRIPT)
+        release = redis.register_script(_RELEASE_SCRIPT)
+        extend = redis.register_script(_EXTEND_SCRIPT)
+
+        locks: Dict[str, str] = {}
+        taken = []
+        deltas: Dict[str, int] = defaultdict(int)
+        keepalive = asyncio.create_task(self._keep_locks(extend, locks))
+        try:
+            for shard in range(self.shards):
+                live_key = self._shard_key(shard)
+                lock_key = f"{live_key}:lock"
+                token = secrets.token_hex(8)
+
+                # Worker khác đang ghi shard này => bỏ qua, lần sau ghi
+                if not await redis.set(lock_key, token, nx=True, ex=self.lock_seconds):
+                    continue
+                locks[lock_key] = token
+
+                flushing_key = f"{live_key}:flushing"
+                raw = await take(keys=[live_key, flushing_key])
+                if not raw:
+                    continue
+
+                # HGETALL qua Lua trả về [field, value, field, value...]
+                taken.append(flushing_key)
+                for i in range(0, len(raw), 2):
+                    deltas[raw[i]] += int(raw[i + 1])
+
+            if not taken:
+                return 0
+
+            deltas = {field: amount for field, amount in deltas.items() if amount}
+            if deltas:
+                await self._apply(deltas)
+            # Ghi xong mới xóa, ghi lỗi thì các shard đã lấy được ghi lại ở lần sau
+            await redis.delete(*taken)
+            return len(deltas)
+        finally:
+            keepalive.cancel()
+            await asyncio.gather(keepalive, return_exceptions=True)
+            for lock_key, token in locks.items():
+                try:
+                    await release(keys=[lock_key], args=[token])
+                except Exception as e:
+                    logger.warning(f"Không trả được khóa {lock_key}: {e}")
+
+    # Task nền ghi số đếm định kỳ ======================================================================================
+    def start(self, apply: Callable[[Dict[str, int]], Awaitable[None]]) -> None:
+        self._apply = apply
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Ghi nốt số đếm trước khi tắt
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Không ghi được số đếm {self.namespace} khi tắt: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Lỗi khi ghi số đếm {self.namespace}: {e}")
+
+
+# Số bình luận + lượt cảm xúc của bài viết / bình luận =================================================================
+engagement_counters = ShardedCounters(
+    namespace="counters:engagement",
+    shards=settings.COUNTER_SHARDS,
+    flush_seconds=settings.COUNTER_FLUSH_SECONDS,
+    lock_seconds=settings.COUNTER_LOCK_SECONDS,
+)
@@ -1,92 +1,161 @@
+import hashlib
 from datetime import datetime, timezone
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 import redis.asyncio as redis
 
 from app.exceptions.auth import Ban, XacMinhEmail
 from app.repositories.media_repository import MediaRepository
+from app.repositories.projections import MEDIA_PUBLIC_FIELDS, PROFILE_PRINCIPAL_FIELDS, USER_PRINCIPAL_FIELDS
 from app.repositories.user_profile_repository import UserProfileRepository
 from app.repositories.user_repository import UserRepository
 from app.core.security import verify_scoped_token
 from fastapi.security import OAuth2PasswordBearer
+from slowapi.util import get_remote_address
 from typing import Dict, Any, Optional
+from app.core.cache import principal_cache, user_status_cache
 from app.core.redis_client import get_redis_client
 from app.core.config import settings
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
+# Endpoint công khai: có token thì dùng, không có cũng không báo lỗi
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login", auto_error=False)
 
-# Hàm xác minh người dùng dựa trên token cho mỗi Request
-async def get_current_user(
-        token: str = Depends(oauth2_scheme),
-        redis_client: redis.Redis = Depends(get_redis_client)
-) -> Dict[str, Any]:
+
+# Truy vấn Mongo dựng thông tin đầy đủ của user (user + profile + avatar + cover) ======================================
+async def _load_principal(user_id: str) -> Optional[Dict[str, Any]]:
     user_repo = UserRepository()
     user_profile_repo = UserProfileRepository()
     media_repo = MediaRepository()
 
-    try:
-        # Xác minh token để lấy user_id
-        user_id = await verify_scoped_token(
-            token,
-            required_scope="access_token",
-            redis_client=redis_client
-        )
-        # print(f"User:id {user_id}")
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail=f"Invalid token: {e}",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-
     # Kiểm tra User tồn tại
-    user = await user_repo.get_by_id(user_id)
-    # print(f"test user{user}")
-    # print(f"user_id {user}")
+    user = await user_repo.get_by_id(user_id, USER_PRINCIPAL_FIELDS)
     if not user:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found"
-        )
+        return None
 
-    # # Check status cho mỗi request
-    if user.get("status") == "pending" or not user.get("email_verified", False):
-         raise XacMinhEmail()
-
-    if user.get("status") == "suspended":
-         raise Ban()
-
-    # 2. Lấy thông tin cá nhân
-    profile = await user_profile_repo.get_by_user_id(user_id)
+    # Lấy thông tin cá nhân
+    profile = await user_profile_repo.get_by_user_id(user_id, PROFILE_PRINCIPAL_FIELDS)
 
     avatar_url = None
     if profile and profile.get("avatar"):
-        media = await media_repo.get_by_id(profile["avatar"])
+        media = await media_repo.get_by_id(profile["avatar"], MEDIA_PUBLIC_FIELDS)
         if media and media.get("url"):
             avatar_url = f"{settings.SERVER_BASE_URL}/{media.get('url')}"
 
     cover_url = None
     if profile and profile.get("cover"):
-        media = await media_repo.get_by_id(profile["cover"])
+        media = await media_repo.get_by_id(profile["cover"], MEDIA_PUBLIC_FIELDS)
         if media and media.get("url"):
             cover_url = f"{settings.SERVER_BASE_URL}/{media.get('url')}"
 
-    full_user_data = {
+    return {
         "_id": str(user["_id"]),
         "email": user["email"],
         "status": user["status"],
-        "created_at": user["created_at"],
+        "email_verified": user.get("email_verified", False),
+        # Lưu dạng ISO string: principal đi qua JSON của cache => cache hit / miss trả về cùng kiểu
+        "created_at": user["created_at"].isoformat() if user.get("created_at") else None,
         "first_name": profile.get("first_name") if profile else None,
         "last_name": profile.get("last_name") if profile else None,
         "avatar": avatar_url,
         "cover": cover_url,
     }
 
-    # if "_id" in user:
-    #     user["id"] = str(user["_id"])
 
-    return full_user_data
+# Kiểm tra trạng thái tài khoản ========================================================================================
+def _check_user_status(user_data: Dict[str, Any]) -> None:
+    if user_data.get("status") == "pending" or not user_data.get("email_verified", False):
+         raise XacMinhEmail()
+
+    if user_data.get("status") == "suspended":
+         raise Ban()
 
 
+# Tầng 1: chỉ xác minh token, trả về claims (không truy vấn Mongo) =====================================================
+async def get_current_user_claims(
+        token: str = Depends(oauth2_scheme),
+        redis_client: redis.Redis = Depends(get_redis_client)
+) -> Dict[str, Any]:
+    try:
+        # Xác minh token để lấy user_id
+        user_id = await verify_scoped_token(
+            token,
+            required_scope="access_token",
+            redis_client=redis_client
+        )
+        # print(f"User:id {user_id}")
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=f"Invalid token: {e}",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    return {"_id": user_id}
+
+
+# Tầng 2: claims + kiểm tra trạng thái tài khoản (có cache) ============================================================
+async def get_active_user(
+        claims: Dict[str, Any] = Depends(get_current_user_claims)
+) -> Dict[str, Any]:
+    user_id = claims["_id"]
+
+    # Đã có thông tin đầy đủ trong cache thì dùng luôn
+    user_status = await principal_cache.get(user_id)
+    if user_status is None:
+        user_status = await user_status_cache.get(user_id)
+
+    if user_status is None:
+        user = await UserRepository().get_by_id(user_id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        user_status = {
+            "status": user["status"],
+            "email_verified": user.get("email_verified", False),
+        }
+        await user_status_cache.set(user_id, user_status)
+
+    _check_user_status(user_status)
+
+    return claims
+
+
+# Tầng 3: thông tin đầy đủ của user (profile, avatar, cover) ===========================================================
+async def get_current_user(
+        claims: Dict[str, Any] = Depends(get_current_user_claims)
+) -> Dict[str, Any]:
+    user_id = claims["_id"]
+
+    # 1. Lấy thông tin từ cache, miss thì mới truy vấn Mongo
+    full_user_data = await principal_cache.get(user_id)
+    if full_user_data is None:
+        full_user_data = await _load_principal(user_id)
+        if not full_user_data:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found"
+            )
+        await principal_cache.set(user_id, full_user_data)
+
+    # 2. Check status cho mỗi request
+    _check_user_status(full_user_data)
+
+    return full_user_data
 
 
-    #
-    # return user
\ No newline at end of file
+# Người xem bài viết (đếm lượt xem không trùng): user id nếu có token, khách thì dấu vân tay ip + user agent ===========
+async def get_viewer_key(
+        request: Request,
+        token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> str:
+    if token:
+        try:
+            # Chỉ cần biết ai đang xem => không kiểm tra blacklist (không tốn thêm round trip Redis)
+            user_id = await verify_scoped_token(token, required_scope="access_token")
+            return f"user:{user_id}"
+        except Exception:
+            pass
+
+    fingerprint = f"{get_remote_address(request)}|{request.headers.get('user-agent', '')}"
+    return f"anon:{hashlib.blake2b(fingerprint.encode(), digest_size=8).hexdigest()}"
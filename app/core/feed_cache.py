@@ -0,0 +1,164 @@
+import asyncio
+import secrets
+import time
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+# Đọc trang feed đã cache trong 1 round trip
+# KEYS[1] = khóa thế hệ (generation); ARGV = namespace, limit, cursor ("" = trang đầu)
+# Trả về {generation, JSON của trang (nil nếu chưa có), độ sâu của cursor (nil nếu cursor không nằm trong N trang đầu),
+#         id các item của trang (cách nhau bởi dấu cách)}
+# Khóa trang được ghép từ generation ngay trong script để không phải đọc generation riêng 1 lần
+_READ_SCRIPT = """
+local generation = redis.call('GET', KEYS[1]) or '0'
+local prefix = ARGV[1] .. ':' .. generation .. ':' .. ARGV[2]
+local page = redis.call('GET', prefix .. ':page:' .. ARGV[3])
+local ids = false
+local depth = false
+if page then
+    ids = redis.call('GET', prefix .. ':ids:' .. ARGV[3])
+elseif ARGV[3] ~= '' then
+    depth = redis.call('HGET', prefix .. ':cursors', ARGV[3])
+end
+return {generation, page, depth, ids}
+"""
+
+# Chỉ xóa khóa nếu vẫn là của mình (khóa hết hạn rồi bị request khác lấy thì không xóa nhầm)
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class FeedCache:
+    """
+    Cache JSON đã serialize của N trang đầu feed công khai (theo từng limit) trên Redis.
+    - Mọi key gắn với 1 generation: tạo / sửa / xóa bài chỉ cần INCR generation, key cũ tự hết hạn theo TTL
+    - Trang 1 là trang không có cursor; cursor của trang k+1 được ghi lại khi build trang k, cursor lạ thì không cache
+    - Cache miss thì chỉ 1 request giữ khóa (SET NX) để query Mongo, các request khác chờ trang được ghi rồi đọc lại
+    - Id các item của trang được lưu cạnh JSON (ghi lượt xem...) để không phải parse lại JSON mỗi lần đọc
+    Lỗi Redis không làm hỏng request, chỉ coi như cache miss.
+    """
+
+    def __init__(self, namespace: str, max_pages: int, ttl_seconds: int, lock_seconds: int,
+                 lock_wait_seconds: float):
+        self.namespace = namespace
+        self.max_pages = max_pages
+        self.ttl_seconds = ttl_seconds
+        self.lock_seconds = lock_seconds
+        self.lock_wait_seconds = lock_wait_seconds
+        self.generation_key = f"{namespace}:generation"
+
+    def _prefix(self, generation: str, limit: int) -> str:
+        return f"{self.namespace}:{generation}:{limit}"
+
+    # Lấy trang từ cache, chưa có thì build (có khóa chống nhiều request cùng query) ===================================
+    async def get_or_build(self, cursor: Optional[str], limit: int,
+                           build: Callable[[], Awaitable[Tuple[str, Optional[str], List[str]]]]
+                           ) -> Tuple[str, List[str]]:
+        """
+        build() trả về (JSON của trang, next_cursor hoặc None nếu hết bài, id các item của trang).
+        Trả về (JSON của trang, id các item của trang).
+        """
+        # Trang đầu dùng tên rỗng: cursor nào của client cũng không trùng được (kể cả cursor="head")
+        page_name = cursor or ""
+        try:
+            redis = await get_direct_redis_client()
+            read = redis.register_script(_READ_SCRIPT)
+            generation, payload, depth, ids = await read(keys=[self.generation_key],
+                                                         args=[self.namespace, limit, page_name])
+        except Exception as e:
+            logger.warning(f"Không đọc được cache {self.namespace} từ Redis: {e}")
+            payload, _, ids = await build()
+            return payload, ids
+
+        if payload is not None:
+            return payload, ids.split() if ids else []
+
+        depth = 1 if cursor is None else int(depth or 0)
+        # Cursor không thuộc N trang đầu của generation hiện tại => query thẳng, không cache
+        if not depth or depth > self.max_pages:
+            payload, _, ids = await build()
+            return payload, ids
+
+        prefix = self._prefix(generation, limit)
+        page_key = f"{prefix}:page:{page_name}"
+        ids_key = f"{prefix}:ids:{page_name}"
+        lock_key = f"{prefix}:lock:{page_name}"
+        token = secrets.token_hex(8)
+
+        try:
+            acquired = await redis.set(lock_key, token, nx=True, ex=self.lock_seconds)
+        except Exception as e:
+            logger.warning(f"Không lấy được khóa {lock_key}: {e}")
+            payload, _, ids = await build()
+            return payload, ids
+
+        if not acquired:
+            cached = await self._wait_for_page(redis, page_key, ids_key)
+            if cached is not None:
+                return cached
+            # Chờ quá lâu (request giữ khóa chậm hoặc lỗi) => tự query, không ghi cache
+            payload, _, ids = await build()
+            return payload, ids
+
+        try:
+            payload, next_cursor, ids = await build()
+            # MULTI: request khác không đọc được trang mà chưa có id
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    pipe.setex(ids_key, self.ttl_seconds, " ".join(ids))
+                    pipe.setex(page_key, self.ttl_seconds, payload)
+                    if next_cursor and depth < self.max_pages:
+                        pipe.hset(f"{prefix}:cursors", next_cursor, depth + 1)
+                        pipe.expire(f"{prefix}:cursors", self.ttl_seconds)
+                    await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Không ghi được trang {page_key} vào cache: {e}")
+            return payload, ids
+        finally:
+            try:
+                release = redis.register_script(_RELEASE_SCRIPT)
+                await release(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Không trả được khóa {lock_key}: {e}")
+
+    # Chờ request đang giữ khóa ghi trang vào cache ====================================================================
+    async def _wait_for_page(self, redis, page_key: str, ids_key: str) -> Optional[Tuple[str, List[str]]]:
+        deadline = time.monotonic() + self.lock_wait_seconds
+        delay = 0.01
+        while time.monotonic() < deadline:
+            await asyncio.sleep(delay)
+            try:
+                payload, ids = await redis.mget(page_key, ids_key)
+            except Exception as e:
+                logger.warning(f"Không đọc được cache {page_key}: {e}")
+                return None
+            if payload is not None:
+                return payload, ids.split() if ids else []
+            delay = min(delay * 2, 0.1)
+        return None
+
+    # Bỏ toàn bộ trang đã cache (chuyển sang generation mới) ===========================================================
+    async def invalidate(self) -> None:
+        try:
+            redis = await get_direct_redis_client()
+            await redis.incr(self.generation_key)
+        except Exception as e:
+            logger.warning(f"Không làm mới được cache {self.namespace}: {e}")
+
+
+# Cache các trang đầu của feed công khai (GET /posts/) =================================================================
+feed_cache = FeedCache(
+    namespace="feed:public",
+    max_pages=settings.FEED_CACHE_PAGES,
+    ttl_seconds=settings.FEED_CACHE_TTL_SECONDS,
+    lock_seconds=settings.FEED_CACHE_LOCK_SECONDS,
+    lock_wait_seconds=settings.FEED_CACHE_LOCK_WAIT_SECONDS,
+)
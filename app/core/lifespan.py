@@ -5,15 +5,24 @@ from fastapi import FastAPI
 # from app.core.database import test_db_connection
 # from app.core.database import dispose_db
 from app.core.redis_client import get_redis_pool, close_redis_pool
+from app.core.security import password_hasher
+from app.core.mail_dispatcher import mail_dispatcher
+from app.core.trending import trending_tags
+from app.core.counters import engagement_counters
+from app.core.view_counter import post_views
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.posts_repository import PostRepository
+from app.services.engagement_service import EngagementService
 from .mongo_database import mongodb_client
 from loguru import logger
 
+from .revocation import revocation_registry
 from .websocket import manager
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
-    # ================= Startup =================
+    # ================= Startup ========================================================================================
     logger.info("=" * 50)
     logger.info("Bắt đầu khởi động ứng dụng...")
     logger.info("=" * 50)
@@ -39,6 +48,22 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         asyncio.create_task(manager.start_listening_redis())
         logger.info("Start Redis Pub/Sub listener")
 
+        asyncio.create_task(revocation_registry.start_listening())
+        logger.info("Start Redis revocation listener")
+
+        mail_dispatcher.start()
+        logger.info(f"Start mail dispatcher ({mail_dispatcher.workers} worker)")
+
+        trending_tags.start()
+        logger.info("Start trending hashtag flusher")
+
+        engagement = EngagementService(post_repo=PostRepository(), comment_repo=CommentRepository())
+        engagement_counters.start(engagement.apply_counters)
+        logger.info(f"Start engagement counter flusher ({engagement_counters.shards} shard)")
+
+        post_views.start(PostRepository().set_views)
+        logger.info("Start post view flusher")
+
         logger.info("=" * 50)
         logger.info("Khởi động ứng dụng hoàn tất")
         logger.info("=" * 50)
@@ -49,7 +74,7 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
 
     yield
 
-    # ================= Shutdown =================
+    # ================= Shutdown =======================================================================================
     logger.info("=" * 50)
     logger.info("Bắt đầu tắt ứng dụng...")
     logger.info("=" * 50)
@@ -58,13 +83,31 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         # 1. Redis Listener
         logger.info("Đang dừng Redis Listener...")
         await manager.stop_listening_redis()
+        await revocation_registry.stop_listening()
         logger.info("Redis Listener đã dừng")
 
+        # 2. Hashtag thịnh hành: đẩy nốt số đếm local lên Redis trước khi đóng pool
+        await trending_tags.stop()
+        # Bộ đếm bình luận / cảm xúc: ghi nốt xuống Mongo (trước khi đóng Redis pool và Mongo)
+        await engagement_counters.stop()
+        # Lượt xem bài viết: ghi nốt số người xem xuống Mongo
+        await post_views.stop()
+
         # 2. Redis Pool
         logger.info("Đang đóng Redis pool...")
         await close_redis_pool()
         logger.info("Redis pool đã được đóng")
 
+        # 3. Mail dispatcher: gửi nốt email còn trong hàng đợi
+        logger.info("Đang dừng mail dispatcher...")
+        await mail_dispatcher.stop()
+        logger.info("Mail dispatcher đã dừng")
+
+        # 4. Password hasher
+        logger.info("Đang dừng thread pool băm mật khẩu...")
+        password_hasher.shutdown()
+        logger.info("Thread pool băm mật khẩu đã dừng")
+
         # 2. Database
         logger.info("Đang giải phóng cơ sở dữ liệu...")
         # await dispose_db()
@@ -0,0 +1,203 @@
+import asyncio
+from dataclasses import dataclass
+from email.message import EmailMessage
+from email.utils import formataddr
+from pathlib import Path
+from typing import List, Optional
+
+import aiosmtplib
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from loguru import logger
+
+from app.core.config import settings
+
+TEMPLATE_FOLDER = Path(__file__).parent.parent / 'templates' / 'email'
+
+
+@dataclass
+class MailJob:
+    subject: str
+    email_to: str
+    html: str
+    attempts: int = 0
+
+
+class MailDispatcher:
+    """
+    Gửi email qua hàng đợi trong bộ nhớ thay vì mở 1 kết nối SMTP cho mỗi request.
+    Mỗi worker giữ 1 kết nối SMTP dùng lại cho nhiều email (pool = số worker), lấy email theo lô,
+    email gửi lỗi được đưa lại vào hàng đợi với thời gian chờ tăng dần (exponential backoff).
+    Template Jinja được compile 1 lần rồi cache lại.
+    """
+
+    def __init__(self, workers: int, batch_size: int, max_queue_size: int, max_retries: int,
+                 retry_backoff_seconds: float, idle_timeout_seconds: float):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.idle_timeout_seconds = idle_timeout_seconds
+
+        self.templates = Environment(
+            loader=FileSystemLoader(TEMPLATE_FOLDER),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False
+        )
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._retry_handles: set = set()
+        self.sessions_opened = 0
+        self.sent_count = 0
+
+
+    # Khởi động các worker =============================================================================================
+    def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+
+    # Dừng: chờ gửi nốt email trong hàng đợi (tối đa timeout giây) rồi đóng kết nối ====================================
+    async def stop(self, timeout: float = 10) -> None:
+        if self._queue is None:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dừng mail dispatcher khi còn {self._queue.qsize()} email chưa gửi")
+
+        for handle in self._retry_handles:
+            handle.cancel()
+        if self._retry_handles:
+            logger.warning(f"Bỏ {len(self._retry_handles)} email đang chờ gửi lại")
+        self._retry_handles.clear()
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+
+    # Render template (đã cache) và đưa email vào hàng đợi =============================================================
+    def enqueue(self, subject: str, email_to: str, body: dict, template_name: str) -> bool:
+        if self._queue is None:
+            logger.error(f"Mail dispatcher chưa khởi động, bỏ email gửi tới {email_to}")
+            return False
+
+        html = self.templates.get_template(template_name).render(**body)
+        try:
+            self._queue.put_nowait(MailJob(subject=subject, email_to=email_to, html=html))
+        except asyncio.QueueFull:
+            logger.error(f"Hàng đợi email đầy, bỏ email gửi tới {email_to}")
+            return False
+        return True
+
+
+    def _build_message(self, job: MailJob) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = job.subject
+        message["From"] = formataddr((settings.MAIL_FROM_NAME, settings.MAIL_FROM))
+        message["To"] = job.email_to
+        message.set_content(job.html, subtype="html")
+        return message
+
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.MAIL_VALIDATE_CERTS
+        )
+        await smtp.connect()
+        if settings.MAIL_USE_CREDENTIALS:
+            await smtp.login(settings.MAIL_USERNAME, settings.MAIL_PASSWORD)
+        self.sessions_opened += 1
+        return smtp
+
+
+    @staticmethod
+    async def _close(smtp: Optional[aiosmtplib.SMTP]) -> None:
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+
+    # Email lỗi: chờ backoff rồi đưa lại vào hàng đợi, quá số lần thì bỏ ===============================================
+    def _schedule_retry(self, job: MailJob, error: Exception) -> None:
+        job.attempts += 1
+        if job.attempts > self.max_retries:
+            logger.error(f"Gửi email tới {job.email_to} thất bại sau {job.attempts} lần: {error}")
+            return
+
+        delay = self.retry_backoff_seconds * (2 ** (job.attempts - 1))
+        logger.warning(f"Gửi email tới {job.email_to} lỗi ({error}), thử lại sau {delay:g}s")
+
+        def _requeue():
+            self._retry_handles.discard(handle)
+            if self._queue is not None:
+                try:
+                    self._queue.put_nowait(job)
+                except asyncio.QueueFull:
+                    logger.error(f"Hàng đợi email đầy, bỏ email gửi tới {job.email_to}")
+
+        handle = asyncio.get_running_loop().call_later(delay, _requeue)
+        self._retry_handles.add(handle)
+
+
+    # Worker: lấy 1 lô email và gửi qua cùng 1 kết nối SMTP ============================================================
+    async def _worker(self, index: int) -> None:
+        smtp: Optional[aiosmtplib.SMTP] = None
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(self._queue.get(), timeout=self.idle_timeout_seconds)
+                except asyncio.TimeoutError:
+                    # Rảnh lâu thì trả kết nối cho SMTP server
+                    await self._close(smtp)
+                    smtp = None
+                    continue
+
+                batch = [first]
+                while len(batch) < self.batch_size and not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+
+                try:
+                    for job in batch:
+                        try:
+                            if smtp is None or not smtp.is_connected:
+                                smtp = await self._connect()
+                            await smtp.send_message(self._build_message(job))
+                            self.sent_count += 1
+                        except aiosmtplib.SMTPRecipientsRefused as e:
+                            # Địa chỉ nhận bị từ chối thì gửi lại cũng vô ích
+                            logger.error(f"SMTP server từ chối địa chỉ {job.email_to}: {e}")
+                        except Exception as e:
+                            # Không rõ kết nối còn dùng được không => đóng, lần sau mở lại
+                            await self._close(smtp)
+                            smtp = None
+                            self._schedule_retry(job, e)
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            logger.error(f"Mail worker {index} dừng hoạt động: {e}")
+        finally:
+            await self._close(smtp)
+
+
+mail_dispatcher = MailDispatcher(
+    workers=settings.MAIL_WORKERS,
+    batch_size=settings.MAIL_BATCH_SIZE,
+    max_queue_size=settings.MAIL_QUEUE_MAX_SIZE,
+    max_retries=settings.MAIL_MAX_RETRIES,
+    retry_backoff_seconds=settings.MAIL_RETRY_BACKOFF_SECONDS,
+    idle_timeout_seconds=settings.MAIL_IDLE_TIMEOUT_SECONDS
+)
@@ -0,0 +1,101 @@
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+# Giá trị lưu cho "chưa thả cảm xúc" (phân biệt với field chưa có trong cache)
+_NONE = "-"
+
+# Ghi nhiều field, field nào đang có version >= version mới thì giữ nguyên
+# KEYS[1] = hash của user; ARGV[1] = TTL, sau đó từng bộ (field, cảm xúc, version); giá trị lưu "<cảm xúc>|<version>"
+_WRITE_SCRIPT = """
+for i = 2, #ARGV, 3 do
+    local current = redis.call('HGET', KEYS[1], ARGV[i])
+    local current_version = -1
+    if current then
+        current_version = tonumber(string.match(current, '|(%d+)$')) or -1
+    end
+    if tonumber(ARGV[i + 2]) > current_version then
+        redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1] .. '|' .. ARGV[i + 2])
+    end
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return 1
+"""
+
+
+class ReactionMembershipCache:
+    """
+    Cảm xúc của 1 user trên các bài viết / bình luận: mỗi user 1 hash,
+    field "<loại>:<id>" => "<cảm xúc hoặc ->|<version>".
+    Cả trang feed chỉ cần 1 lần HMGET. Field chưa có thì đọc Mongo rồi ghi lại (kể cả "-").
+    Mọi lần ghi (thả / bỏ cảm xúc, đọc Mongo) mang version của document trong Mongo và chỉ ghi khi version mới hơn
+    => request chậm hay lần đọc Mongo cũ không ghi đè được giá trị mới. Lỗi Redis thì coi như cache miss.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, user_id: str) -> str:
+        return f"{self.namespace}:{user_id}"
+
+    @staticmethod
+    def _field(target_type: str, target_id: str) -> str:
+        return f"{target_type}:{target_id}"
+
+    # Trả về (id => cảm xúc hoặc None, danh sách id chưa có trong cache) ===============================================
+    async def get_many(self, user_id: str, target_type: str,
+                       target_ids: Iterable[str]) -> Tuple[Dict[str, Optional[str]], List[str]]:
+        target_ids = list(dict.fromkeys(target_ids))
+        if not target_ids:
+            return {}, []
+
+        try:
+            redis = await get_direct_redis_client()
+            values = await redis.hmget(self._key(user_id), [self._field(target_type, i) for i in target_ids])
+        except Exception as e:
+            logger.warning(f"Không đọc được cache {self.namespace} từ Redis: {e}")
+            return {}, target_ids
+
+        found: Dict[str, Optional[str]] = {}
+        missing: List[str] = []
+        for target_id, value in zip(target_ids, values):
+            if value is None:
+                missing.append(target_id)
+            else:
+                reaction = value.partition("|")[0]
+                found[target_id] = None if reaction == _NONE else reaction
+        return found, missing
+
+    # Ghi cảm xúc vừa thả / bỏ =========================================================================================
+    async def set(self, user_id: str, target_type: str, target_id: str, reaction: Optional[str],
+                  version: int) -> None:
+        await self.set_many(user_id, target_type, {target_id: (reaction, version)})
+
+    # Ghi nhiều cảm xúc kèm version (kết quả đọc Mongo cho field còn thiếu) ============================================
+    async def set_many(self, user_id: str, target_type: str,
+                       reactions: Dict[str, Tuple[Optional[str], int]]) -> None:
+        if not reactions:
+            return
+
+        args: List = [self.ttl_seconds]
+        for target_id, (reaction, version) in reactions.items():
+            args.extend([self._field(target_type, target_id), reaction or _NONE, version])
+
+        key = self._key(user_id)
+        try:
+            redis = await get_direct_redis_client()
+            write = redis.register_script(_WRITE_SCRIPT)
+            await write(keys=[key], args=args)
+        except Exception as e:
+            logger.warning(f"Không ghi được cache {key}: {e}")
+
+
+# Cảm xúc của người dùng hiện tại ("tôi đã thả cảm xúc chưa") ==========================================================
+reaction_membership_cache = ReactionMembershipCache(
+    namespace="reactions:mine",
+    ttl_seconds=settings.REACTION_CACHE_TTL_SECONDS,
+)
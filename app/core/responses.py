@@ -0,0 +1,64 @@
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Optional
+
+import msgpack
+import orjson
+from bson import ObjectId
+from fastapi import Request
+from pydantic import BaseModel
+from starlette.responses import JSONResponse, Response
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+
+
+# Kiểu dữ liệu orjson / msgpack không tự xử lý được ====================================================================
+def _default(value: Any) -> Any:
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(by_alias=True)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Enum):
+        return value.value
+    raise TypeError(f"Không serialize được kiểu {type(value).__name__}")
+
+
+# Model => dict (giữ nguyên datetime / enum để orjson tự xử lý, không đi qua jsonable_encoder) =========================
+def _to_primitive(content: Any) -> Any:
+    if isinstance(content, BaseModel):
+        return content.model_dump(by_alias=True)
+    return content
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON bằng orjson: datetime, enum có sẵn, ObjectId chuyển thành chuỗi.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(_to_primitive(content), default=_default)
+
+
+class MsgPackResponse(Response):
+    """
+    MessagePack cho client gửi Accept: application/msgpack (nhỏ hơn JSON, parse nhanh hơn trên mobile).
+    """
+    media_type = "application/msgpack"
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(_to_primitive(content), default=_default)
+
+
+# Chọn định dạng response theo header Accept ===========================================================================
+def negotiated_response(request: Request, content: Any, status_code: int = 200,
+                        headers: Optional[Dict[str, str]] = None) -> Response:
+    """
+    Trả Response trực tiếp nên FastAPI không validate lại qua response_model (dữ liệu đã được build từ model).
+    Header muốn gửi kèm (ETag...) phải truyền vào đây, header đặt trên tham số Response của endpoint sẽ bị bỏ qua.
+    """
+    accept = request.headers.get("accept", "")
+    response_class = MsgPackResponse if any(t in accept for t in MSGPACK_MEDIA_TYPES) else ORJSONResponse
+    return response_class(content, status_code=status_code, headers=headers)
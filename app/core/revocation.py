@@ -0,0 +1,194 @@
+import asyncio
+import heapq
+import json
+import time
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+from redis.exceptions import ConnectionError
+
+from app.core.redis_client import get_direct_redis_client
+
+REVOCATION_CHANNEL = "auth_revocation_channel"
+BLACKLIST_KEY_PREFIX = "jti:"
+TOKEN_GENERATION_KEY_PREFIX = "auth:token-gen:"
+
+# Chờ trước khi kết nối lại listener (tăng gấp đôi mỗi lần lỗi liên tiếp)
+RECONNECT_MIN_SECONDS = 1
+RECONNECT_MAX_SECONDS = 30
+
+
+class RevocationRegistry:
+    """
+    Bản sao danh sách token bị thu hồi (jti) và số thế hệ token của từng user trong từng tiến trình.
+    Nạp từ Redis khi khởi động và cập nhật qua Redis Pub/Sub, mỗi jti tự hết hạn theo exp của token.
+    Khi listener chưa sẵn sàng (hoặc mất kết nối) thì is_ready = False và phải hỏi thẳng Redis;
+    listener tự kết nối lại (backoff), subscribe + nạp lại rồi mới bật is_ready.
+    """
+
+    def __init__(self):
+        # key là jti: value = exp (unix timestamp)
+        self._revoked: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        # key là user_id: value = số thế hệ token hiện tại (tăng khi đăng xuất mọi thiết bị)
+        self._generations: Dict[str, int] = {}
+        self.pubsub_client = None
+        self.is_ready = False
+        self.is_shutting_down = False
+
+
+    # Thêm jti vào danh sách local =====================================================================================
+    def add(self, jti: str, exp: Optional[float]) -> None:
+        if not jti or not exp or exp <= time.time():
+            return
+        self._revoked[jti] = exp
+        heapq.heappush(self._expiry_heap, (exp, jti))
+
+
+    # Kiểm tra jti đã bị thu hồi chưa ==================================================================================
+    def is_revoked(self, jti: str) -> bool:
+        self._purge_expired()
+        return jti in self._revoked
+
+
+    # Cập nhật thế hệ token của user (chỉ tăng, không giảm) ============================================================
+    def set_generation(self, user_id: str, generation: int) -> None:
+        if generation > self._generations.get(user_id, 0):
+            self._generations[user_id] = generation
+
+
+    # Lấy thế hệ token hiện tại của user ===============================================================================
+    def get_generation(self, user_id: str) -> int:
+        return self._generations.get(user_id, 0)
+
+
+    # Bỏ các jti đã quá exp (token đã hết hạn thì không cần nhớ nữa) ===================================================
+    def _purge_expired(self) -> None:
+        now = time.time()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            exp, jti = heapq.heappop(self._expiry_heap)
+            if self._revoked.get(jti) == exp:
+                del self._revoked[jti]
+
+
+    # Nạp toàn bộ blacklist hiện có trên Redis =========================================================================
+    async def seed(self, redis) -> int:
+        count = 0
+        cursor = 0
+        while True:
+            cursor, keys = await redis.scan(cursor=cursor, match=f"{BLACKLIST_KEY_PREFIX}*", count=1000)
+            if keys:
+                # Mỗi lượt scan chỉ tốn thêm 1 lệnh MGET
+                for key, raw in zip(keys, await redis.mget(keys)):
+                    if not raw:
+                        continue
+                    try:
+                        data = json.loads(raw)
+                    except ValueError:
+                        continue
+                    self.add(data.get("jti") or key[len(BLACKLIST_KEY_PREFIX):], data.get("exp"))
+                    count += 1
+            if cursor == 0:
+                break
+
+        cursor = 0
+        while True:
+            cursor, keys = await redis.scan(cursor=cursor, match=f"{TOKEN_GENERATION_KEY_PREFIX}*", count=1000)
+            if keys:
+                for key, raw in zip(keys, await redis.mget(keys)):
+                    if raw:
+                        self.set_generation(key[len(TOKEN_GENERATION_KEY_PREFIX):], int(raw))
+            if cursor == 0:
+                break
+        return count
+
+
+    # Khởi động: chạy listener, mất kết nối thì chờ (backoff) rồi subscribe + nạp lại ==================================
+    async def start_listening(self):
+        delay = RECONNECT_MIN_SECONDS
+        while not self.is_shutting_down:
+            connected = await self._listen_once()
+            if self.is_shutting_down:
+                break
+            # Đã kết nối được thì lần mất kết nối sau chờ lại từ đầu
+            if connected:
+                delay = RECONNECT_MIN_SECONDS
+            logger.warning(f"Revocation listener kết nối lại sau {delay}s (trong lúc chờ hỏi thẳng Redis)")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, RECONNECT_MAX_SECONDS)
+        logger.info("Revocation listener dừng")
+
+
+    # 1 lần kết nối: subscribe trước rồi mới nạp để không bỏ lỡ jti bị thu hồi trong lúc nạp ===========================
+    async def _listen_once(self) -> bool:
+        """
+        Trả về True nếu đã subscribe + nạp xong (is_ready từng được bật) trước khi mất kết nối.
+        """
+        connected = False
+        try:
+            redis = await get_direct_redis_client()
+            self.pubsub_client = redis.pubsub()
+            await self.pubsub_client.subscribe(REVOCATION_CHANNEL)
+
+            count = await self.seed(redis)
+            self.is_ready = True
+            connected = True
+            logger.info(f"Đã nạp {count} token bị thu hồi vào bộ nhớ")
+
+            async for message in self.pubsub_client.listen():
+                if message["type"] == "message":
+                    self.process_redis_message(message["data"])
+        except ConnectionError:
+            if not self.is_shutting_down:
+                logger.error("Revocation listener mất kết nối")
+        except Exception as e:
+            if not self.is_shutting_down:
+                logger.error(f"Revocation listener dừng hoạt động: {e}")
+        finally:
+            self.is_ready = False
+            if self.pubsub_client:
+                try:
+                    await self.pubsub_client.close()
+                except Exception:
+                    pass
+        return connected
+
+
+    # stop
+    async def stop_listening(self):
+        self.is_shutting_down = True
+        self.is_ready = False
+        if self.pubsub_client:
+            await self.pubsub_client.unsubscribe(REVOCATION_CHANNEL)
+            await self.pubsub_client.close()
+
+
+    # Nhận jti / thế hệ token mới từ tiến trình khác ===================================================================
+    def process_redis_message(self, raw_data: str):
+        try:
+            data = json.loads(raw_data)
+            if data.get("type") == "generation":
+                self.set_generation(data["user_id"], int(data["generation"]))
+            else:
+                self.add(data.get("jti"), data.get("exp"))
+        except Exception as e:
+            logger.error(f"Lỗi xử lí message thu hồi token: {e}")
+
+
+    # bắn event lên redis
+    async def publish(self, redis, jti: str, exp: Optional[float]):
+        self.add(jti, exp)
+        await redis.publish(REVOCATION_CHANNEL, json.dumps({"type": "jti", "jti": jti, "exp": exp}))
+
+
+    # bắn event tăng thế hệ token lên redis
+    async def publish_generation(self, redis, user_id: str, generation: int):
+        self.set_generation(user_id, generation)
+        await redis.publish(REVOCATION_CHANNEL, json.dumps({
+            "type": "generation",
+            "user_id": user_id,
+            "generation": generation
+        }))
+
+
+revocation_registry = RevocationRegistry()
@@ -0,0 +1,48 @@
+import hashlib
+from typing import Awaitable, Callable, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+
+class SearchCache:
+    """
+    Cache JSON của trang kết quả tìm kiếm trên Redis trong thời gian ngắn.
+    Key ghép từ câu truy vấn đã chuẩn hóa + limit + cursor (băm lại cho gọn), hết TTL thì tự bỏ,
+    không cần làm mới khi có bài viết mới. Lỗi Redis không làm hỏng request, chỉ coi như cache miss.
+    """
+
+    def __init__(self, namespace: str, ttl_seconds: int):
+        self.namespace = namespace
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, query: str, cursor: Optional[str], limit: int) -> str:
+        raw = f"{query}\x00{limit}\x00{cursor or ''}"
+        return f"{self.namespace}:{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"
+
+    # Lấy trang kết quả từ cache, chưa có thì build rồi ghi lại ========================================================
+    async def get_or_build(self, query: str, cursor: Optional[str], limit: int,
+                           build: Callable[[], Awaitable[str]]) -> str:
+        key = self._key(query, cursor, limit)
+        try:
+            redis = await get_direct_redis_client()
+            payload = await redis.get(key)
+        except Exception as e:
+            logger.warning(f"Không đọc được cache {self.namespace} từ Redis: {e}")
+            return await build()
+
+        if payload is not None:
+            return payload
+
+        payload = await build()
+        try:
+            await redis.setex(key, self.ttl_seconds, payload)
+        except Exception as e:
+            logger.warning(f"Không ghi được cache {key}: {e}")
+        return payload
+
+
+# Cache kết quả tìm kiếm bài viết (GET /posts/search) ==================================================================
+search_cache = SearchCache(namespace="search:posts", ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS)
@@ -1,17 +1,30 @@
+import asyncio
+import hashlib
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 from alembic.command import heads
 from passlib.context import CryptContext
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
 from fastapi import HTTPException, status
+from app.core.cache import LocalTTLCache
 from app.core.config import settings
+from app.exceptions.auth import PasswordHasherBusy
 import redis.asyncio as redis
 from app.services.blacklist_service import BlacklistService
 
 # Cấu hình xử lí mật khẩu
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds = max_rounds = cost hiện tại => hash có cost khác sẽ bị đánh dấu cần băm lại
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 # Hàm băm mật khẩu
 def hash_password(password: str) -> str:
@@ -23,8 +36,63 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+class PasswordHasher:
+    """
+    Chạy bcrypt trên thread pool riêng để không chặn event loop.
+    Giới hạn số việc đang chờ, quá giới hạn thì từ chối ngay (503) thay vì xếp hàng vô hạn.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pending = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hasher"
+            )
+        return self._executor
+
+    async def _run(self, func, *args):
+        if self._pending >= self.max_pending:
+            raise PasswordHasherBusy()
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), func, *args)
+        finally:
+            self._pending -= 1
+
+    # Băm mật khẩu =====================================================================================================
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    # Xác minh mật khẩu ================================================================================================
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(pwd_context.verify, plain_password, hashed_password)
+
+    # Xác minh mật khẩu, trả về hash mới nếu cost của hash cũ khác cấu hình hiện tại ===================================
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
 # hàm tạo access token
-def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None, generation: int = 0) -> str:
 
     to_encode = data.copy()
     if expires_delta:
@@ -36,6 +104,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         "exp": expire,
         "scope": "access_token",
         "jti": str(uuid.uuid4()),
+        "gen": generation,
     })
 
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
@@ -58,6 +127,33 @@ def create_scoped_token(subject: str, scope: str, expires_in_minutes: int) -> st
     return encoded_jwt
 
 
+# Cache payload của access token đã verify, key là digest của token, hết hạn đúng lúc token hết hạn
+_verified_token_cache = LocalTTLCache(
+    max_size=settings.VERIFIED_TOKEN_CACHE_MAX_SIZE,
+    ttl_seconds=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
+
+
+# Hàm decode JWT, có cache cho access token
+def _decode_token(token: str, cacheable: bool = False) -> dict:
+    if not cacheable:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    cache_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = _verified_token_cache.get(cache_key)
+    if payload is not None:
+        return payload
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+
+    # Chỉ cache token đúng scope, sống đến exp của token
+    exp = payload.get("exp")
+    if payload.get("scope") == "access_token" and exp:
+        _verified_token_cache.set(cache_key, payload, ttl_seconds=exp - time.time())
+
+    return payload
+
+
 # Hàm xác thực JWT: signature, expiry, scope, blacklist
 async def verify_scoped_token(
         token: str,
@@ -66,12 +162,8 @@ async def verify_scoped_token(
 ) -> str:
 
     try:
-        # Decode và verify token
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM]
-        )
+        # Decode và verify token (access token đã verify thì lấy lại từ cache)
+        payload = _decode_token(token, cacheable=required_scope == "access_token")
 
         # Kiểm tra subject
         subject = payload.get("sub")
@@ -110,6 +202,14 @@ async def verify_scoped_token(
                     headers={"WWW-Authenticate": "Bearer"},
                 )
 
+            # Token cấp trước lần "đăng xuất mọi thiết bị" gần nhất
+            if payload.get("gen", 0) < await blacklist_service.get_token_generation(subject):
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Token đã bị thu hồi",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+
         return subject
 
     except jwt.ExpiredSignatureError:
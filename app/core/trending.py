@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import heapq
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+
+class CountMinSketch:
+    """
+    Đếm xấp xỉ số lần xuất hiện của key với bộ nhớ cố định (depth x width bộ đếm).
+    Ước lượng không bao giờ nhỏ hơn giá trị thật, sai số <= (e / width) * tổng số lần đếm với xác suất 1 - e^-depth.
+    """
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.rows = [[0] * width for _ in range(depth)]
+
+    def _indexes(self, key: str) -> List[int]:
+        # 1 lần băm, tách 2 nửa rồi kết hợp h1 + i*h2 cho depth hàng (không cần băm depth lần)
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """
+        Cộng count cho key, trả về ước lượng mới của key.
+        """
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            if estimate is None or row[index] < estimate:
+                estimate = row[index]
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+
+class TopK:
+    """
+    Giữ tối đa capacity key có ước lượng lớn nhất (min-heap, bản ghi cũ trong heap bị bỏ qua khi lấy ra).
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        self._heap: List[Tuple[int, str]] = []
+
+    def offer(self, key: str, estimate: int) -> None:
+        if key not in self.counts and len(self.counts) >= self.capacity:
+            # Đầy: chỉ nhận key mới nếu lớn hơn key nhỏ nhất đang giữ
+            smallest, smallest_key = self._peek_min()
+            if estimate <= smallest:
+                return
+            heapq.heappop(self._heap)
+            del self.counts[smallest_key]
+
+        self.counts[key] = estimate
+        heapq.heappush(self._heap, (estimate, key))
+
+        # Heap chứa nhiều bản ghi cũ thì dựng lại cho gọn
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, k) for k, count in self.counts.items()]
+            heapq.heapify(self._heap)
+
+    def _peek_min(self) -> Tuple[int, str]:
+        while True:
+            count, key = self._heap[0]
+            if self.counts.get(key) == count:
+                return count, key
+            heapq.heappop(self._heap)
+
+
+class TrendingTracker:
+    """
+    Hashtag thịnh hành theo cửa sổ trượt, không aggregate trên collection posts.
+    - Mỗi worker đếm trong bộ nhớ theo bucket thời gian (count-min sketch + top-K ứng viên), không gọi Redis khi ghi
+    - Định kỳ cộng các ứng viên vào ZSET của bucket trên Redis (ZINCRBY) rồi xóa bộ đếm local => mọi worker dùng chung
+    - Bảng xếp hạng = ZUNIONSTORE các bucket trong cửa sổ, bucket cũ có trọng số giảm dần (half-life),
+      kết quả được cache lại dưới dạng ZSET nên đọc top K chỉ tốn ZREVRANGE
+    Lỗi Redis không làm hỏng request: ghi thì giữ lại số đếm tới lần sau, đọc thì trả danh sách rỗng.
+    """
+
+    def __init__(self, namespace: str, bucket_seconds: int, window_seconds: int, half_life_seconds: int,
+                 flush_seconds: float, candidates: int, bucket_max_keys: int, cache_seconds: int,
+                 top_k: int, sketch_width: int = 2048, sketch_depth: int = 4):
+        self.namespace = namespace
+        self.bucket_seconds = bucket_seconds
+        self.window_buckets = max(1, window_seconds // bucket_seconds)
+        self.half_life_seconds = half_life_seconds
+        self.flush_seconds = flush_seconds
+        self.candidates = candidates
+        self.bucket_max_keys = bucket_max_keys
+        self.cache_seconds = cache_seconds
+        self.top_k = top_k
+        self.sketch_width = sketch_width
+        self.sketch_depth = sketch_depth
+        self.top_key = f"{namespace}:top"
+
+        # bucket => (sketch, ứng viên) của các sự kiện chưa đẩy lên Redis
+        self._pending: Dict[int, Tuple[CountMinSketch, TopK]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _bucket(self, timestamp: Optional[float] = None) -> int:
+        return int((time.time() if timestamp is None else timestamp) // self.bucket_seconds)
+
+    def _bucket_key(self, bucket: int) -> str:
+        return f"{self.namespace}:bucket:{bucket}"
+
+    # Ghi nhận hashtag của 1 bài viết / bình luận mới (chỉ đếm trong bộ nhớ) ===========================================
+    def record(self, tags: Iterable[str], timestamp: Optional[float] = None) -> None:
+        sketch, top = self._state(self._bucket(timestamp))
+        for tag in tags:
+            top.offer(tag, sketch.add(tag))
+
+    def _state(self, bucket: int) -> Tuple[CountMinSketch, TopK]:
+        state = self._pending.get(bucket)
+        if state is None:
+            state = (CountMinSketch(self.sketch_width, self.sketch_depth), TopK(self.candidates))
+            self._pending[bucket] = state
+        return state
+
+    # Lấy số đếm của các ứng viên và xóa bộ đếm local ==================================================================
+    def drain(self) -> Dict[int, Dict[str, int]]:
+        pending, self._pending = self._pending, {}
+        return {bucket: dict(top.counts) for bucket, (_, top) in pending.items()}
+
+    # Cộng số đếm local vào ZSET của từng bucket trên Redis ============================================================
+    async def flush(self) -> None:
+        drained = self.drain()
+        if not drained:
+            return
+
+        try:
+            redis = await get_direct_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                for bucket, counts in drained.items():
+                    key = self._bucket_key(bucket)
+                    for tag, count in counts.items():
+                        pipe.zincrby(key, count, tag)
+                    # Chỉ giữ bucket_max_keys tag lớn nhất của mỗi bucket, hết cửa sổ thì tự hết hạn
+                    pipe.zremrangebyrank(key, 0, -self.bucket_max_keys - 1)
+                    pipe.expire(key, (self.window_buckets + 1) * self.bucket_seconds)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Không đẩy được số đếm {self.namespace} lên Redis: {e}")
+            # Giữ lại số đếm (ước lượng) cho lần đẩy sau
+            for bucket, counts in drained.items():
+                sketch, top = self._state(bucket)
+                for tag, count in counts.items():
+                    top.offer(tag, sketch.add(tag, count))
+
+    # Top hashtag thịnh hành (đọc từ ZSET đã gộp, hết hạn thì gộp lại) =================================================
+    async def get_top(self, limit: int) -> List[Tuple[str, float]]:
+        limit = min(limit, self.top_k)
+        try:
+            redis = await get_direct_redis_client()
+            items = await redis.zrevrange(self.top_key, 0, limit - 1, withscores=True)
+            if not items and not await redis.exists(self.top_key):
+                await self._rebuild(redis)
+                items = await redis.zrevrange(self.top_key, 0, limit - 1, withscores=True)
+        except Exception as e:
+            logger.warning(f"Không đọc được {self.namespace} từ Redis: {e}")
+            return []
+
+        return [(tag, score) for tag, score in items if score > 0]
+
+    # Gộp các bucket trong cửa sổ (bucket càng cũ trọng số càng nhỏ) ===================================================
+    async def _rebuild(self, redis) -> None:
+        now = time.time()
+        current = self._bucket(now)
+        weights = {}
+        for bucket in range(current - self.window_buckets + 1, current + 1):
+            age = now - bucket * self.bucket_seconds
+            weights[self._bucket_key(bucket)] = 0.5 ** (age / self.half_life_seconds)
+
+        async with redis.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(self.top_key, weights)
+            pipe.zremrangebyrank(self.top_key, 0, -self.top_k - 1)
+            # Key rỗng vẫn phải tồn tại để không gộp lại ở mỗi request
+            pipe.zadd(self.top_key, {"": 0})
+            pipe.expire(self.top_key, self.cache_seconds)
+            await pipe.execute()
+
+    # Task nền: đẩy số đếm lên Redis định kỳ ===========================================================================
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Đẩy nốt số đếm còn lại trước khi tắt
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Lỗi khi đẩy số đếm {self.namespace}: {e}")
+
+
+# Hashtag thịnh hành (GET /posts/trending) =============================================================================
+trending_tags = TrendingTracker(
+    namespace="trending:tags",
+    bucket_seconds=settings.TRENDING_BUCKET_SECONDS,
+    window_seconds=settings.TRENDING_WINDOW_SECONDS,
+    half_life_seconds=settings.TRENDING_HALF_LIFE_SECONDS,
+    flush_seconds=settings.TRENDING_FLUSH_SECONDS,
+    candidates=settings.TRENDING_CANDIDATES,
+    bucket_max_keys=settings.TRENDING_BUCKET_MAX_KEYS,
+    cache_seconds=settings.TRENDING_CACHE_SECONDS,
+    top_k=settings.TRENDING_TOP_K,
+)
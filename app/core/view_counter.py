@@ -0,0 +1,133 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from loguru import logger
+
+from app.core.config import settings
+from app.core.redis_client import get_direct_redis_client
+
+# Ghi người xem vào HyperLogLog của từng bài viết trong 1 round trip (cả trang feed)
+# KEYS[1] = set bài viết có người xem mới, KEYS[2..] = HLL của từng bài viết
+# ARGV[1] = người xem, ARGV[i] = id bài viết của KEYS[i] (i >= 2)
+# PFADD trả về 1 khi số người xem ước lượng thay đổi => chỉ bài đó mới phải ghi lại xuống Mongo
+_RECORD_SCRIPT = """
+local changed = 0
+for i = 2, #KEYS do
+    if redis.call('PFADD', KEYS[i], ARGV[1]) == 1 then
+        redis.call('SADD', KEYS[1], ARGV[i])
+        changed = changed + 1
+    end
+end
+return changed
+"""
+
+
+class PostViewCounter:
+    """
+    Đếm số người xem (không trùng) của bài viết bằng HyperLogLog trên Redis, không ghi Mongo mỗi lượt xem.
+    - Mỗi bài viết 1 key HLL, tối đa ~12KB dù có bao nhiêu người xem (sai số ~0.81%)
+    - Người xem là user id, khách chưa đăng nhập là dấu vân tay ip + user agent => xem lại không tăng số
+    - Bài có người xem mới được đánh dấu vào 1 set, task nền định kỳ SPOP theo lô, PFCOUNT rồi gọi apply() để
+      ghi xuống Mongo bằng bulk_write; ghi lỗi thì trả lô đó lại set để lần sau ghi
+    SPOP nguyên tử nên nhiều worker cùng chạy không lấy trùng bài. Số lượt xem trên Mongo chậm tối đa khoảng
+    flush_seconds. Lỗi Redis khi ghi nhận lượt xem không làm hỏng request, chỉ mất lượt xem đó.
+    """
+
+    def __init__(self, namespace: str, flush_seconds: float, batch_size: int):
+        self.namespace = namespace
+        self.flush_seconds = flush_seconds
+        self.batch_size = batch_size
+        self.dirty_key = f"{namespace}:dirty"
+        self._apply: Optional[Callable[[Dict[str, int]], Awaitable[None]]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _hll_key(self, post_id: str) -> str:
+        return f"{self.namespace}:hll:{post_id}"
+
+    # Ghi nhận 1 người xem trên cả trang bài viết ======================================================================
+    async def record(self, viewer: str, post_ids: Iterable[str]) -> None:
+        post_ids = list(dict.fromkeys(str(post_id) for post_id in post_ids))
+        if not viewer or not post_ids:
+            return
+
+        try:
+            redis = await get_direct_redis_client()
+            record = redis.register_script(_RECORD_SCRIPT)
+            await record(keys=[self.dirty_key, *(self._hll_key(post_id) for post_id in post_ids)],
+                         args=[viewer, *post_ids])
+        except Exception as e:
+            logger.warning(f"Không ghi nhận được lượt xem {self.namespace}: {e}")
+
+    # Xóa HLL của bài viết đã xóa ======================================================================================
+    async def forget(self, post_id: str) -> None:
+        try:
+            redis = await get_direct_redis_client()
+            async with redis.pipeline(transaction=False) as pipe:
+                pipe.delete(self._hll_key(post_id))
+                pipe.srem(self.dirty_key, post_id)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Không xóa được lượt xem của bài {post_id}: {e}")
+
+    # Ghi số người xem của các bài có người xem mới xuống Mongo ========================================================
+    async def flush(self) -> int:
+        """
+        Trả về số bài viết đã ghi.
+        """
+        if self._apply is None:
+            return 0
+
+        redis = await get_direct_redis_client()
+        total = 0
+        while True:
+            post_ids = await redis.spop(self.dirty_key, self.batch_size)
+            if not post_ids:
+                return total
+
+            async with redis.pipeline(transaction=False) as pipe:
+                for post_id in post_ids:
+                    pipe.pfcount(self._hll_key(post_id))
+                counts = await pipe.execute()
+
+            try:
+                await self._apply(dict(zip(post_ids, counts)))
+            except Exception:
+                # Trả lô lại để lần sau ghi (PFCOUNT đọc lại giá trị mới nhất nên không sai số)
+                await redis.sadd(self.dirty_key, *post_ids)
+                raise
+
+            total += len(post_ids)
+            if len(post_ids) < self.batch_size:
+                return total
+
+    # Task nền ghi số lượt xem định kỳ =================================================================================
+    def start(self, apply: Callable[[Dict[str, int]], Awaitable[None]]) -> None:
+        self._apply = apply
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        # Ghi nốt số lượt xem trước khi tắt
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Không ghi được lượt xem {self.namespace} khi tắt: {e}")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Lỗi khi ghi lượt xem {self.namespace}: {e}")
+
+
+# Số người xem của bài viết (GET /posts/{post_id} và các trang feed) ===================================================
+post_views = PostViewCounter(
+    namespace="views:post",
+    flush_seconds=settings.VIEW_FLUSH_SECONDS,
+    batch_size=settings.VIEW_FLUSH_BATCH,
+)
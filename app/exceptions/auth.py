@@ -24,6 +24,26 @@ class OTPKhongChinhXac(AppException):
     status_code = 400
     message = "Mã OTP không đúng. Vui lòng thử lại"
 
+class OTPQuaNhieuLan(AppException):
+    status_code = 429
+    message = "Nhập sai OTP quá nhiều lần. Vui lòng yêu cầu mã mới"
+
+class OTPGuiQuaNhanh(AppException):
+    status_code = 429
+    message = "Vui lòng đợi trước khi yêu cầu gửi lại mã OTP"
+
+    def __init__(self, retry_after: int, message: str | None = None):
+        super().__init__(message or f"Vui lòng đợi {retry_after} giây trước khi yêu cầu gửi lại mã OTP")
+        self.headers = {"Retry-After": str(retry_after)}
+
+class DangNhapQuaNhieuLan(AppException):
+    status_code = 429
+    message = "Đăng nhập sai quá nhiều lần. Vui lòng thử lại sau"
+
+    def __init__(self, retry_after: int, message: str | None = None):
+        super().__init__(message or f"Đăng nhập sai quá nhiều lần. Vui lòng thử lại sau {retry_after} giây")
+        self.headers = {"Retry-After": str(retry_after)}
+
 class XacMinhEmail(AppException):
     status_code = 401
     message = "Vui lòng xác minh email"
@@ -40,8 +60,14 @@ class UserInvalidForToken(AppException):
     status_code = 401
     message = "Không tìm thấy người dùng với Refresh Token"
 
+class RefreshTokenReused(AppException):
+    status_code = 401
+    message = "Refresh token đã được sử dụng, vui lòng đăng nhập lại"
 
+    def __init__(self, user_id=None, message: str | None = None):
+        super().__init__(message)
+        self.user_id = user_id
 
-
-
-
+class PasswordHasherBusy(AppException):
+    status_code = 503
+    message = "Hệ thống đang bận, vui lòng thử lại sau"
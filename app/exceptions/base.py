@@ -1,6 +1,7 @@
 class AppException(Exception):
     status_code = 400
     message = "Application error"
+    headers: dict | None = None
 
     def __init__(self, message: str | None = None):
         if message:
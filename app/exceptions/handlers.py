@@ -20,7 +20,8 @@ async def app_exception_handler(request: Request, exc: AppException):
             status="error",
             message=exc.message,
             detail=None
-        ).model_dump(exclude_none=True)
+        ).model_dump(exclude_none=True),
+        headers=exc.headers
     )
 
 
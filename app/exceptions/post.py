@@ -7,3 +7,7 @@ class NotFoundError(AppException):
 class ForbiddenError(AppException):
     status_code = 403
     message = "Bạn ko có quyền"
+
+class InvalidCursorError(AppException):
+    status_code = 400
+    message = "Cursor không hợp lệ"
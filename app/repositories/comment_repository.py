@@ -1,5 +1,6 @@
 from typing import Dict, Any, List, Optional
 from bson import ObjectId
+from pymongo import UpdateOne
 from app.core.mongo_database import mongodb_client
 
 class CommentRepository:
@@ -15,7 +16,8 @@ class CommentRepository:
 
 
     # Lấy bình luận gốc trong post =====================================================================================
-    async def get_root_comments(self, post_id: str, limit: int = 10, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def get_root_comments(self, post_id: str, limit: int = 10, cursor: Optional[str] = None,
+                                projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         query = {
             "post_id": ObjectId(post_id),
             "root_id": None
@@ -23,7 +25,7 @@ class CommentRepository:
         if cursor:
             query["_id"] = {"$gt": ObjectId(cursor)}
         
-        cursor_obj = self.collection.find(query).sort("_id", 1).limit(limit)
+        cursor_obj = self.collection.find(query, projection).sort("_id", 1).limit(limit)
 
         comments = []
         async for comment in cursor_obj:
@@ -33,12 +35,13 @@ class CommentRepository:
 
 
     # Lấy danh sách phản hồi của một bình luận =========================================================================
-    async def get_replies(self, root_id: str, limit: int = 50, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+    async def get_replies(self, root_id: str, limit: int = 50, cursor: Optional[str] = None,
+                          projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         query = {"root_id": ObjectId(root_id)}
         if cursor:
             query["_id"] = {"$gt": ObjectId(cursor)}
 
-        cursor_obj = self.collection.find(query).sort("_id", 1).limit(limit)
+        cursor_obj = self.collection.find(query, projection).sort("_id", 1).limit(limit)
 
         replies = []
         async for reply in cursor_obj:
@@ -60,6 +63,44 @@ class CommentRepository:
         )
 
 
+    # Id bình luận mới nhất của bài viết (tính ETag danh sách bình luận) ===============================================
+    async def get_latest_id(self, post_id: str) -> Optional[ObjectId]:
+        latest = await self.collection.find_one({"post_id": ObjectId(post_id)}, {"_id": 1}, sort=[("_id", -1)])
+        return latest["_id"] if latest else None
+
+
+    # Cộng số đếm đã gom (cảm xúc) cho nhiều bình luận, 1 lần bulk_write ===============================================
+    async def apply_counters(self, deltas: Dict[ObjectId, Dict[str, int]]) -> int:
+        operations = [UpdateOne({"_id": comment_id}, {"$inc": dict(counters)})
+                      for comment_id, counters in deltas.items() if counters]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.modified_count
+
+
     # Tìm comment theo ID ==============================================================================================
-    async def get_by_id(self, comment_id: str) -> Optional[Dict[str, Any]]:
-        return await self.collection.find_one({"_id": ObjectId(comment_id)})
+    async def get_by_id(self, comment_id: str,
+                        projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(comment_id)}, projection)
+
+
+    # Lấy id bình luận có liên quan tới 1 user theo lô (field: user_id hoặc reply_to_user_id) ==========================
+    async def get_ids_by_user(self, user_id: ObjectId, field: str = "user_id", after_id: Optional[ObjectId] = None,
+                              limit: int = 500) -> List[ObjectId]:
+        query: Dict[str, Any] = {field: user_id}
+        if after_id:
+            query["_id"] = {"$gt": after_id}
+
+        cursor_obj = self.collection.find(query, {"_id": 1}).sort("_id", 1).limit(limit)
+        return [comment["_id"] async for comment in cursor_obj]
+
+
+    # Ghi lại thông tin tác giả / người được trả lời cho 1 lô bình luận ================================================
+    async def update_author_snapshot(self, comment_ids: List[ObjectId], snapshot: Dict[str, Any],
+                                     field: str = "author") -> int:
+        result = await self.collection.update_many(
+            {"_id": {"$in": comment_ids}, f"{field}.version": {"$not": {"$gte": snapshot["version"]}}},
+            {"$set": {field: snapshot}}
+        )
+        return result.modified_count
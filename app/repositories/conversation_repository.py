@@ -16,8 +16,9 @@ class ConversationRepository:
 
 
     # Lấy chi tiết cuộc trò chuyện =====================================================================================
-    async def get_by_id(self, conversation_id: str) -> Optional[Dict[str, Any]]:
-        return await self.collection.find_one({"_id": ObjectId(conversation_id)})
+    async def get_by_id(self, conversation_id: str,
+                        projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(conversation_id)}, projection)
 
 
     # Tìm cuộc trò chuyện 1 - 1 ========================================================================================
@@ -47,13 +48,14 @@ class ConversationRepository:
 
 
     # Lấy danh sách chat ===============================================================================================
-    async def get_conversations_for_user(self, user_id: str) -> List[Dict[str, Any]]:
+    async def get_conversations_for_user(self, user_id: str,
+                                         projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         user_obj_id = ObjectId(user_id)
         query = {
             "participants.user_id": user_obj_id,
             "deleted_by.user_id": {"$ne": user_obj_id}
         }
-        cursor = self.collection.find(query).sort("updated_at", -1)
+        cursor = self.collection.find(query, projection).sort("updated_at", -1)
         return await cursor.to_list(length=1000)
 
 
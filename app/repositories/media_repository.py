@@ -18,13 +18,15 @@ class MediaRepository:
 
 
     # Lấy thông tin media theo id ======================================================================================
-    async def get_by_id(self, media_id: ObjectId) -> Optional[Dict[str, Any]]:
-        return await self.collection.find_one({"_id": media_id})
+    async def get_by_id(self, media_id: ObjectId,
+                        projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": media_id}, projection)
 
 
     # Lấy nhiều media theo id ==========================================================================================
-    async def get_by_ids(self, media_ids: list[ObjectId]) -> List[Dict[str, Any]]:
-        cursor = self.collection.find({"_id": {"$in": list(media_ids)}})
+    async def get_by_ids(self, media_ids: list[ObjectId],
+                         projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"_id": {"$in": list(media_ids)}}, projection)
 
         medias = []
         async for media in cursor:
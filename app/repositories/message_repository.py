@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator
 from bson import ObjectId
 from app.core.mongo_database import mongodb_client
 from app.schemas.message import MessageCreate
@@ -29,8 +29,22 @@ class MessageRepository:
             self,
             conversation_id: str,
             cursor: Optional[str] = None,
-            limit: int = 50
+            limit: int = 50,
+            projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
+        return [message async for message in self.iter_by_conversation(
+            conversation_id=conversation_id, cursor=cursor, limit=limit, projection=projection
+        )]
+
+
+    # Duyệt lần lượt tin nhắn (dùng cho stream) ========================================================================
+    async def iter_by_conversation(
+            self,
+            conversation_id: str,
+            cursor: Optional[str] = None,
+            limit: int = 50,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
 
         query: Dict[str, Any] = {
             "conversation_id": ObjectId(conversation_id)
@@ -41,16 +55,16 @@ class MessageRepository:
 
         db_cursor = (
             self.collection
-            .find(query)
+            .find(query, projection)
             .sort("_id", -1)
             .limit(limit)
         )
 
-        messages = []
-        async for message in db_cursor:
-            messages.append(message)
-
-        return messages
+        try:
+            async for message in db_cursor:
+                yield message
+        finally:
+            await db_cursor.close()
 
 
     # Xóa tin nhắn =====================================================================================================
@@ -59,8 +73,9 @@ class MessageRepository:
         return result.deleted_count > 0
 
 
-    # Lấy thông tin chi tiết 1 tin nhắn ===============================================================================
-    async def get_by_id(self, message_id: str) -> Optional[Dict[str, Any]]:
-        return await self.collection.find_one({"_id": ObjectId(message_id)})
+    # Lấy thông tin chi tiết 1 tin nhắn ================================================================================
+    async def get_by_id(self, message_id: str,
+                        projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": ObjectId(message_id)}, projection)
 
 
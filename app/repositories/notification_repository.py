@@ -1,4 +1,4 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, AsyncIterator
 from bson import ObjectId
 from app.core.mongo_database import mongodb_client
 
@@ -17,17 +17,23 @@ class NotificationRepository:
 
     # Lấy danh sách thông báo ==========================================================================================
     async def get_by_recipient(self, recipient_id: str, limit: int = 20, cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [doc async for doc in self.iter_by_recipient(recipient_id, limit=limit, cursor=cursor)]
+
+
+    # Duyệt lần lượt thông báo (dùng cho stream) =======================================================================
+    async def iter_by_recipient(self, recipient_id: str, limit: int = 20,
+                                cursor: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
         query = {"recipient_id": recipient_id}
 
         if cursor:
             query["_id"] = {"$lt": ObjectId(cursor)}
-        
-        cursor_obj = self.collection.find(query).sort("_id", -1).limit(limit)
-        docs = []
-        async for doc in cursor_obj:
-            docs.append(doc)
 
-        return docs
+        cursor_obj = self.collection.find(query).sort("_id", -1).limit(limit)
+        try:
+            async for doc in cursor_obj:
+                yield doc
+        finally:
+            await cursor_obj.close()
 
     async def mark_as_read(self, notification_id: str, recipient_id: str) -> bool:
         result = await self.collection.update_one(
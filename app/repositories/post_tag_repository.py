@@ -0,0 +1,74 @@
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.mongo_database import mongodb_client
+
+
+class PostTagRepository:
+    """
+    Chỉ mục ngược hashtag / mention => bài viết (collection post_tags).
+    Mỗi (key, post_id) là 1 document, sources là các nguồn đang chứa key (chính bài viết hoặc bình luận của bài).
+    key có dạng "#tag" hoặc "@<user_id>". Document hết nguồn thì bị xóa.
+    """
+
+    def __init__(self):
+        self.db = mongodb_client.get_database()
+        self.collection = self.db.get_collection("post_tags")
+
+    # Thêm key cho 1 nguồn (upsert theo (key, post_id)) ================================================================
+    async def add(self, post_id: ObjectId, source_id: ObjectId, keys: Iterable[str], public: bool) -> None:
+        operations = [
+            UpdateOne(
+                {"key": key, "post_id": post_id},
+                {"$addToSet": {"sources": source_id},
+                 "$setOnInsert": {"public": public, "created_at": datetime.utcnow()}},
+                upsert=True
+            )
+            for key in keys
+        ]
+        if operations:
+            await self.collection.bulk_write(operations, ordered=False)
+
+
+    # Bỏ key khỏi 1 nguồn, key không còn nguồn nào thì xóa luôn ========================================================
+    async def remove(self, post_id: ObjectId, source_id: ObjectId, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if not keys:
+            return
+
+        await self.collection.update_many(
+            {"key": {"$in": keys}, "post_id": post_id},
+            {"$pull": {"sources": source_id}}
+        )
+        await self.collection.delete_many({"key": {"$in": keys}, "post_id": post_id, "sources": {"$size": 0}})
+
+
+    # Các key 1 nguồn đang có trong chỉ mục ============================================================================
+    async def get_keys(self, post_id: ObjectId, source_id: ObjectId) -> List[str]:
+        db_cursor = self.collection.find({"post_id": post_id, "sources": source_id}, {"key": 1, "_id": 0})
+        return [entry["key"] async for entry in db_cursor]
+
+
+    # Đổi quyền riêng tư của bài viết => đổi cờ public cho mọi key của bài =============================================
+    async def set_public(self, post_id: ObjectId, public: bool) -> None:
+        await self.collection.update_many({"post_id": post_id}, {"$set": {"public": public}})
+
+
+    # Xóa bài viết => xóa mọi key của bài (kể cả key từ bình luận) =====================================================
+    async def delete_by_post(self, post_id: ObjectId) -> int:
+        result = await self.collection.delete_many({"post_id": post_id})
+        return result.deleted_count
+
+
+    # Lấy 1 trang bài viết công khai theo key, mới gắn key trước (phân trang theo _id) =================================
+    async def get_public_entries(self, key: str, cursor: Optional[str] = None,
+                                 limit: int = 5) -> List[Dict[str, Any]]:
+        query: Dict[str, Any] = {"key": key, "public": True}
+        if cursor:
+            query["_id"] = {"$lt": ObjectId(cursor)}
+
+        db_cursor = self.collection.find(query, {"post_id": 1}).sort("_id", -1).limit(limit)
+        return [entry async for entry in db_cursor]
@@ -1,7 +1,9 @@
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 from bson import ObjectId
+from pymongo import UpdateOne
 from app.core.mongo_database import mongodb_client
+from app.utils.ranking import hot_score_expression
 
 
 class PostRepository:
@@ -13,8 +15,19 @@ class PostRepository:
     async def get_all_posts(
             self,
             cursor: Optional[str] = None,
-            limit: int = 5
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
+        return [post async for post in self.iter_all_posts(cursor=cursor, limit=limit, projection=projection)]
+
+
+    # Duyệt lần lượt bài viết công khai (dùng cho stream) ==============================================================
+    async def iter_all_posts(
+            self,
+            cursor: Optional[str] = None,
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
 
         # 1. Tạo query filter
         query: Dict[str, Any] = {"privacy": "public"}
@@ -23,13 +36,80 @@ class PostRepository:
         if cursor:
             query["_id"] = {"$lt": ObjectId(cursor)}
 
-        db_cursor = self.collection.find(query).sort("_id", -1).limit(limit)
+        db_cursor = self.collection.find(query, projection).sort("_id", -1).limit(limit)
+        try:
+            async for post in db_cursor:
+                yield post
+        finally:
+            await db_cursor.close()
+
+
+    # Bài viết công khai xếp theo điểm hot (sort=top), phân trang theo (hot_score, _id) ================================
+    async def get_top_posts(
+            self,
+            after: Optional[Tuple[float, ObjectId]] = None,
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        return [post async for post in self.iter_top_posts(after=after, limit=limit, projection=projection)]
 
-        posts = []
-        async for post in db_cursor:
-            posts.append(post)
 
-        return posts
+    async def iter_top_posts(
+            self,
+            after: Optional[Tuple[float, ObjectId]] = None,
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        after = (hot_score, _id) của bài cuối trang trước. Dùng index (privacy, hot_score, _id).
+        """
+        query: Dict[str, Any] = {"privacy": "public"}
+        if after:
+            score, last_id = after
+            query["$or"] = [
+                {"hot_score": {"$lt": score}},
+                {"hot_score": score, "_id": {"$lt": last_id}},
+            ]
+
+        db_cursor = self.collection.find(query, projection).sort([("hot_score", -1), ("_id", -1)]).limit(limit)
+        try:
+            async for post in db_cursor:
+                yield post
+        finally:
+            await db_cursor.close()
+
+
+    # Tìm bài viết công khai theo text index, sắp xếp theo độ liên quan (score, _id) ===================================
+    async def search_public_posts(
+            self,
+            text: str,
+            after: Optional[Tuple[float, ObjectId]] = None,
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        after = (score, _id) của bài cuối trang trước. Mỗi document trả về có thêm field "score".
+        """
+        pipeline: List[Dict[str, Any]] = [
+            # $text bắt buộc nằm ở stage $match đầu tiên
+            {"$match": {"$text": {"$search": text}, "privacy": "public"}},
+            {"$addFields": {"score": {"$meta": "textScore"}}},
+        ]
+        if after:
+            score, last_id = after
+            pipeline.append({"$match": {"$or": [
+                {"score": {"$lt": score}},
+                {"score": score, "_id": {"$lt": last_id}},
+            ]}})
+        pipeline += [{"$sort": {"score": -1, "_id": -1}}, {"$limit": limit}]
+        if projection:
+            pipeline.append({"$project": {**projection, "score": 1}})
+
+        db_cursor = await self.collection.aggregate(pipeline)
+        try:
+            return [post async for post in db_cursor]
+        finally:
+            await db_cursor.close()
 
 
     # Query thêm bài viết mới ==========================================================================================
@@ -40,11 +120,20 @@ class PostRepository:
 
 
     # Query lấy thông tin 1 bài viết ===================================================================================
-    async def get_by_id(self, post_id:str) -> Dict[str, Any]:
-        post = await self.collection.find_one({"_id": ObjectId(post_id)})
+    async def get_by_id(self, post_id:str, projection: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        post = await self.collection.find_one({"_id": ObjectId(post_id)}, projection)
         return post
 
 
+    # Lấy nhiều bài viết theo id =======================================================================================
+    async def get_by_ids(self, post_ids: List[ObjectId],
+                         projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        if not post_ids:
+            return []
+        db_cursor = self.collection.find({"_id": {"$in": list(post_ids)}}, projection)
+        return [post async for post in db_cursor]
+
+
     # Query update bài viết ============================================================================================
     async def update(self, post_data: Dict[str, Any], post_id: str) -> Dict[str, Any]:
         update = await self.collection.update_one({"_id": ObjectId(post_id)},
@@ -63,22 +152,87 @@ class PostRepository:
             user_id: str,
             privacy_filter: Optional[List[str]] = None,
             cursor: Optional[str] = None,
-            limit: int = 5
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
     ) -> List[Dict[str, Any]]:
+        return [post async for post in self.iter_posts_by_user(user_id=user_id, privacy_filter=privacy_filter,
+                                                               cursor=cursor, limit=limit, projection=projection)]
+
+
+    # Duyệt lần lượt bài viết của 1 user (dùng cho stream) =============================================================
+    async def iter_posts_by_user(
+            self,
+            user_id: str,
+            privacy_filter: Optional[List[str]] = None,
+            cursor: Optional[str] = None,
+            limit: int = 5,
+            projection: Optional[Dict[str, Any]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
         query = {"user_id": ObjectId(user_id)}
         if privacy_filter:
             query["privacy"] = {"$in": privacy_filter}
         if cursor:
             query["_id"] = {"$lt": ObjectId(cursor)}
 
-        db_cursor = self.collection.find(query).sort("_id", -1).limit(limit)
-        posts = []
-        async for post in db_cursor:
-            posts.append(post)
-        return posts
-
-    async def increase_comment_count(self, post_id: str, amount: int = 1) -> None:
-        await self.collection.update_one(
-            {"_id": ObjectId(post_id)},
-            {"$inc": {"comments_count": amount}}
-        )
\ No newline at end of file
+        db_cursor = self.collection.find(query, projection).sort("_id", -1).limit(limit)
+        try:
+            async for post in db_cursor:
+                yield post
+        finally:
+            await db_cursor.close()
+
+    # Cộng số đếm đã gom (bình luận, cảm xúc) cho nhiều bài viết và tính lại điểm hot, 1 lần bulk_write ================
+    async def apply_counters(self, deltas: Dict[ObjectId, Dict[str, int]]) -> int:
+        operations = [
+            UpdateOne({"_id": post_id}, [
+                {"$set": {field: {"$add": [{"$ifNull": [f"${field}", 0]}, amount]}
+                          for field, amount in counters.items()}},
+                {"$set": {"hot_score": hot_score_expression()}},
+            ])
+            for post_id, counters in deltas.items() if counters
+        ]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.modified_count
+
+    # Ghi số người xem (ước lượng từ HyperLogLog) cho nhiều bài viết, 1 lần bulk_write =================================
+    async def set_views(self, views: Dict[str, int]) -> int:
+        # $max: lô ghi chậm / HLL bị mất trên Redis cũng không làm số lượt xem giảm
+        operations = [
+            UpdateOne({"_id": ObjectId(post_id)}, {"$max": {"views": count}})
+            for post_id, count in views.items() if ObjectId.is_valid(post_id)
+        ]
+        if not operations:
+            return 0
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.modified_count
+
+
+    # Tính điểm hot cho bài viết cũ chưa có field hot_score ============================================================
+    async def backfill_hot_score(self) -> int:
+        result = await self.collection.update_many(
+            {"hot_score": {"$exists": False}},
+            [{"$set": {"hot_score": hot_score_expression()}}]
+        )
+        return result.modified_count
+
+
+    # Lấy id bài viết của 1 tác giả theo lô (phân trang theo _id) ======================================================
+    async def get_ids_by_user(self, user_id: ObjectId, after_id: Optional[ObjectId] = None,
+                              limit: int = 500) -> List[ObjectId]:
+        query: Dict[str, Any] = {"user_id": user_id}
+        if after_id:
+            query["_id"] = {"$gt": after_id}
+
+        db_cursor = self.collection.find(query, {"_id": 1}).sort("_id", 1).limit(limit)
+        return [post["_id"] async for post in db_cursor]
+
+
+    # Ghi lại thông tin tác giả cho 1 lô bài viết (bỏ qua bài đã có bản mới hơn) =======================================
+    async def update_author_snapshot(self, post_ids: List[ObjectId], snapshot: Dict[str, Any]) -> int:
+        result = await self.collection.update_many(
+            {"_id": {"$in": post_ids}, "author.version": {"$not": {"$gte": snapshot["version"]}}},
+            {"$set": {"author": snapshot}}
+        )
+        return result.modified_count
@@ -0,0 +1,89 @@
+from typing import Any, Dict
+
+# Các field mỗi luồng đọc thực sự dùng (truyền vào tham số projection của repository)
+# _id luôn được Mongo trả về nên không cần khai báo
+# Thêm field vào response / logic thì phải thêm vào projection tương ứng (kiểm tra bằng scripts/check_projections.py)
+Projection = Dict[str, Any]
+
+
+# Bài viết =============================================================================================================
+# Danh sách và chi tiết bài viết (PostsListResponse / PostDetailResponse)
+POST_PUBLIC_FIELDS: Projection = {
+    "user_id": 1, "content": 1, "media_ids": 1, "author": 1, "privacy": 1, "created_at": 1,
+    "comments_count": 1, "reactions_count": 1, "reactions": 1, "views": 1,
+}
+
+# Feed xếp theo điểm hot (cần hot_score để tạo cursor)
+POST_RANKED_FIELDS: Projection = {**POST_PUBLIC_FIELDS, "hot_score": 1}
+
+# Kiểm tra quyền sở hữu khi sửa / xóa bài, gửi thông báo bình luận, cập nhật chỉ mục hashtag của bình luận
+POST_OWNER_FIELDS: Projection = {"user_id": 1, "media_ids": 1, "privacy": 1}
+
+# Tính ETag (bài viết và danh sách bình luận của bài)
+POST_VALIDATOR_FIELDS: Projection = {
+    "user_id": 1, "updated_at": 1, "comments_count": 1, "reactions_count": 1, "comment_reactions_count": 1,
+    "views": 1,
+}
+
+
+# Profile ==============================================================================================================
+# Thẻ người dùng công khai (tên hiển thị + avatar)
+PROFILE_CARD_FIELDS: Projection = {"user_id": 1, "display_name": 1, "avatar": 1, "card_version": 1}
+
+# Trang cá nhân (UserProfileDetail)
+PROFILE_DETAIL_FIELDS: Projection = {"user_id": 1, "display_name": 1, "avatar": 1, "cover": 1}
+
+# Tính ETag trang cá nhân
+PROFILE_VALIDATOR_FIELDS: Projection = {"updated_at": 1, "card_version": 1}
+
+# Thông tin người dùng đã xác thực (get_current_user)
+PROFILE_PRINCIPAL_FIELDS: Projection = {"first_name": 1, "last_name": 1, "avatar": 1, "cover": 1}
+
+
+# Media ================================================================================================================
+# MediaPublic
+MEDIA_PUBLIC_FIELDS: Projection = {"type": 1, "url": 1}
+
+
+# User =================================================================================================================
+# Chỉ kiểm tra user có tồn tại
+USER_EXISTS_FIELDS: Projection = {"_id": 1}
+
+# Thông tin người dùng đã xác thực (get_current_user)
+USER_PRINCIPAL_FIELDS: Projection = {"email": 1, "status": 1, "email_verified": 1, "created_at": 1}
+
+# Cấp access token mới khi làm mới refresh token
+USER_TOKEN_FIELDS: Projection = {"email": 1}
+
+
+# Bình luận ============================================================================================================
+# Bình luận gốc (CommentResponse)
+COMMENT_ROOT_FIELDS: Projection = {
+    "user_id": 1, "root_id": 1, "content": 1, "has_replies": 1, "author": 1, "created_at": 1,
+    "reactions_count": 1, "reactions": 1,
+}
+
+# Phản hồi (CommentReplyResponse)
+COMMENT_REPLY_FIELDS: Projection = {
+    **COMMENT_ROOT_FIELDS,
+    "post_id": 1, "reply_to_comment_id": 1, "reply_to_user_id": 1, "reply_to_author": 1,
+}
+
+# Bình luận được trả lời (xác định root và người được trả lời)
+COMMENT_PARENT_FIELDS: Projection = {"root_id": 1, "user_id": 1}
+
+# Thả cảm xúc cho bình luận (tìm bài viết chứa bình luận)
+COMMENT_TARGET_FIELDS: Projection = {"post_id": 1}
+
+
+# Cuộc trò chuyện ======================================================================================================
+# Danh sách trò chuyện (ConversationListItem)
+CONVERSATION_LIST_FIELDS: Projection = {"participants.user_id": 1, "is_group": 1}
+
+# Danh sách người nhận realtime / kiểm tra thành viên
+CONVERSATION_PARTICIPANTS_FIELDS: Projection = {"participants.user_id": 1}
+
+
+# Tin nhắn =============================================================================================================
+# MessageResponse
+MESSAGE_PUBLIC_FIELDS: Projection = {"conversation_id": 1, "sender_id": 1, "content": 1, "created_at": 1}
@@ -0,0 +1,63 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+from app.core.mongo_database import mongodb_client
+
+
+class ReactionRepository:
+    """
+    Mỗi (target_type, target_id, user_id) tối đa 1 cảm xúc (unique index), đổi cảm xúc là ghi đè.
+    Bỏ cảm xúc không xóa document mà đặt type = None, mỗi lần ghi tăng version => cache Redis so version để
+    không ghi đè giá trị mới bằng giá trị cũ khi nhiều request cùng thả / bỏ cảm xúc.
+    """
+
+    def __init__(self):
+        self.db = mongodb_client.get_database()
+        self.collection = self.db.get_collection("reactions")
+
+    # Thả / đổi cảm xúc, trả về (cảm xúc trước đó hoặc None, version mới) ==============================================
+    async def upsert(self, target_type: str, target_id: str, user_id: str, reaction: str) -> Tuple[Optional[str], int]:
+        now = datetime.utcnow()
+        previous = await self.collection.find_one_and_update(
+            {"target_type": target_type, "target_id": ObjectId(target_id), "user_id": ObjectId(user_id)},
+            {"$set": {"type": reaction, "updated_at": now}, "$inc": {"version": 1},
+             "$setOnInsert": {"created_at": now}},
+            projection={"type": 1, "version": 1, "_id": 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            return None, 1
+        return previous.get("type"), previous.get("version", 0) + 1
+
+
+    # Bỏ cảm xúc, trả về (cảm xúc đã bỏ, version mới) hoặc (None, None) nếu chưa thả ===================================
+    async def remove(self, target_type: str, target_id: str, user_id: str) -> Tuple[Optional[str], Optional[int]]:
+        previous = await self.collection.find_one_and_update(
+            {"target_type": target_type, "target_id": ObjectId(target_id), "user_id": ObjectId(user_id),
+             "type": {"$ne": None}},
+            {"$set": {"type": None, "updated_at": datetime.utcnow()}, "$inc": {"version": 1}},
+            projection={"type": 1, "version": 1, "_id": 0},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not previous:
+            return None, None
+        return previous["type"], previous.get("version", 0) + 1
+
+
+    # Cảm xúc của 1 user trên nhiều bài viết / bình luận: id => (cảm xúc hoặc None, version) ===========================
+    async def get_user_reactions(self, user_id: str, target_type: str,
+                                 target_ids: List[str]) -> Dict[str, Tuple[Optional[str], int]]:
+        query: Dict[str, Any] = {
+            "user_id": ObjectId(user_id),
+            "target_type": target_type,
+            "target_id": {"$in": [ObjectId(i) for i in target_ids]},
+        }
+        db_cursor = self.collection.find(query, {"target_id": 1, "type": 1, "version": 1, "_id": 0})
+        return {
+            str(reaction["target_id"]): (reaction.get("type"), reaction.get("version", 0))
+            async for reaction in db_cursor
+        }
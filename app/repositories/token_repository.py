@@ -3,6 +3,9 @@ from typing import Optional, Dict, Any, Coroutine
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, delete, update
 
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
 from app.core.mongo_database import mongodb_client
 import hashlib
 
@@ -16,23 +19,46 @@ class TokenRepository:
         return hashlib.sha256(token.encode('utf-8')).hexdigest()
 
     # thêm refresh token
-    async def create_refresh_token(self, refresh_token: str, user_id: str, expires_at: datetime) -> str:
+    async def create_refresh_token(self, refresh_token: str, user_id: str, expires_at: datetime,
+                                   email: Optional[str] = None) -> str:
         # gọi hash_token để băm mã refresh token ra
         hashed_token = self._hash_token(refresh_token)
-        # tìm mã refresh token trong db xem đã có chưa
-        existing = await self.get_refresh_token(refresh_token)
-        if existing: # nếu đã có mã refresh token
-            raise ValueError("Đã phát hiện xung đột mã refresh token. vui lòng thử lại")
 
         new_refresh_token = {
             "token": hashed_token,
             "user_id": user_id,
+            "email": email,
             "expires_at": expires_at
         }
-        await self.collection.insert_one(new_refresh_token)
+        # unique index trên token tự phát hiện trùng, không cần find trước
+        try:
+            await self.collection.insert_one(new_refresh_token)
+        except DuplicateKeyError:
+            raise ValueError("Đã phát hiện xung đột mã refresh token. vui lòng thử lại")
         return refresh_token
 
 
+    # xoay vòng refresh token: thu hồi token cũ (1 lệnh find_one_and_update) rồi thêm token mới
+    async def rotate_refresh_token(self, token: str, new_token: str, expires_at: datetime) -> Optional[Dict[str, Any]]:
+        now = datetime.utcnow()
+        # chỉ token chưa thu hồi và chưa hết hạn mới được xoay vòng
+        old_token = await self.collection.find_one_and_update(
+            {"token": self._hash_token(token), "revoked_at": None, "expires_at": {"$gt": now}},
+            {"$set": {"revoked_at": now, "replaced_by": self._hash_token(new_token)}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not old_token:
+            return None
+
+        await self.create_refresh_token(
+            refresh_token=new_token,
+            user_id=old_token["user_id"],
+            expires_at=expires_at,
+            email=old_token.get("email")
+        )
+        return old_token
+
+
     # Thao tác với DB tìm mã refresh_token
     async def get_refresh_token(self, token: str) -> Optional[Dict[str, Any]]:
         hashed_token = self._hash_token(token) # băm token trước
@@ -42,25 +68,23 @@ class TokenRepository:
 
     # thu hồi refresh token
     async def revoke_refresh_token(self, token: str) -> Optional[Dict[str, Any]]:
-        token_obj = await self.get_refresh_token(token)
-        if token_obj:
-            await self.collection.update_one(
-                {"_id": token_obj['_id']},
-                {"$set": {"revoked_at": datetime.utcnow()}}
-            )
-            # trả về token đã bị thu hồi (cập nhật revoked_at)
-            token_obj['revoked_at'] = datetime.utcnow()
-            return token_obj
-        return None
+        # trả về token đã bị thu hồi (cập nhật revoked_at), None nếu không tồn tại
+        return await self.collection.find_one_and_update(
+            {"token": self._hash_token(token)},
+            {"$set": {"revoked_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    # thu hồi toàn bộ refresh token còn hiệu lực của user bằng 1 lệnh update_many
+    async def revoke_all_for_user(self, user_id: Any) -> int:
+        result = await self.collection.update_many(
+            {"user_id": user_id, "revoked_at": None},
+            {"$set": {"revoked_at": datetime.utcnow()}}
+        )
+        return result.modified_count
 
     # Xóa refresh token
     async def delete_refresh_token(self, token: str) -> bool:
         hashed_token = self._hash_token(token)
         result = await self.collection.delete_one({"token": hashed_token})
         return result.deleted_count > 0
-
-    # Xóa refresh token đã hết hạn
-    async def delete_expired_tokens(self) -> int:
-        now = datetime.utcnow()
-        result = await self.collection.delete_many({"expires_at": {"$lte": now}})
-        return result.deleted_count
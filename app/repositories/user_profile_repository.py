@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from bson import ObjectId
 from app.core.mongo_database import mongodb_client
@@ -16,15 +17,23 @@ class UserProfileRepository:
         return user_profile_data
 
 
+    # Truy vấn DB xóa profile theo user_id =============================================================================
+    async def delete_by_user_id(self, user_id: ObjectId) -> bool:
+        result = await self.collection.delete_one({"user_id": user_id})
+        return result.deleted_count > 0
+
+
     # Truy vấn DB lấy thông tin profile theo user_id ===================================================================
-    async def get_by_user_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        profile = await self.collection.find_one({"user_id": ObjectId(user_id)})
+    async def get_by_user_id(self, user_id: str,
+                             projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        profile = await self.collection.find_one({"user_id": ObjectId(user_id)}, projection)
         return profile
 
 
     # Truy vấn DB lấy thông tin của nhiều user =========================================================================
-    async def get_public_by_ids(self, user_ids: list[ObjectId]) -> list[Dict[str, Any]]:
-        cursor = self.collection.find({"user_id": {"$in": list(user_ids)}})
+    async def get_public_by_ids(self, user_ids: list[ObjectId],
+                                projection: Optional[Dict[str, Any]] = None) -> list[Dict[str, Any]]:
+        cursor = self.collection.find({"user_id": {"$in": list(user_ids)}}, projection)
         users = []
         async for user in cursor:
             users.append(user)
@@ -35,17 +44,17 @@ class UserProfileRepository:
     async def update_avatar(self,  user_id: str,  avatar_id: ObjectId) -> Dict[str, Any]:
         update = await self.collection.update_one(
             {"user_id": ObjectId(user_id)},
-            {"$set": {"avatar": avatar_id}}
+            {"$set": {"avatar": avatar_id, "updated_at": datetime.utcnow()}, "$inc": {"card_version": 1}}
         )
         result = await self.collection.find_one({"user_id" : ObjectId(user_id)})
         return result
 
 
-    # Truy vấn DB update cover ========================================================================================
+    # Truy vấn DB update cover =========================================================================================
     async def update_cover(self,  user_id: str,  cover_id: ObjectId) -> Dict[str, Any]:
         update = await self.collection.update_one(
             {"user_id": ObjectId(user_id)},
-            {"$set": {"cover": cover_id}}
+            {"$set": {"cover": cover_id, "updated_at": datetime.utcnow()}}
         )
         result = await self.collection.find_one({"user_id" : ObjectId(user_id)})
         return result
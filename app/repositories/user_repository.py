@@ -12,13 +12,24 @@ class UserRepository:
         self.collection = self.db.get_collection("users")
 
     # Truy vấn DB lấy thông tin User theo ID ===========================================================================
-    async def get_by_id(self, user_id: str) -> Optional[Dict[str, Any]]:
-        user = await self.collection.find_one({"_id": ObjectId(user_id)})
+    async def get_by_id(self, user_id: str, projection: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        user = await self.collection.find_one({"_id": ObjectId(user_id)}, projection)
         # print(f"test {user}")
         return user
 
 
 
+    # Truy vấn DB lấy thông tin nhiều user theo ID =====================================================================
+    async def get_by_ids(self, user_ids: List[ObjectId],
+                         projection: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+        cursor = self.collection.find({"_id": {"$in": list(user_ids)}}, projection)
+        users = []
+        async for user in cursor:
+            users.append(user)
+        return users
+
+
+
     # Truy vấn DB tìm name user ========================================================================================
     async def get_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         user_name = await self.collection.find_one({"username": username})
@@ -45,6 +56,12 @@ class UserRepository:
         return updated_user
 
 
+    # Truy vấn DB xóa user =============================================================================================
+    async def delete(self, user_id: ObjectId) -> bool:
+        result = await self.collection.delete_one({"_id": user_id})
+        return result.deleted_count > 0
+
+
 
 
 
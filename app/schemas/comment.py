@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from pydantic import BaseModel, Field
 
 from app.schemas.utils import ObjectIdStr
@@ -37,6 +37,8 @@ class CommentResponse(BaseModel):
     content: str
     has_replies: bool = False
     author: UserPublic
+    reactions_count: int = 0
+    reactions: Dict[str, int] = Field(default_factory=dict)
     created_at: datetime
 
 class CommentReplyResponse(BaseModel):
@@ -48,4 +50,6 @@ class CommentReplyResponse(BaseModel):
     content: str
     has_replies: bool = False
     author: UserPublic
+    reactions_count: int = 0
+    reactions: Dict[str, int] = Field(default_factory=dict)
     created_at: datetime
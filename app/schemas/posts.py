@@ -1,6 +1,6 @@
 from enum import Enum
 from pydantic import BaseModel, Field, computed_field
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 from .media import MediaPublic
@@ -54,6 +54,10 @@ class PostsListResponse(BaseModel):
     media: Optional[list[MediaPublic]] = None
     author: Optional[UserPublic] = None
     privacy: PostType
+    comments_count: int = 0
+    reactions_count: int = 0
+    reactions: Dict[str, int] = Field(default_factory=dict)
+    views: int = 0
     created_at: datetime
 
 
@@ -63,6 +67,10 @@ class PostDetailResponse(BaseModel):
     media: Optional[List[MediaPublic]] = None
     author: UserPublic
     privacy: PostType
+    comments_count: int = 0
+    reactions_count: int = 0
+    reactions: Dict[str, int] = Field(default_factory=dict)
+    views: int = 0
     created_at: datetime
 
 
@@ -76,3 +84,9 @@ class PaginationInfo(BaseModel):
 class PaginatedPostsResponse(BaseModel):
     data: List[PostsListResponse]
     pagination: PaginationInfo
+
+
+# ================= TRENDING ===========================================================================================
+class TrendingTag(BaseModel):
+    tag: str
+    score: float
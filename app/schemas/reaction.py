@@ -0,0 +1,38 @@
+from enum import Enum
+from typing import Dict, Optional
+from pydantic import BaseModel, Field
+
+from app.schemas.utils import ObjectIdStr
+
+# ============== DOMAIN ENUM ===========================================================================================
+class ReactionType(str, Enum):
+    LIKE = "like"
+    LOVE = "love"
+    HAHA = "haha"
+    WOW = "wow"
+    SAD = "sad"
+    ANGRY = "angry"
+
+
+class ReactionTarget(str, Enum):
+    POST = "post"
+    COMMENT = "comment"
+
+
+# =========== REQUEST DTO ==============================================================================================
+class ReactionCreate(BaseModel):
+    type: ReactionType = Field(default=ReactionType.LIKE)
+
+
+# ================ RESPONSE DTO ========================================================================================
+class ReactionResponse(BaseModel):
+    target_type: ReactionTarget
+    target_id: ObjectIdStr
+    # None = đã bỏ cảm xúc
+    type: Optional[ReactionType] = None
+
+
+class MyReactionsResponse(BaseModel):
+    target_type: ReactionTarget
+    # id bài viết / bình luận => cảm xúc của tôi (không có trong dict = chưa thả)
+    reactions: Dict[str, ReactionType]
@@ -1,18 +1,24 @@
+import asyncio
 from datetime import datetime, timezone
 from typing import Optional, Dict, Any
 import redis.asyncio as redis
 import time
 from jose import jwt, JWTError
-import random
+from bson import ObjectId
 from pydantic import EmailStr
-from app.exceptions.auth import EmailAlreadyExistsError, UserNotFoundError, XacMinhError, OTPKhongTonTai, \
-    OTPKhongChinhXac, XacMinhEmail, Ban, UserNotFoundErrorMail, RefreshTokenNotFoundError, UserInvalidForToken
+from pymongo.errors import DuplicateKeyError
+from app.exceptions.auth import EmailAlreadyExistsError, UserNotFoundError, XacMinhError, XacMinhEmail, Ban, \
+    UserNotFoundErrorMail, RefreshTokenNotFoundError, UserInvalidForToken, RefreshTokenReused, OTPGuiQuaNhanh
 from app.repositories.user_profile_repository import UserProfileRepository
 from app.services.blacklist_service import BlacklistService
-from fastapi import HTTPException, status, Request, Response, BackgroundTasks
+from app.services.otp_store import OTPStore
+from app.services.login_throttle import LoginThrottle
+from fastapi import HTTPException, status, Request, Response
 from app.schemas.auth import UserRegister, Token, UserRegisterResponse
 from app.repositories.user_repository import UserRepository
-from app.core.security import verify_password,hash_password,create_access_token, create_scoped_token, verify_scoped_token
+from app.repositories.projections import USER_TOKEN_FIELDS
+from app.core.security import password_hasher, create_access_token, create_scoped_token, verify_scoped_token
+from app.core.cache import invalidate_principal
 from app.core.email import send_verification_email, send_password_reset_otp_email
 from app.services.token_service import TokenService
 from app.core.config import settings
@@ -29,86 +35,83 @@ class AuthService:
         self.user_repo = user_repo
         self.token_service = token_service
         self.redis_client = redis_client
+        self.otp_store = OTPStore(redis_client)
+        self.login_throttle = LoginThrottle(redis_client)
 
 
     # Logic đăng kí tài khoản ==========================================================================================
-    async def register(self, user_data: UserRegister, background_tasks: BackgroundTasks) -> UserRegisterResponse:
+    async def register(self, user_data: UserRegister) -> UserRegisterResponse:
 
         normalized_email = str(user_data.email).strip().lower()
 
-        # 1. Kiểm tra email
-        if await self.user_repo.get_by_email(normalized_email):
-            raise EmailAlreadyExistsError()
+        # 1. Hash password
+        hashed_pwd = await password_hasher.hash(user_data.password)
 
-        # 2. Hash password
-        hashed_pwd = hash_password(user_data.password)
+        # 2. Tạo sẵn ID ở phía app để ghi User và Profile cùng lúc
+        user_id = ObjectId()
+        now = datetime.now(timezone.utc)
 
         # 3. Dữ liệu cho bảng User
         user_auth_data = {
+            "_id": user_id,
             "email": normalized_email,
             "password": hashed_pwd,
             "status": "pending",
             "email_verified": False,
-            "created_at": datetime.now(timezone.utc),
-            "updated_at": datetime.now(timezone.utc)
+            "created_at": now,
+            "updated_at": now
         }
 
-        # 4. LƯU
-        try:
-            # 1: Tạo User trước để lấy ID
-            created_user = await self.user_repo.create(user_auth_data)
-            user_id = created_user["_id"]
-
-            # 2: Tạo Profile sử dụng ID vừa lấy
-            dob = datetime(user_data.year, user_data.month, user_data.day)
-
-            user_profile_data = {
-                "user_id": user_id,
-                "first_name": user_data.first_name,
-                "last_name": user_data.last_name,
-                "display_name": f"{user_data.last_name} {user_data.first_name}".strip(),
-                "date_of_birth": dob,
-                "gender": user_data.gender,
-                "avatar": None,
-                "cover_photo": None,
-                "created_at": datetime.now(timezone.utc),
-                "updated_at": datetime.now(timezone.utc)
-            }
-
-            await self.user_profile_repo.create(user_profile_data)
-
-            # 5. Xử lý OTP
-            otp_code = "".join([str(random.randint(0, 9)) for _ in range(6)])
-            await self.redis_client.setex(
-                f"auth:otp:email:{normalized_email}", 300, otp_code
-            )
+        # 4. Dữ liệu cho bảng Profile
+        dob = datetime(user_data.year, user_data.month, user_data.day)
+
+        user_profile_data = {
+            "user_id": user_id,
+            "first_name": user_data.first_name,
+            "last_name": user_data.last_name,
+            "display_name": f"{user_data.last_name} {user_data.first_name}".strip(),
+            "date_of_birth": dob,
+            "gender": user_data.gender,
+            "avatar": None,
+            "cover_photo": None,
+            "created_at": now,
+            "updated_at": now
+        }
 
-            background_tasks.add_task(
-                send_verification_email,
+        # 5. LƯU: 2 lệnh insert chạy song song, email trùng do unique index trên 'email' báo về
+        user_result, profile_result = await asyncio.gather(
+            self.user_repo.create(user_auth_data),
+            self.user_profile_repo.create(user_profile_data),
+            return_exceptions=True
+        )
+        if isinstance(user_result, BaseException) or isinstance(profile_result, BaseException):
+            # Bên nào đã ghi thành công thì xóa đi, không để lại User thiếu Profile (hoặc ngược lại)
+            if not isinstance(user_result, BaseException):
+                await self.user_repo.delete(user_id)
+            if not isinstance(profile_result, BaseException):
+                await self.user_profile_repo.delete_by_user_id(user_id)
+
+            if isinstance(user_result, DuplicateKeyError):
+                raise EmailAlreadyExistsError()
+            raise user_result if isinstance(user_result, BaseException) else profile_result
+
+        # 6. Xử lý OTP (còn cooldown => mã vừa gửi gần đây vẫn dùng được, không gửi thêm)
+        otp_code, _ = await self.otp_store.issue("email", normalized_email)
+        if otp_code:
+            send_verification_email(
                 email_to=normalized_email,
                 otp_code=otp_code,
                 name=user_data.first_name
             )
 
-            return UserRegisterResponse(email=normalized_email)
-
-
-        except Exception as e:
-            raise e
+        return UserRegisterResponse(email=normalized_email)
 
 
 
     # Logic xác minh email =============================================================================================
     async def verify_email(self, email: str, otp: str) -> UserRegisterResponse:
-        key = f"auth:otp:email:{email}"
-        stored_otp = await self.redis_client.get(key)
-
-        # 2. Kiểm tra tính hợp lệ của OTP
-        if not stored_otp:
-            raise OTPKhongTonTai()
-
-        if stored_otp != otp:
-            raise OTPKhongChinhXac()
+        # 1. Kiểm tra OTP (đúng thì OTP bị xóa luôn, sai quá số lần thì bị hủy)
+        await self.otp_store.verify("email", email, otp)
 
         user = await self.user_repo.get_by_email(email)
         if not user:
@@ -122,13 +125,13 @@ class AuthService:
             "email_verified": True
         }
         updated_user = await self.user_repo.update(user_id=user["_id"], user_data=update_data)
-        await self.redis_client.delete(key)
+        await invalidate_principal(user["_id"])
         return UserRegisterResponse(**updated_user)
 
 
 
     # Logic gửi lại mã OTP =============================================================================================
-    async def resend_verification_email(self, email: str, background_tasks: BackgroundTasks):
+    async def resend_verification_email(self, email: str):
         # 1. Kiểm tra user tồn tại
         user = await self.user_repo.get_by_email(email)
         if not user:
@@ -138,19 +141,13 @@ class AuthService:
         if user.get("email_verified"):
             raise XacMinhError()
 
-        # 3. Sinh OTP mới
-        otp_code = "".join([str(random.randint(0, 9)) for _ in range(6)])
-
-        # 4. Lưu vào Redis (Ghi đè OTP cũ -> Tự động revoke OTP cũ)
-        await self.redis_client.setex(
-            f"auth:otp:email:{email}",
-            300,
-            otp_code
-        )
+        # 3. Sinh OTP mới (Ghi đè OTP cũ -> Tự động revoke OTP cũ), còn cooldown thì không gửi
+        otp_code, retry_after = await self.otp_store.issue("email", email)
+        if not otp_code:
+            raise OTPGuiQuaNhanh(retry_after)
 
-        # 5. Gửi email background
-        background_tasks.add_task(
-            send_verification_email,
+        # 5. Đưa email vào hàng đợi gửi
+        send_verification_email(
             email_to=email,
             otp_code=otp_code,
             name=user.get("first_name", "User")
@@ -161,20 +158,17 @@ class AuthService:
 
 
     # Logic quên mật khẩu ==============================================================================================
-    async def forgot_password(self, email: str, background_tasks: BackgroundTasks):
+    async def forgot_password(self, email: str):
         user = await self.user_repo.get_by_email(email)
         if not user:
             return {"message": "Đã gửi mã xác nhận, vui lòng kiểm tra email"}
 
-        otp_code = "".join([str(random.randint(0, 9)) for _ in range(6)])
+        # Còn cooldown thì bỏ qua (vẫn trả về như bình thường để không lộ email có tồn tại hay không)
+        otp_code, _ = await self.otp_store.issue("forgot-password", user['email'])
+        if not otp_code:
+            return {"message": "Đã gửi mã khôi phục mật khẩu, vui lòng kiểm tra email"}
 
-        await self.redis_client.setex(
-            f"auth:otp:forgot-password:{user['email']}",
-            300,
-            otp_code
-        )
-        background_tasks.add_task(
-            send_password_reset_otp_email,
+        send_password_reset_otp_email(
             email_to=user['email'],
             otp_code=otp_code,
             name=user.get('first_name', 'User')
@@ -187,18 +181,8 @@ class AuthService:
 
     # Logic xác minh OTP ===============================================================================================
     async def verify_forgot_password_otp(self, email: str, otp: str):
-        key = f"auth:otp:forgot-password:{email}"
-        # 1. Lấy OTP từ Redis
-        stored_otp = await self.redis_client.get(key)
-
-        # 2. Kiểm tra
-        if not stored_otp:
-            raise OTPKhongTonTai()
-
-        if stored_otp != otp:
-            raise OTPKhongChinhXac()
-
-        await self.redis_client.delete(key)
+        # 1. Kiểm tra OTP (compare-and-delete trong 1 lần gọi Redis)
+        await self.otp_store.verify("forgot-password", email, otp)
 
         # 4. Tạo Token reset password
         password_reset_token = create_scoped_token(
@@ -223,7 +207,7 @@ class AuthService:
                 detail="User not found"
             )
 
-        hashed_password = hash_password(new_password)
+        hashed_password = await password_hasher.hash(new_password)
         user['password'] = hashed_password
         updated_user = await self.user_repo.update(user['_id'], {'password': hashed_password})
         return UserRegisterResponse(**updated_user)
@@ -231,19 +215,27 @@ class AuthService:
 
 
     # Logic đăng nhập ==================================================================================================
-    async def login(self, *, response: Response, token_service: TokenService, email: str, password: str) -> Token:
-        print(f"Đi vào đây")
+    async def login(self, *, response: Response, token_service: TokenService, email: str, password: str,
+                    client_ip: Optional[str] = None) -> Token:
+        # Tài khoản / IP đang bị khóa thì từ chối luôn, không tốn truy vấn DB và bcrypt
+        await self.login_throttle.check(email, client_ip)
+
         user = await self.user_repo.get_by_email(email)
         if not user:
+            await self.login_throttle.record_failure(email, client_ip)
             raise UserNotFoundErrorMail()
 
         # tạo biến trước để kiểm tra mật khẩu là False
         is_password_correct = False
+        new_password_hash = None
         if user:
-            is_password_correct = verify_password(password, user['password'])
+            is_password_correct, new_password_hash = await password_hasher.verify_and_update(
+                password, user['password']
+            )
 
         # nếu user ko tồn tại hoặc password sai
         if not user or not is_password_correct:
+            await self.login_throttle.record_failure(email, client_ip)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Tài khoản hoặc mật khẩu không chính xác!",
@@ -255,10 +247,17 @@ class AuthService:
         elif user['status'] == "suspended":
             raise Ban()
 
+        await self.login_throttle.record_success(email)
+
+        # Hash cũ có cost khác cấu hình hiện tại => lưu lại hash mới
+        if new_password_hash:
+            await self.user_repo.update(user['_id'], {'password': new_password_hash})
+
         # Nếu user tồn tại, mật khẩu đúng
         # Thì gọi hàm create_access_token ở security.py để tạo access token
         access_token = create_access_token(
-            data={"sub": str(user['_id']), "email": user['email']}
+            data={"sub": str(user['_id']), "email": user['email']},
+            generation=await self._get_token_generation(user['_id'])
         )
         # Gọi tiếp services để xử lí thêm refresh_token
         refresh_token = await token_service.create_refresh_token(user=user)
@@ -282,22 +281,26 @@ class AuthService:
         if not refresh_token:
             raise RefreshTokenNotFoundError()
 
-        # Xác minh refresh token
-        user_id = await self.token_service.verify_refresh_token(refresh_token)
-
-        # Thu hồi token
-        await self.token_service.revoke_refresh_token(refresh_token)
-
-        # lấy user
-        user = await self.user_repo.get_by_id(user_id)
+        # Thu hồi token cũ và cấp refresh token mới
+        try:
+            new_refresh_token, token_obj = await self.token_service.rotate_refresh_token(refresh_token)
+        except RefreshTokenReused as e:
+            # Token cũ bị dùng lại => hủy toàn bộ phiên của user
+            await self._revoke_all_sessions(e.user_id)
+            raise
+
+        # User đã bị xóa thì không cấp token mới (1 lần đọc theo _id)
+        user_id = token_obj["user_id"]
+        user = await self.user_repo.get_by_id(user_id, USER_TOKEN_FIELDS)
         if not user:
             raise UserInvalidForToken()
+        email = user['email']
 
         # Create new tokens
         new_access_token = create_access_token(
-            data={"sub": str(user['_id']), "email": user['email']}
+            data={"sub": str(user_id), "email": email},
+            generation=await self._get_token_generation(user_id)
         )
-        new_refresh_token = await self.token_service.create_refresh_token(user=user)
 
         # Set cookie
         response.set_cookie(
@@ -361,6 +364,28 @@ class AuthService:
         return {"message": "Bạn đã logout thành công"}
 
 
+    # hàm xử lí logic đăng xuất khỏi mọi thiết bị ======================================================================
+    async def logout_all_devices(self, *, response: Response, user_id: str) -> dict:
+        await self._revoke_all_sessions(ObjectId(user_id))
+        response.delete_cookie(key="refresh_token")
+
+        return {"message": "Đã đăng xuất khỏi tất cả thiết bị"}
+
+
+    # Hủy toàn bộ phiên đăng nhập của user =============================================================================
+    async def _revoke_all_sessions(self, user_id: Any) -> None:
+        # Tăng thế hệ token => mọi access token đã cấp đều bị từ chối
+        await BlacklistService(self.redis_client).bump_token_generation(str(user_id))
+
+        # Thu hồi toàn bộ refresh token bằng 1 lệnh update_many
+        await self.token_service.revoke_all_refresh_tokens(user_id)
+
+
+    # Lấy thế hệ token hiện tại để nhúng vào access token ==============================================================
+    async def _get_token_generation(self, user_id: Any) -> int:
+        return await BlacklistService(self.redis_client).get_token_generation(str(user_id))
+
+
     # async def authenticate_user(self, username: str, password: str) -> Optional[Dict[str, Any]]:
     #     user = await self.user_repo.get_by_username(username)
     #     if not user:
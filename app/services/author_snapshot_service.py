@@ -0,0 +1,115 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+from bson import ObjectId
+from loguru import logger
+
+from app.core.feed_cache import feed_cache
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.media_repository import MediaRepository
+from app.repositories.posts_repository import PostRepository
+from app.repositories.projections import MEDIA_PUBLIC_FIELDS, PROFILE_CARD_FIELDS
+from app.repositories.user_profile_repository import UserProfileRepository
+
+SNAPSHOT_BATCH_SIZE = 500
+
+# Giữ tham chiếu tới các task đang chạy để không bị garbage collect giữa chừng
+_refresh_tasks: Set[asyncio.Task] = set()
+
+
+# Bản chụp thông tin tác giả lưu kèm bài viết / bình luận ==============================================================
+def snapshot_from_card(card: Optional[Dict[str, str]]) -> Optional[Dict[str, Any]]:
+    if not card:
+        return None
+    return {
+        "display_name": card["display_name"],
+        "avatar": card["avatar"] or None,
+        "version": int(card.get("version") or 0),
+    }
+
+
+class AuthorSnapshotService:
+    """
+    Ghi lại bản chụp tác giả (author / reply_to_author) trong posts và comments khi profile thay đổi.
+    Chạy nền, mỗi lô SNAPSHOT_BATCH_SIZE document 1 lệnh update_many, không ghi đè bản chụp có version mới hơn.
+    """
+
+    def __init__(self, post_repo: PostRepository, comment_repo: CommentRepository,
+                 user_profile_repo: UserProfileRepository, media_repo: MediaRepository):
+        self.post_repo = post_repo
+        self.comment_repo = comment_repo
+        self.user_profile_repo = user_profile_repo
+        self.media_repo = media_repo
+
+
+    # Tạo bản chụp mới nhất từ DB (không qua cache) ====================================================================
+    async def build_snapshot(self, user_id: ObjectId) -> Optional[Dict[str, Any]]:
+        profile = await self.user_profile_repo.get_by_user_id(str(user_id), PROFILE_CARD_FIELDS)
+        if not profile:
+            return None
+
+        avatar_url = None
+        if profile.get("avatar"):
+            media = await self.media_repo.get_by_id(profile["avatar"], MEDIA_PUBLIC_FIELDS)
+            avatar_url = media.get("url") if media else None
+
+        return {
+            "display_name": profile.get("display_name") or "",
+            "avatar": avatar_url,
+            "version": profile.get("card_version", 0),
+        }
+
+
+    # Ghi lại bản chụp trên toàn bộ bài viết và bình luận của user =====================================================
+    async def refresh(self, user_id: Any) -> Dict[str, int]:
+        user_id = ObjectId(user_id)
+        snapshot = await self.build_snapshot(user_id)
+        if not snapshot:
+            return {}
+
+        reply_snapshot = {"display_name": snapshot["display_name"], "version": snapshot["version"]}
+        updated = {
+            "posts": await self._refresh_batches(
+                lambda after: self.post_repo.get_ids_by_user(user_id, after_id=after, limit=SNAPSHOT_BATCH_SIZE),
+                lambda ids: self.post_repo.update_author_snapshot(ids, snapshot)
+            ),
+            "comments": await self._refresh_batches(
+                lambda after: self.comment_repo.get_ids_by_user(user_id, after_id=after, limit=SNAPSHOT_BATCH_SIZE),
+                lambda ids: self.comment_repo.update_author_snapshot(ids, snapshot)
+            ),
+            "replies": await self._refresh_batches(
+                lambda after: self.comment_repo.get_ids_by_user(user_id, field="reply_to_user_id", after_id=after,
+                                                                limit=SNAPSHOT_BATCH_SIZE),
+                lambda ids: self.comment_repo.update_author_snapshot(ids, reply_snapshot, field="reply_to_author")
+            ),
+        }
+        # Feed đã cache vẫn mang bản chụp cũ
+        if updated["posts"]:
+            await feed_cache.invalidate()
+        logger.info(f"Cập nhật bản chụp tác giả {user_id} (version {snapshot['version']}): {updated}")
+        return updated
+
+
+    @staticmethod
+    async def _refresh_batches(get_ids, update) -> int:
+        total = 0
+        after_id = None
+        while True:
+            ids = await get_ids(after_id)
+            if not ids:
+                return total
+            total += await update(ids)
+            after_id = ids[-1]
+
+
+# Chạy refresh ở background, lỗi chỉ ghi log ===========================================================================
+def schedule_author_snapshot_refresh(service: AuthorSnapshotService, user_id: Any) -> None:
+    async def _run():
+        try:
+            await service.refresh(user_id)
+        except Exception as e:
+            logger.error(f"Lỗi cập nhật bản chụp tác giả {user_id}: {e}")
+
+    task = asyncio.create_task(_run())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
@@ -3,6 +3,8 @@ from datetime import timedelta
 from typing import Optional
 import redis.asyncio as redis
 
+from app.core.revocation import revocation_registry, BLACKLIST_KEY_PREFIX, TOKEN_GENERATION_KEY_PREFIX
+
 class BlacklistService:
     # hàm khởi tạo
     def __init__(self, redis_client: redis.Redis):
@@ -10,7 +12,7 @@ class BlacklistService:
 
 
     async def add_to_blacklist(self, jti: str, ttl: int, user_id: Optional[int] = None, exp: Optional[int] = None):
-        key = f"jti:{jti}"
+        key = f"{BLACKLIST_KEY_PREFIX}{jti}"
         value = json.dumps({
             "jti": jti,
             "user_id": user_id,
@@ -18,13 +20,28 @@ class BlacklistService:
             "status": "blacklist"
         })
         await self.redis_client.setex(name=key, time=ttl, value=value)
+        # Báo cho các tiến trình khác cập nhật danh sách local
+        await revocation_registry.publish(self.redis_client, jti, exp)
 
     # hàm kiểm tra xem jti có trong blacklist ko
     async def is_blacklisted(self, jti: str) -> bool:
+        # Listener đang chạy => danh sách local đã đồng bộ, không cần gọi Redis
+        if revocation_registry.is_ready:
+            return revocation_registry.is_revoked(jti)
         # tạo key
-        key = f"jti:{jti}"
+        key = f"{BLACKLIST_KEY_PREFIX}{jti}"
         # gọi tới redis EXITS
         return await self.redis_client.exists(key)
 
+    # Lấy thế hệ token hiện tại của user (token có gen nhỏ hơn coi như đã bị thu hồi)
+    async def get_token_generation(self, user_id: str) -> int:
+        if revocation_registry.is_ready:
+            return revocation_registry.get_generation(str(user_id))
+        generation = await self.redis_client.get(f"{TOKEN_GENERATION_KEY_PREFIX}{user_id}")
+        return int(generation) if generation else 0
 
-
+    # Tăng thế hệ token => thu hồi toàn bộ access token đã cấp của user trong O(1)
+    async def bump_token_generation(self, user_id: str) -> int:
+        generation = await self.redis_client.incr(f"{TOKEN_GENERATION_KEY_PREFIX}{user_id}")
+        await revocation_registry.publish_generation(self.redis_client, str(user_id), generation)
+        return generation
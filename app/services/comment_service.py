@@ -1,3 +1,4 @@
+import asyncio
 from datetime import datetime
 from typing import Optional, List
 from bson import ObjectId
@@ -6,29 +7,41 @@ from app.repositories.comment_repository import CommentRepository
 from app.repositories.posts_repository import PostRepository
 from app.repositories.user_profile_repository import UserProfileRepository
 from app.repositories.media_repository import MediaRepository
+from app.repositories.projections import COMMENT_PARENT_FIELDS, COMMENT_REPLY_FIELDS, COMMENT_ROOT_FIELDS, \
+    POST_OWNER_FIELDS, POST_VALIDATOR_FIELDS
 from app.schemas.comment import CommentCreate, CommentResponse, UserReply, CommentCreateResponse, CommentReplyResponse
 from app.schemas.posts import UserPublic
-from app.core.config import settings
+from app.core.counters import engagement_counters
+from app.services.author_snapshot_service import AuthorSnapshotService, snapshot_from_card
+from app.services.engagement_service import post_counter
+from app.services.entity_loader import EntityLoader
 from app.services.notification_service import NotificationService
+from app.services.post_tag_service import PostTagService
+from app.utils.etag import make_etag
+from app.utils.media import build_media_url
 
 
 class CommentService:
     def __init__(self,
         comment_repo: CommentRepository, post_repo: PostRepository,
         user_profile_repo: UserProfileRepository, media_repo: MediaRepository,
-        notification_service: NotificationService
+        notification_service: NotificationService, entity_loader: EntityLoader,
+        post_tag_service: PostTagService, author_snapshot_service: AuthorSnapshotService
     ):
         self.comment_repo = comment_repo
         self.post_repo = post_repo
         self.user_profile_repo = user_profile_repo
         self.media_repo = media_repo
         self.notification_service = notification_service
+        self.entity_loader = entity_loader
+        self.post_tag_service = post_tag_service
+        self.author_snapshot_service = author_snapshot_service
 
 
     # Logic gửi bình luận cả rep =======================================================================================
     async def create_comment(self, user_id: str, data: CommentCreate) -> CommentCreateResponse:
 
-        post = await self.post_repo.get_by_id(data.post_id)
+        post = await self.post_repo.get_by_id(data.post_id, POST_OWNER_FIELDS)
         if not post:
             raise NotFoundError()
 
@@ -49,7 +62,7 @@ class CommentService:
 
         if data.reply_to_comment_id:
             # lấy comment đang rep
-            parent_comment = await self.comment_repo.get_by_id(data.reply_to_comment_id)
+            parent_comment = await self.comment_repo.get_by_id(data.reply_to_comment_id, COMMENT_PARENT_FIELDS)
             if not parent_comment:
                 raise NotFoundError()
 
@@ -73,39 +86,41 @@ class CommentService:
         comment_dict["reply_to_comment_id"] = reply_to_comment_id_obj
         comment_dict["reply_to_user_id"] = reply_to_user_id_obj
 
+        # Lưu kèm thông tin người bình luận / người được trả lời để lúc đọc không phải tra profile
+        # Đọc thẳng Mongo (không qua cache thẻ): bản chụp cũ sẽ không được refresh sửa lại vì mang version cũ
+        snapshot_user_ids = [ObjectId(user_id)] + ([reply_to_user_id_obj] if reply_to_user_id_obj else [])
+        snapshots = await asyncio.gather(*(self.author_snapshot_service.build_snapshot(i) for i in snapshot_user_ids))
+        author_snapshot = snapshots[0]
+        reply_snapshot = snapshots[1] if reply_to_user_id_obj else None
+
+        comment_dict["author"] = author_snapshot
+        comment_dict["reply_to_author"] = {
+            "display_name": reply_snapshot["display_name"],
+            "version": reply_snapshot["version"]
+        } if reply_snapshot else None
+
         new_comment = await self.comment_repo.create(comment_dict) # Lưu comment vào DB
-        await self.post_repo.increase_comment_count(data.post_id) # cập nhật số bình luận
-        
-        author_profile = await self.user_profile_repo.get_by_user_id(user_id)
-        
-        avatar_url = None
-        if author_profile and author_profile.get("avatar"):
-            avatar_media = await self.media_repo.get_by_id(author_profile["avatar"])
-            if avatar_media:
-                url = avatar_media["url"]
-                if url and not url.startswith("http"):
-                     url = f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
-                avatar_url = url
+        # cập nhật số bình luận (cộng dồn trên Redis, ghi xuống bài viết định kỳ)
+        await engagement_counters.incr(post_counter(data.post_id, "comments_count"))
+
+        # Hashtag / mention trong bình luận cũng trỏ về bài viết
+        await self.post_tag_service.sync_source(post["_id"], new_comment["_id"], new_comment["content"],
+                                                public=post.get("privacy") == "public", is_new=True)
 
         author_public = UserPublic(
             id=str(user_id),
-            display_name=author_profile["display_name"] if author_profile else "Unknown",
-            avatar=avatar_url
+            display_name=author_snapshot["display_name"] if author_snapshot else "Unknown",
+            avatar=build_media_url(author_snapshot["avatar"]) if author_snapshot else None
         )
 
         reply_to_user = None
 
-        if reply_to_user_id_obj:
-            reply_user_profile = await self.user_profile_repo.get_by_user_id(
-                str(reply_to_user_id_obj)
+        if reply_snapshot:
+            reply_to_user = UserReply(
+                id=str(reply_to_user_id_obj),
+                display_name=reply_snapshot["display_name"] or "Unknown"
             )
 
-            if reply_user_profile:
-                reply_to_user = UserReply(
-                    id=str(reply_to_user_id_obj),
-                    display_name=reply_user_profile.get("display_name", "Unknown")
-                )
-
         # Gửi thông báo reatime
         current_user_id = user_id
         
@@ -148,42 +163,43 @@ class CommentService:
         )
 
 
+    # ETag danh sách bình luận của bài viết ============================================================================
+    async def get_root_comments_etag(self, post_id: str, limit: int, cursor: Optional[str]) -> Optional[str]:
+        """
+        Bình luận / phản hồi mới (has_replies cũng đổi theo) => id bình luận mới nhất của bài đổi ngay.
+        Cảm xúc trên bình luận được ghi dồn vào comment_reactions_count của bài viết cùng lúc với số đếm của bình luận.
+        comments_count không dùng được vì chỉ được ghi xuống định kỳ, trong khi bình luận mới hiện ra ngay.
+        """
+        post, latest_id = await asyncio.gather(
+            self.post_repo.get_by_id(post_id, POST_VALIDATOR_FIELDS),
+            self.comment_repo.get_latest_id(post_id)
+        )
+        if not post:
+            return None
+        return make_etag("comments", post_id, latest_id, post.get("comment_reactions_count", 0), limit, cursor)
+
+
     # Lấy tất cả bình luận trong bài viết ==============================================================================
     async def get_root_comments_for_post(self, post_id: str, limit: int = 10, cursor: Optional[str] = None) -> List[CommentResponse]:
-        comments = await self.comment_repo.get_root_comments(post_id, limit, cursor)
+        comments = await self.comment_repo.get_root_comments(post_id, limit, cursor, projection=COMMENT_ROOT_FIELDS)
         
         if not comments:
             return []
 
-        # Lấy thông tin người nhắn
-        user_ids = [c["user_id"] for c in comments]
-        users = await self.user_profile_repo.get_public_by_ids(user_ids)
-        
-        # Lấy avatars
-        avatar_ids = [user.get("avatar") for user in users if user.get("avatar")]
-        avatars = await self.media_repo.get_by_ids(avatar_ids) if avatar_ids else []
-        
-        avatar_map = {}
-        for avatar in avatars:
-             url = avatar["url"]
-             if url and not url.startswith("http"):
-                 url = f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
-             avatar_map[str(avatar["_id"])] = url
-
-        user_map = {}
-        for user in users:
-            uid = user["user_id"]
-            avatar_id = user.get("avatar")
-            user_map[uid] = UserPublic(
-                id=str(uid),
-                display_name=user.get("display_name", "Unknown"),
-                avatar=avatar_map.get(str(avatar_id))
-            )
+        # Lấy thông tin người nhắn kèm avatar (bình luận cũ chưa lưu sẵn thông tin tác giả)
+        cards = await self.entity_loader.load_cards(c["user_id"] for c in comments if not c.get("author"))
 
         # Tạo reponse trả về
         response = []
         for c in comments:
-            author = user_map.get(c["user_id"])
+            author = None
+            snapshot = c.get("author") or snapshot_from_card(cards.get(c["user_id"]))
+            if snapshot:
+                author = UserPublic(
+                    id=str(c["user_id"]),
+                    display_name=snapshot["display_name"] or "Unknown",
+                    avatar=build_media_url(snapshot["avatar"]) or None
+                )
             if not author:
                 author = UserPublic(id=str(c["user_id"]), display_name="Unknown", avatar=None)
 
@@ -196,6 +212,8 @@ class CommentService:
                 content=c["content"],
                 has_replies=c.get("has_replies", False),
                 author=author,
+                reactions_count=c.get("reactions_count", 0),
+                reactions=c.get("reactions") or {},
                 created_at=c["created_at"]
             ))
             
@@ -204,55 +222,33 @@ class CommentService:
 
     async def get_replies_for_comment_thread(self, root_comment_id: str, limit: int = 50,
                                              cursor: Optional[str] = None) -> List[CommentReplyResponse]:
-        print(f"đi vàoddaaay ")
-        replies = await self.comment_repo.get_replies(root_comment_id, limit, cursor)
-        print(f"test tử {len(replies)}")
+        replies = await self.comment_repo.get_replies(root_comment_id, limit, cursor, projection=COMMENT_REPLY_FIELDS)
         if not replies:
             return []
 
-        # Gộp tất cả user_ids cần lấy
+        # Gộp user_ids cần lấy (chỉ những phản hồi cũ chưa lưu sẵn thông tin)
         all_user_ids = set()
         for rep in replies:
-            all_user_ids.add(rep["user_id"])  # người rep
-            if rep.get("reply_to_user_id"):
+            if not rep.get("author"):
+                all_user_ids.add(rep["user_id"])  # người rep
+            if rep.get("reply_to_user_id") and not rep.get("reply_to_author"):
                 all_user_ids.add(rep["reply_to_user_id"])
-        print(f" danh sách {all_user_ids}")
-
-        # Chỉ cần 1 query duy nhất cho tất cả users
-        users = await self.user_profile_repo.get_public_by_ids(list(all_user_ids))
-
-        # Lấy avatars
-        avatar_ids = [user.get("avatar") for user in users if user.get("avatar")]
-        avatars = await self.media_repo.get_by_ids(avatar_ids) if avatar_ids else []
-
-        avatar_map = {}
-        for avatar in avatars:
-            url = avatar["url"]
-            if url and not url.startswith("http"):
-                url = f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
-            avatar_map[str(avatar["_id"])] = url
-
-        # map
-        user_map = {}
-        for user in users:
-            uid = str(user["user_id"])
-            avatar_id = user.get("avatar")
-            user_map[uid] = {
-                "id": uid,
-                "display_name": user.get("display_name", "Unknown"),
-                "avatar": avatar_map.get(str(avatar_id))
-            }
-        print(f"user map {user_map}")
+
+        # Lấy thẻ người dùng cho tất cả users (user chưa có trong cache mới phải query)
+        cards = await self.entity_loader.load_cards(all_user_ids)
 
         # Tạo response
         response = []
         for r in replies:
             author_id = str(r["user_id"])
-            print(f" kadm {author_id}")
-            author_data = user_map.get(author_id)
+            author_data = r.get("author") or snapshot_from_card(cards.get(r["user_id"]))
 
             if author_data:
-                author = UserPublic(**author_data)
+                author = UserPublic(
+                    id=author_id,
+                    display_name=author_data["display_name"] or "Unknown",
+                    avatar=build_media_url(author_data["avatar"]) or None
+                )
             else:
                 author = UserPublic(id=author_id, display_name="Unknown", avatar=None)
 
@@ -260,11 +256,11 @@ class CommentService:
             reply_to_user_id = r.get("reply_to_user_id")
 
             if reply_to_user_id and str(reply_to_user_id) != author_id:
-                reply_user_data = user_map.get(str(reply_to_user_id))
+                reply_user_data = r.get("reply_to_author") or snapshot_from_card(cards.get(reply_to_user_id))
                 if reply_user_data:
                     reply_to_user = UserReply(
-                        id=reply_user_data["id"],
-                        display_name=reply_user_data["display_name"]
+                        id=str(reply_to_user_id),
+                        display_name=reply_user_data["display_name"] or "Unknown"
                     )
 
             response.append(CommentReplyResponse(
@@ -276,6 +272,8 @@ class CommentService:
                 content=r["content"],
                 has_replies=r.get("has_replies", False),
                 author=author,
+                reactions_count=r.get("reactions_count", 0),
+                reactions=r.get("reactions") or {},
                 created_at=r["created_at"]
             ))
 
@@ -9,9 +9,11 @@ from app.exceptions.post import ForbiddenError, NotFoundError
 from app.repositories.conversation_repository import ConversationRepository
 from app.repositories.media_repository import MediaRepository
 from app.repositories.message_repository import MessageRepository
+from app.repositories.projections import CONVERSATION_LIST_FIELDS, CONVERSATION_PARTICIPANTS_FIELDS
 from app.repositories.user_profile_repository import UserProfileRepository
 from app.repositories.user_repository import UserRepository
 from app.schemas.conversation import ConversationResponse, ParticipantEmbedded, ConversationListItem, ConversationPartner
+from app.services.entity_loader import EntityLoader
 
 
 class ConversationService:
@@ -20,16 +22,18 @@ class ConversationService:
         conversation_repo: ConversationRepository,
         user_profile_repo: UserProfileRepository,
         media_repo: MediaRepository,
-        message_repo: MessageRepository):
+        message_repo: MessageRepository,
+        entity_loader: EntityLoader):
         self.conversation_repo = conversation_repo
         self.user_profile_repo = user_profile_repo
         self.media_repo = media_repo
         self.message_repo = message_repo
+        self.entity_loader = entity_loader
 
 
     # Lấy danh sách cuộc trò chuyện ====================================================================================
     async def get_conversations_for_user(self, user_id: str) -> List[ConversationListItem]:
-        conversations = await self.conversation_repo.get_conversations_for_user(user_id)
+        conversations = await self.conversation_repo.get_conversations_for_user(user_id, CONVERSATION_LIST_FIELDS)
         if not conversations:
             return []
 
@@ -45,23 +49,10 @@ class ConversationService:
                 partner_id = p1
             partner_ids.append(partner_id)
 
-        # 2.Lấy profile của người đó
-        profiles = await self.user_profile_repo.get_public_by_ids(partner_ids)
-        profile_map = {profile["user_id"]: profile for profile in profiles}
+        # 2.Lấy thẻ người dùng (tên + avatar) của người đó
+        cards = await self.entity_loader.load_cards(partner_ids)
 
-        # 3.Gom avatar từ danh sách profile
-        avatar_ids = []
-        for profile in profiles:
-            avatar = profile.get("avatar", [])
-            if avatar:
-                avatar_ids.append(avatar)
-
-        media_map = {}
-        if avatar_ids:
-            medias = await self.media_repo.get_by_ids(avatar_ids)
-            media_map = {media["_id"]: media for media in medias }
-
-        # 4.Build response trả về cho client
+        # 3.Build response trả về cho client
         result = []
 
         for conv in conversations:
@@ -73,26 +64,18 @@ class ConversationService:
             else:
                 partner_id = p1
 
-            profile = profile_map.get(partner_id)
+            card = cards.get(partner_id)
 
             partner = None
-            if profile:
-                avatar_url = ""
-                avatar_id = profile.get("avatar")
-
-                if avatar_id:
-                    media = media_map.get(avatar_id)
-                    url = media.get("url", "") if media else ""
-
-                    if url:
-                        base = settings.SERVER_BASE_URL.rstrip("/")
-                        url = f"{base}/{url.lstrip('/')}"
-
-                    avatar_url = url
+            if card:
+                avatar_url = card["avatar"]
+                if avatar_url:
+                    base = settings.SERVER_BASE_URL.rstrip("/")
+                    avatar_url = f"{base}/{avatar_url.lstrip('/')}"
 
                 partner = ConversationPartner(
                     user_id=str(partner_id),
-                    name=profile.get("display_name", "Người dùng"),
+                    name=card["display_name"] or "Người dùng",
                     avatar=avatar_url
                 )
 
@@ -117,46 +100,21 @@ class ConversationService:
 
         participants = existing_conversation_doc["participants"]
 
-        # ---- Batch profiles
-        user_ids = [(p["user_id"]) for p in participants]
-        profiles = await self.user_profile_repo.get_public_by_ids(user_ids)
-
-        profile_map = {
-            str(profile["user_id"]): profile
-            for profile in profiles
-        }
-
-        # ---- Batch medias (avatar)
-        avatar_ids = [
-            profile["avatar"]
-            for profile in profiles
-            if profile.get("avatar")
-        ]
-
-        media_map = {}
-        if avatar_ids:
-            medias = await self.media_repo.get_by_ids(avatar_ids)
-            media_map = {
-                str(media["_id"]): media
-                for media in medias
-            }
+        # ---- Batch thẻ người dùng (tên + avatar)
+        cards = await self.entity_loader.load_cards(p["user_id"] for p in participants)
 
         # ---- Build response (lặp thì kệ)
         participants_response = []
 
         for p in participants:
             uid = str(p["user_id"])
-            profile = profile_map.get(uid)
-
-            avatar_url = ""
-            if profile and profile.get("avatar"):
-                media = media_map.get(str(profile["avatar"]))
-                avatar_url = media.get("url", "") if media else ""
+            card = cards.get(ObjectId(uid))
+            avatar_url = card["avatar"] if card else ""
 
             participants_response.append(
                 ParticipantEmbedded(
                     user_id=uid,
-                    name=profile.get("display_name", "Người dùng") if profile else "Người dùng",
+                    name=(card["display_name"] or "Người dùng") if card else "Người dùng",
                     avatar=avatar_url,
                     joined_at=p["joined_at"]
                 )
@@ -173,7 +131,7 @@ class ConversationService:
 
     # Ẩn cuộc trò chuyện ===============================================================================================
     async def hide_conversation_for_user(self, conversation_id: str, user_id: str) -> bool:
-        conversation = await self.conversation_repo.get_by_id(conversation_id)
+        conversation = await self.conversation_repo.get_by_id(conversation_id, CONVERSATION_PARTICIPANTS_FIELDS)
         if not conversation:
             raise NotFoundError()
 
@@ -213,46 +171,21 @@ class ConversationService:
 
         participants = created_conversation_doc["participants"]
 
-        # ---- Batch profiles
-        user_ids = [(p["user_id"]) for p in participants]
-        profiles = await self.user_profile_repo.get_public_by_ids(user_ids)
-
-        profile_map = {
-            str(profile["user_id"]): profile
-            for profile in profiles
-        }
-
-        # ---- Batch medias
-        avatar_ids = [
-            profile["avatar"]
-            for profile in profiles
-            if profile.get("avatar")
-        ]
-
-        media_map = {}
-        if avatar_ids:
-            medias = await self.media_repo.get_by_ids(avatar_ids)
-            media_map = {
-                str(media["_id"]): media
-                for media in medias
-            }
+        # ---- Batch thẻ người dùng (tên + avatar)
+        cards = await self.entity_loader.load_cards(p["user_id"] for p in participants)
 
         # ---- Build response (lặp thì kệ)
         participants_response = []
 
         for p in participants:
             uid = str(p["user_id"])
-            profile = profile_map.get(uid)
-
-            avatar_url = ""
-            if profile and profile.get("avatar"):
-                media = media_map.get(str(profile["avatar"]))
-                avatar_url = media.get("url", "") if media else ""
+            card = cards.get(ObjectId(uid))
+            avatar_url = card["avatar"] if card else ""
 
             participants_response.append(
                 ParticipantEmbedded(
                     user_id=uid,
-                    name=profile.get("display_name", "Người dùng") if profile else "Người dùng",
+                    name=(card["display_name"] or "Người dùng") if card else "Người dùng",
                     avatar=avatar_url,
                     joined_at=p["joined_at"]
                 )
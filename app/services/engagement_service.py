@@ -0,0 +1,58 @@
+import asyncio
+from collections import defaultdict
+from typing import Dict
+
+from bson import ObjectId
+from loguru import logger
+
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.posts_repository import PostRepository
+
+
+# Tên field trong bộ đếm (app/core/counters.py) ========================================================================
+# "post:<post_id>:<counter>" và "comment:<comment_id>:<post_id>:<counter>"
+# counter là tên field trên document: comments_count, reactions.<loại cảm xúc>
+def post_counter(post_id: str, counter: str) -> str:
+    return f"post:{post_id}:{counter}"
+
+
+def comment_counter(comment_id: str, post_id: str, counter: str) -> str:
+    return f"comment:{comment_id}:{post_id}:{counter}"
+
+
+class EngagementService:
+    """
+    Ghi số đếm đã gom từ Redis xuống Mongo (gọi định kỳ bởi engagement_counters).
+    - reactions_count = tổng các reactions.<loại>, được cộng cùng lúc
+    - Cảm xúc trên bình luận cũng cộng vào comment_reactions_count của bài viết (dùng tính ETag danh sách bình luận)
+    - Bài viết có thay đổi thì tính lại hot_score ngay trong câu update
+    """
+
+    def __init__(self, post_repo: PostRepository, comment_repo: CommentRepository):
+        self.post_repo = post_repo
+        self.comment_repo = comment_repo
+
+    async def apply_counters(self, deltas: Dict[str, int]) -> None:
+        posts: Dict[ObjectId, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        comments: Dict[ObjectId, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+        for field, amount in deltas.items():
+            parts = field.split(":")
+            if parts[0] == "post" and len(parts) == 3:
+                _, post_id, counter = parts
+                posts[ObjectId(post_id)][counter] += amount
+                if counter.startswith("reactions."):
+                    posts[ObjectId(post_id)]["reactions_count"] += amount
+            elif parts[0] == "comment" and len(parts) == 4:
+                _, comment_id, post_id, counter = parts
+                comments[ObjectId(comment_id)][counter] += amount
+                if counter.startswith("reactions."):
+                    comments[ObjectId(comment_id)]["reactions_count"] += amount
+                    posts[ObjectId(post_id)]["comment_reactions_count"] += amount
+            else:
+                logger.warning(f"Bỏ qua field đếm không hợp lệ: {field}")
+
+        await asyncio.gather(
+            self.post_repo.apply_counters(posts),
+            self.comment_repo.apply_counters(comments)
+        )
@@ -0,0 +1,128 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+
+from app.core.cache import profile_card_cache
+from app.repositories.media_repository import MediaRepository
+from app.repositories.projections import MEDIA_PUBLIC_FIELDS, PROFILE_CARD_FIELDS
+from app.repositories.user_profile_repository import UserProfileRepository
+from app.repositories.user_repository import UserRepository
+
+
+class EntityLoader:
+    """
+    Bộ nạp user / profile / media dùng chung cho 1 request (tạo qua Depends nên mỗi request 1 instance).
+    - Gom id, bỏ id trùng rồi query 1 lần bằng $in
+    - Nhớ kết quả: id đã nạp (hoặc đang nạp dở ở coroutine khác) thì không query lại
+    - Các lần nạp độc lập nhau có thể chạy song song bằng asyncio.gather
+    - Profile chỉ lấy các field của thẻ người dùng, media chỉ lấy type + url (xem app/repositories/projections.py)
+    """
+
+    def __init__(self, user_profile_repo: UserProfileRepository, media_repo: MediaRepository,
+                 user_repo: UserRepository):
+        self.user_profile_repo = user_profile_repo
+        self.media_repo = media_repo
+        self.user_repo = user_repo
+
+        # key là id: value = future trả về dict {id: document} của lô query chứa id đó
+        self._profiles: Dict[ObjectId, asyncio.Future] = {}
+        self._media: Dict[ObjectId, asyncio.Future] = {}
+        self._users: Dict[ObjectId, asyncio.Future] = {}
+
+
+    # Nạp theo lô có nhớ kết quả =======================================================================================
+    @staticmethod
+    async def _load_many(cache: Dict[ObjectId, asyncio.Future], ids: Iterable[Any],
+                         fetch: Callable[[List[ObjectId]], Awaitable[List[Dict[str, Any]]]],
+                         key_field: str) -> Dict[ObjectId, Dict[str, Any]]:
+        unique_ids = list(dict.fromkeys(ObjectId(i) for i in ids if i))
+        missing = [i for i in unique_ids if i not in cache]
+
+        if missing:
+            future = asyncio.get_running_loop().create_future()
+            for i in missing:
+                cache[i] = future
+            try:
+                documents = await fetch(missing)
+            except Exception as e:
+                for i in missing:
+                    cache.pop(i, None)
+                future.set_exception(e)
+                # Đánh dấu đã đọc lỗi để asyncio không cảnh báo khi không có coroutine nào khác chờ
+                future.exception()
+                raise
+            future.set_result({document[key_field]: document for document in documents})
+
+        result = {}
+        for i in unique_ids:
+            batch = await cache[i]
+            if i in batch:
+                result[i] = batch[i]
+        return result
+
+
+    # Profile theo user_id =============================================================================================
+    async def load_profiles(self, user_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, Any]]:
+        return await self._load_many(self._profiles, user_ids,
+                                     lambda ids: self.user_profile_repo.get_public_by_ids(ids, PROFILE_CARD_FIELDS),
+                                     "user_id")
+
+
+    # Media theo id ====================================================================================================
+    async def load_media(self, media_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, Any]]:
+        return await self._load_many(self._media, media_ids,
+                                     lambda ids: self.media_repo.get_by_ids(ids, MEDIA_PUBLIC_FIELDS), "_id")
+
+
+    # User theo id =====================================================================================================
+    async def load_users(self, user_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, Any]]:
+        return await self._load_many(self._users, user_ids, self.user_repo.get_by_ids, "_id")
+
+
+    # Profile kèm media avatar (2 lượt query: profile rồi tới avatar) ==================================================
+    async def load_authors(self, user_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, Any]]:
+        """
+        Trả về {user_id: {"profile": profile, "avatar": media avatar hoặc None}}.
+        """
+        profiles = await self.load_profiles(user_ids)
+        avatars = await self.load_media(profile.get("avatar") for profile in profiles.values())
+
+        authors = {}
+        for user_id, profile in profiles.items():
+            avatar_id = profile.get("avatar")
+            authors[user_id] = {"profile": profile, "avatar": avatars.get(ObjectId(avatar_id)) if avatar_id else None}
+        return authors
+
+
+    # Profile + avatar của 1 user ======================================================================================
+    async def load_author(self, user_id: Any) -> Optional[Dict[str, Any]]:
+        authors = await self.load_authors([user_id])
+        return authors.get(ObjectId(user_id))
+
+
+    # Thẻ người dùng công khai {id, display_name, avatar (url gốc của media, "" nếu không có), version} ================
+    async def load_cards(self, user_ids: Iterable[Any]) -> Dict[ObjectId, Dict[str, str]]:
+        """
+        Đọc từ cache (L1 rồi Redis hash), user nào chưa có mới phải query profile + avatar rồi ghi lại vào cache.
+        """
+        unique_ids = list(dict.fromkeys(ObjectId(i) for i in user_ids if i))
+        cached = await profile_card_cache.get_many(str(i) for i in unique_ids)
+        cards = {ObjectId(key): card for key, card in cached.items()}
+
+        missing = [i for i in unique_ids if i not in cards]
+        if missing:
+            authors = await self.load_authors(missing)
+            fresh = {}
+            for user_id, author in authors.items():
+                avatar = author["avatar"]
+                fresh[str(user_id)] = {
+                    "id": str(user_id),
+                    "display_name": author["profile"].get("display_name") or "",
+                    "avatar": (avatar.get("url") if avatar else None) or "",
+                    "version": str(author["profile"].get("card_version", 0)),
+                }
+            await profile_card_cache.set_many(fresh)
+            cards.update({ObjectId(key): card for key, card in fresh.items()})
+
+        return cards
@@ -0,0 +1,96 @@
+from typing import Optional
+import redis.asyncio as redis
+from loguru import logger
+
+from app.core.config import settings
+from app.exceptions.auth import DangNhapQuaNhieuLan
+
+LOGIN_REJECTED_METRIC_KEY = "metrics:auth:login_rejected"
+
+# Kiểm tra khóa: trả về số giây còn bị khóa (0 = không bị khóa), bị khóa thì tăng luôn metric từ chối
+# KEYS[1] = khóa theo tài khoản, KEYS[2] = khóa theo IP, KEYS[3] = metric
+_CHECK_SCRIPT = """
+local wait = math.max(redis.call('TTL', KEYS[1]), redis.call('TTL', KEYS[2]), 0)
+if wait > 0 then
+    redis.call('INCR', KEYS[3])
+end
+return wait
+"""
+
+# Ghi nhận 1 lần đăng nhập sai cho 1 đối tượng (tài khoản hoặc IP)
+# Đủ số lần sai trong cửa sổ thời gian => khóa, mỗi lần bị khóa lại thời gian khóa tăng gấp đôi
+# KEYS[1] = bộ đếm lần sai, KEYS[2] = số lần đã bị khóa, KEYS[3] = khóa
+# ARGV = max_failures, window, lockout_base, lockout_max, lockout_memory
+_FAILURE_SCRIPT = """
+local failures = redis.call('INCR', KEYS[1])
+if failures == 1 then
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+if failures < tonumber(ARGV[1]) then
+    return 0
+end
+local strikes = redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], tonumber(ARGV[5]))
+local lockout = math.floor(math.min(tonumber(ARGV[3]) * 2 ^ (strikes - 1), tonumber(ARGV[4])))
+redis.call('SET', KEYS[3], 1, 'EX', lockout)
+redis.call('DEL', KEYS[1])
+return lockout
+"""
+
+
+class LoginThrottle:
+    """
+    Chặn dò mật khẩu trước khi phải chạy bcrypt: đếm số lần đăng nhập sai theo tài khoản và theo IP trên Redis.
+    Bị khóa thì request chỉ tốn 1 lệnh Redis rồi bị từ chối, không đụng tới DB hay bcrypt.
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self._check = redis_client.register_script(_CHECK_SCRIPT)
+        self._failure = redis_client.register_script(_FAILURE_SCRIPT)
+
+
+    @staticmethod
+    def _keys(kind: str, value: str) -> tuple[str, str, str]:
+        # Chuẩn hóa để không lách được bộ đếm bằng cách đổi hoa / thường
+        prefix = f"auth:login:{kind}:{value.strip().lower()}"
+        return f"{prefix}:failures", f"{prefix}:strikes", f"{prefix}:lock"
+
+
+    # Kiểm tra trước khi xác thực ======================================================================================
+    async def check(self, email: str, client_ip: Optional[str]) -> None:
+        retry_after = int(await self._check(
+            keys=[self._keys("account", email)[2], self._keys("ip", client_ip or "unknown")[2],
+                  LOGIN_REJECTED_METRIC_KEY]
+        ))
+        if retry_after > 0:
+            logger.warning(f"Từ chối đăng nhập (đang bị khóa {retry_after}s): email={email} ip={client_ip}")
+            raise DangNhapQuaNhieuLan(retry_after)
+
+
+    # Ghi nhận đăng nhập sai (theo cả tài khoản và IP) =================================================================
+    async def record_failure(self, email: str, client_ip: Optional[str]) -> None:
+        memory = settings.LOGIN_LOCKOUT_MAX_SECONDS * 2
+        async with self.redis_client.pipeline(transaction=False) as pipe:
+            await self._failure(
+                keys=list(self._keys("account", email)),
+                args=[settings.LOGIN_MAX_FAILURES_PER_ACCOUNT, settings.LOGIN_FAILURE_WINDOW_SECONDS,
+                      settings.LOGIN_LOCKOUT_BASE_SECONDS, settings.LOGIN_LOCKOUT_MAX_SECONDS, memory],
+                client=pipe
+            )
+            await self._failure(
+                keys=list(self._keys("ip", client_ip or "unknown")),
+                args=[settings.LOGIN_MAX_FAILURES_PER_IP, settings.LOGIN_FAILURE_WINDOW_SECONDS,
+                      settings.LOGIN_LOCKOUT_BASE_SECONDS, settings.LOGIN_LOCKOUT_MAX_SECONDS, memory],
+                client=pipe
+            )
+            account_lockout, ip_lockout = await pipe.execute()
+
+        if account_lockout or ip_lockout:
+            logger.warning(f"Khóa đăng nhập: email={email} ({account_lockout}s), ip={client_ip} ({ip_lockout}s)")
+
+
+    # Đăng nhập đúng thì xóa bộ đếm của tài khoản ======================================================================
+    async def record_success(self, email: str) -> None:
+        failures_key, strikes_key, _ = self._keys("account", email)
+        await self.redis_client.delete(failures_key, strikes_key)
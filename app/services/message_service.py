@@ -1,14 +1,17 @@
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+from bson import ObjectId
 from fastapi.encoders import jsonable_encoder
 
 from app.core.websocket import manager, CHAT_CHANNEL
-from app.exceptions.post import ForbiddenError
+from app.exceptions.post import ForbiddenError, InvalidCursorError, NotFoundError
 from app.repositories.conversation_repository import ConversationRepository
 from app.repositories.message_repository import MessageRepository
+from app.repositories.projections import CONVERSATION_PARTICIPANTS_FIELDS, MESSAGE_PUBLIC_FIELDS
 from app.schemas.posts import PaginationInfo
 from app.services.conversation_service import ConversationService
 from app.schemas.message import MessageCreate, MessageResponse, PaginatedMessagesResponse
+from app.utils.ndjson import stream_page
 
 
 class MessageService:
@@ -32,7 +35,7 @@ class MessageService:
 
         response_msg = MessageResponse(**msg)
 
-        conversation = await self.conversation_repo.get_by_id(conversation_id)
+        conversation = await self.conversation_repo.get_by_id(conversation_id, CONVERSATION_PARTICIPANTS_FIELDS)
 
         # 3. Gửi Realtime
         payload = {
@@ -61,7 +64,8 @@ class MessageService:
         messages = await self.message_repo.get_by_conversation(
             conversation_id=conversation_id,
             cursor=cursor,
-            limit=limit + 1
+            limit=limit + 1,
+            projection=MESSAGE_PUBLIC_FIELDS
         )
 
         has_more = len(messages) > limit
@@ -70,9 +74,7 @@ class MessageService:
 
         next_cursor = str(messages[-1]["_id"]) if messages else None
 
-        responses = []
-        for message in messages:
-            responses.append(MessageResponse(**message))
+        responses = await self._build_messages(messages)
 
         return PaginatedMessagesResponse(
             data=responses,
@@ -83,9 +85,30 @@ class MessageService:
             )
         )
 
+    # Stream tin nhắn dạng NDJSON ======================================================================================
+    def stream_messages(self, conversation_id: str, cursor: Optional[str] = None, limit: int = 20) -> AsyncIterator[bytes]:
+        if not ObjectId.is_valid(conversation_id):
+            raise NotFoundError()
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
+
+        documents = self.message_repo.iter_by_conversation(
+            conversation_id=conversation_id,
+            cursor=cursor,
+            limit=limit + 1,
+            projection=MESSAGE_PUBLIC_FIELDS
+        )
+        return stream_page(documents, limit, self._build_messages)
+
+
+    @staticmethod
+    async def _build_messages(messages: List[Dict[str, Any]]) -> List[MessageResponse]:
+        return [MessageResponse(**message) for message in messages]
+
+
     async def delete_message(self, conversation_id: str, message_id: str, user_id: str) -> bool:
         # 1. Lấy thông tin tin nhắn
-        message = await self.message_repo.get_by_id(message_id)
+        message = await self.message_repo.get_by_id(message_id, MESSAGE_PUBLIC_FIELDS)
         if not message:
             return False
 
@@ -100,7 +123,7 @@ class MessageService:
         # 4. Thực hiện xóa
         deleted = await self.message_repo.delete(message_id)
 
-        conversation = await self.conversation_repo.get_by_id(conversation_id)
+        conversation = await self.conversation_repo.get_by_id(conversation_id, CONVERSATION_PARTICIPANTS_FIELDS)
 
         if conversation and "participants" in conversation:
             payload = {
@@ -1,33 +1,56 @@
+import asyncio
 import datetime
+import unicodedata
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
 from fastapi import UploadFile
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple
 
-from app.exceptions.post import NotFoundError, ForbiddenError
+from app.exceptions.post import NotFoundError, ForbiddenError, InvalidCursorError
 
 from app.core.config import settings
+from app.core.feed_cache import feed_cache
+from app.core.search_cache import search_cache
+from app.core.trending import trending_tags
+from app.core.view_counter import post_views
 
 from app.repositories.media_repository import MediaRepository
 from app.repositories.posts_repository import PostRepository
+from app.repositories.projections import MEDIA_PUBLIC_FIELDS, POST_OWNER_FIELDS, POST_PUBLIC_FIELDS, \
+    POST_RANKED_FIELDS, POST_VALIDATOR_FIELDS, PROFILE_CARD_FIELDS
 from app.repositories.user_profile_repository import UserProfileRepository
 
 from app.schemas.posts import PostCreate, PostCreateResponse, MediaPublic, \
-    PostsListResponse, UserPublic, PaginatedPostsResponse, PaginationInfo, PostDetailResponse, PostUpdate
+    PostsListResponse, UserPublic, PaginatedPostsResponse, PaginationInfo, PostDetailResponse, PostUpdate, TrendingTag
 
+from app.services.author_snapshot_service import AuthorSnapshotService, snapshot_from_card
+from app.services.entity_loader import EntityLoader
 from app.services.media_service import MediaService
+from app.services.post_tag_service import PostTagService
+from app.utils.etag import make_etag
+from app.utils.hashtags import mention_key, normalize_tag, tag_key
+from app.utils.media import build_media_url
+from app.utils.ndjson import stream_page
+from app.utils.ranking import hot_score
 
 
 class PostService:
     def __init__(self, post_repo: PostRepository,
                  media_service: MediaService,
                  user_profile_repo: UserProfileRepository,
-                 media_repo: MediaRepository):
+                 media_repo: MediaRepository,
+                 entity_loader: EntityLoader,
+                 post_tag_service: PostTagService,
+                 author_snapshot_service: AuthorSnapshotService):
 
         self.post_repo = post_repo
         self.media_service = media_service
         self.user_profile_repo = user_profile_repo
         self.media_repo = media_repo
+        self.entity_loader = entity_loader
+        self.post_tag_service = post_tag_service
+        self.author_snapshot_service = author_snapshot_service
 
     # Logic lấy danh sách bài viết và phân trang =======================================================================
     async def get_all_posts(
@@ -37,7 +60,7 @@ class PostService:
     ) -> PaginatedPostsResponse:
 
         # 1. Lấy danh sách bài viết
-        posts = await self.post_repo.get_all_posts(cursor=cursor, limit=limit + 1)
+        posts = await self.post_repo.get_all_posts(cursor=cursor, limit=limit + 1, projection=POST_PUBLIC_FIELDS)
 
         # Check xem còn bài nữa không
         has_more = len(posts) > limit
@@ -46,72 +69,224 @@ class PostService:
 
         next_cursor = str(posts[-1]["_id"]) if posts else None
 
-        # 2. Gom danh sách id tác giả để query 1 lần
-        author_ids = set()
-        for p in posts:
-            author_ids.add(p["user_id"])
-
-        # 3. Lấy thông tin user và gom id avatar
-        users = await self.user_profile_repo.get_public_by_ids(author_ids)
-        avatar_ids = [user.get("avatar") for user in users if user.get("avatar")]
-
-        # 4. Lấy thông tin media cho các avatar
-        avatars = await self.media_repo.get_by_ids(avatar_ids)
-        # avatar_map = {str(avatar["_id"]): avatar["url"] for avatar in avatars}
-        avatar_map = {}
-        for avatar in avatars:
-            key = str(avatar["_id"])
-            value = avatar["url"]
-            if value and not value.startswith("http"):
-                value = f"{settings.SERVER_BASE_URL}/{value.lstrip('/')}"
-            avatar_map[key] = value
-
-        # 5. Map thông tin user kèm url avatar
-        user_map = {}
-        for user in users:
-            user_id = user["user_id"]
-            avatar_id = user.get("avatar")
-            public_user = UserPublic(
-                id=user_id,
-                display_name=user["display_name"],
-                avatar=avatar_map.get(str(avatar_id)) if avatar_id else None,
+        # 2. Gắn tác giả và media cho bài viết
+        responses = await self._build_post_responses(posts)
+
+        # 3. Trả về kèm pagination info
+        return PaginatedPostsResponse(
+            data=responses,
+            pagination=PaginationInfo(
+                next_cursor=next_cursor,
+                has_more=has_more,
+                limit=limit
             )
-            user_map[user_id] = public_user
+        )
 
-        # 6. Gom danh sách id của media trong bài viết
-        media_ids = []
-        for post in posts:
-            for media in post.get("media_ids", []):
-                media_ids.append(media)
-
-        # 5. Lấy thông tin media
-        medias = await self.media_repo.get_by_ids(media_ids)
-
-        # 6. Map media
-        media_map = {}
-        for media in medias:
-            media_id = media["_id"]
-            url = media["url"]
-            if url and not url.startswith("http"):
-                url = f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
-
-            public_media = MediaPublic(
-                id=media_id,
-                type=media["type"],
-                url=url
+    # Feed công khai dạng JSON (N trang đầu lấy từ cache) ==============================================================
+    async def get_feed_json(self, cursor: Optional[str] = None, limit: int = 5, viewer: Optional[str] = None) -> str:
+        # Cursor sai thì báo lỗi ngay, không đi qua cache
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
+
+        async def build():
+            page = await self.get_all_posts(cursor=cursor, limit=limit)
+            next_cursor = page.pagination.next_cursor if page.pagination.has_more else None
+            return page.model_dump_json(by_alias=True), next_cursor, [str(post.id) for post in page.data]
+
+        # Id bài viết của trang được cache cạnh JSON => ghi lượt xem không phải parse lại trang
+        payload, post_ids = await feed_cache.get_or_build(cursor, limit, build)
+        await self.record_views(viewer, post_ids)
+        return payload
+
+    # Feed xếp theo điểm hot (sort=top): điểm được cập nhật dần theo tương tác, đọc thẳng theo index ===================
+    async def get_top_posts(self, cursor: Optional[str] = None, limit: int = 5,
+                            viewer: Optional[str] = None) -> PaginatedPostsResponse:
+        after = self._decode_score_cursor(cursor) if cursor else None
+        posts = await self.post_repo.get_top_posts(after=after, limit=limit + 1, projection=POST_RANKED_FIELDS)
+
+        has_more = len(posts) > limit
+        if has_more:
+            posts = posts[:limit]
+
+        next_cursor = self._encode_score_cursor(posts[-1]["hot_score"], posts[-1]["_id"]) if posts else None
+
+        responses = await self._build_post_responses(posts)
+        await self.record_views(viewer, [post["_id"] for post in posts])
+
+        return PaginatedPostsResponse(
+            data=responses,
+            pagination=PaginationInfo(
+                next_cursor=next_cursor,
+                has_more=has_more,
+                limit=limit
+            )
+        )
+
+    def stream_top_posts(self, cursor: Optional[str] = None, limit: int = 5,
+                         viewer: Optional[str] = None) -> AsyncIterator[bytes]:
+        after = self._decode_score_cursor(cursor) if cursor else None
+        documents = self.post_repo.iter_top_posts(after=after, limit=limit + 1, projection=POST_RANKED_FIELDS)
+        return stream_page(documents, limit, self._build_post_responses,
+                           cursor_of=lambda post: self._encode_score_cursor(post["hot_score"], post["_id"]),
+                           on_page=lambda post_ids: self.record_views(viewer, post_ids))
+
+    # Stream danh sách bài viết dạng NDJSON (gắn tác giả / media theo từng lô nhỏ) =====================================
+    def stream_all_posts(self, cursor: Optional[str] = None, limit: int = 5,
+                         viewer: Optional[str] = None) -> AsyncIterator[bytes]:
+        # Stream chỉ báo lỗi được trước khi gửi header 200 => kiểm tra cursor / id ngay, không đợi generator chạy
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
+
+        documents = self.post_repo.iter_all_posts(cursor=cursor, limit=limit + 1, projection=POST_PUBLIC_FIELDS)
+        return stream_page(documents, limit, self._build_post_responses,
+                           on_page=lambda post_ids: self.record_views(viewer, post_ids))
+
+    # Ghi nhận lượt xem cho cả trang bài viết (1 round trip Redis, số người xem ghi xuống Mongo định kỳ) ===============
+    async def record_views(self, viewer: Optional[str], post_ids: List[Any]) -> None:
+        if viewer and post_ids:
+            await post_views.record(viewer, post_ids)
+
+    # Tìm kiếm bài viết công khai theo nội dung (kết quả cache ngắn theo câu truy vấn đã chuẩn hóa) ====================
+    async def search_posts_json(self, query: str, cursor: Optional[str] = None, limit: int = 5) -> str:
+        normalized = self._normalize_query(query)
+        # Cursor sai thì báo lỗi ngay, không đi qua cache
+        after = self._decode_score_cursor(cursor) if cursor else None
+
+        async def build():
+            page = await self.search_posts(normalized, after=after, limit=limit)
+            return page.model_dump_json(by_alias=True)
+
+        if not normalized:
+            return await build()
+        return await search_cache.get_or_build(normalized, cursor, limit, build)
+
+    async def search_posts(
+            self,
+            query: str,
+            after: Optional[Tuple[float, ObjectId]] = None,
+            limit: int = 5
+    ) -> PaginatedPostsResponse:
+
+        # 1. Lấy bài viết theo độ liên quan (lấy dư 1 bài để biết còn trang sau không)
+        posts = []
+        if query:
+            posts = await self.post_repo.search_public_posts(query, after=after, limit=limit + 1,
+                                                             projection=POST_PUBLIC_FIELDS)
+
+        has_more = len(posts) > limit
+        if has_more:
+            posts = posts[:limit]
+
+        next_cursor = self._encode_score_cursor(posts[-1]["score"], posts[-1]["_id"]) if posts else None
+
+        # 2. Gắn tác giả và media giống feed
+        responses = await self._build_post_responses(posts)
+
+        return PaginatedPostsResponse(
+            data=responses,
+            pagination=PaginationInfo(
+                next_cursor=next_cursor,
+                has_more=has_more,
+                limit=limit
+            )
+        )
+
+    # Chuẩn hóa câu tìm kiếm: "Xin  Chào " và "xin chào" dùng chung 1 kết quả cache ====================================
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(unicodedata.normalize("NFC", query).lower().split())
+
+    # Cursor theo điểm (tìm kiếm, sort=top) = "<score>_<post_id>" (repr của float để so sánh bằng chính xác) ===========
+    @staticmethod
+    def _encode_score_cursor(score: float, post_id: ObjectId) -> str:
+        return f"{score!r}_{post_id}"
+
+    @staticmethod
+    def _decode_score_cursor(cursor: str) -> Tuple[float, ObjectId]:
+        try:
+            score, post_id = cursor.rsplit("_", 1)
+            return float(score), ObjectId(post_id)
+        except (ValueError, InvalidId):
+            raise InvalidCursorError()
+
+    # Hashtag thịnh hành (đọc top K đã gộp sẵn trên Redis) =============================================================
+    async def get_trending_tags(self, limit: int = 10) -> List[TrendingTag]:
+        return [TrendingTag(tag=tag, score=round(score, 3)) for tag, score in await trending_tags.get_top(limit)]
+
+    # Bài viết gắn hashtag / nhắc tới 1 user (đọc từ chỉ mục post_tags, không quét nội dung bài viết) ==================
+    async def get_tag_posts(self, tag: str, cursor: Optional[str] = None, limit: int = 5) -> PaginatedPostsResponse:
+        normalized = normalize_tag(tag)
+        if not normalized:
+            return await self._get_indexed_posts(None, cursor, limit)
+        return await self._get_indexed_posts(tag_key(normalized), cursor, limit)
+
+    async def get_mention_posts(self, user_id: str, cursor: Optional[str] = None,
+                                limit: int = 5) -> PaginatedPostsResponse:
+        return await self._get_indexed_posts(mention_key(user_id), cursor, limit)
+
+    async def _get_indexed_posts(self, key: Optional[str], cursor: Optional[str],
+                                 limit: int) -> PaginatedPostsResponse:
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
+
+        # 1. Lấy 1 trang id bài viết từ chỉ mục (cursor là _id của bản ghi chỉ mục)
+        entries = await self.post_tag_service.get_post_entries(key, cursor=cursor, limit=limit + 1) if key else []
+
+        has_more = len(entries) > limit
+        if has_more:
+            entries = entries[:limit]
+
+        next_cursor = str(entries[-1]["_id"]) if entries else None
+
+        # 2. Lấy bài viết theo lô, giữ thứ tự của chỉ mục (bài vừa bị xóa / chuyển riêng tư thì bỏ qua)
+        posts = await self.post_repo.get_by_ids([entry["post_id"] for entry in entries], POST_PUBLIC_FIELDS)
+        post_map = {post["_id"]: post for post in posts if post["privacy"] == "public"}
+        posts = [post_map[entry["post_id"]] for entry in entries if entry["post_id"] in post_map]
+
+        # 3. Gắn tác giả và media giống feed
+        responses = await self._build_post_responses(posts)
+
+        return PaginatedPostsResponse(
+            data=responses,
+            pagination=PaginationInfo(
+                next_cursor=next_cursor,
+                has_more=has_more,
+                limit=limit
             )
-            media_map[media_id] = public_media
+        )
+
+    # Gắn thông tin tác giả và media cho danh sách bài viết ============================================================
+    async def _build_post_responses(self, posts: List[Dict[str, Any]]) -> List[PostsListResponse]:
+        # Bài viết đã lưu sẵn thông tin tác giả thì không cần tra profile, chỉ bài cũ mới phải lấy thẻ tác giả
+        author_ids = [post["user_id"] for post in posts if not post.get("author")]
+        media_ids = [media_id for post in posts for media_id in post.get("media_ids", [])]
+
+        # Thẻ tác giả và media bài viết lấy song song
+        cards, media_map = await asyncio.gather(
+            self.entity_loader.load_cards(author_ids),
+            self.entity_loader.load_media(media_ids)
+        )
 
-        # 7. Tạo response
         responses = []
         for post in posts:
-            author = user_map.get(post["user_id"])
+            author = None
+            snapshot = post.get("author") or snapshot_from_card(cards.get(post["user_id"]))
+            if snapshot:
+                author = UserPublic(
+                    id=post["user_id"],
+                    display_name=snapshot["display_name"],
+                    avatar=build_media_url(snapshot["avatar"]) or None,
+                )
 
             post_medias = []
             for media_id in post.get("media_ids", []):
                 media = media_map.get(media_id)
                 if media:
-                    post_medias.append(media)
+                    post_medias.append(MediaPublic(
+                        id=media["_id"],
+                        type=media["type"],
+                        url=build_media_url(media["url"])
+                    ))
 
             responses.append(PostsListResponse(
                 _id=post["_id"],
@@ -119,35 +294,43 @@ class PostService:
                 media=post_medias,
                 author=author,
                 privacy=post["privacy"],
+                comments_count=post.get("comments_count", 0),
+                reactions_count=post.get("reactions_count", 0),
+                reactions=post.get("reactions") or {},
+                views=post.get("views", 0),
                 created_at=post["created_at"]
             ))
+        return responses
 
-        # 8. Trả về kèm pagination info
-        return PaginatedPostsResponse(
-            data=responses,
-            pagination=PaginationInfo(
-                next_cursor=next_cursor,
-                has_more=has_more,
-                limit=limit
-            )
-        )
+    # ETag của chi tiết bài viết (1 query nhỏ + thẻ tác giả trong cache, không build response) =========================
+    async def get_post_etag(self, post_id: str) -> Optional[str]:
+        post = await self.post_repo.get_by_id(post_id, POST_VALIDATOR_FIELDS)
+        if not post:
+            return None
+
+        # Chi tiết bài viết đọc tên / avatar mới nhất của tác giả => đổi avatar (card version tăng) thì ETag đổi
+        # Số bình luận / cảm xúc / lượt xem được ghi dồn định kỳ => ETag đổi khi số đếm được ghi xuống
+        cards = await self.entity_loader.load_cards([post["user_id"]])
+        card = cards.get(post["user_id"])
+        return make_etag("post", post_id, post.get("updated_at"), card["version"] if card else None,
+                         post.get("comments_count", 0), post.get("reactions_count", 0), post.get("views", 0))
 
     # Logic xem chi tiết 1 bài viết ====================================================================================
     async def get_detail_post(self, post_id: str) -> PostDetailResponse:
 
         # 1. Lấy bài viết
-        post = await self.post_repo.get_by_id(post_id)
+        post = await self.post_repo.get_by_id(post_id, POST_PUBLIC_FIELDS)
         if not post:
             raise NotFoundError()
 
         # 2. Lấy thông tin của tác giả
-        author = await self.user_profile_repo.get_by_user_id(post["user_id"])
+        author = await self.user_profile_repo.get_by_user_id(post["user_id"], PROFILE_CARD_FIELDS)
 
         # 3. Lấy avatar
         avatar_url = None
         avatar_id = author.get("avatar")
         if avatar_id:
-            avatar_media = await self.media_repo.get_by_id(avatar_id)
+            avatar_media = await self.media_repo.get_by_id(avatar_id, MEDIA_PUBLIC_FIELDS)
             if avatar_media:
                 avatar_url = avatar_media["url"]
                 if avatar_url and not avatar_url.startswith("http"):
@@ -161,7 +344,7 @@ class PostService:
         media_items = []
         media_ids = post.get("media_ids", [])
         if media_ids:
-            medias = await self.media_repo.get_by_ids(media_ids)
+            medias = await self.media_repo.get_by_ids(media_ids, MEDIA_PUBLIC_FIELDS)
             if medias:
                 for media in medias:
                     url = media["url"]
@@ -178,6 +361,10 @@ class PostService:
             media=media_items,
             author=author,
             privacy=post["privacy"],
+            comments_count=post.get("comments_count", 0),
+            reactions_count=post.get("reactions_count", 0),
+            reactions=post.get("reactions") or {},
+            views=post.get("views", 0),
             created_at=post["created_at"],
         )
 
@@ -200,16 +387,26 @@ class PostService:
         else:
             post_dict["media_ids"] = []
 
+        # Lưu kèm thông tin tác giả để lúc đọc feed không phải tra profile
+        # Đọc thẳng Mongo (không qua cache thẻ): bản chụp cũ sẽ không được refresh sửa lại vì mang version cũ
+        author_snapshot = await self.author_snapshot_service.build_snapshot(ObjectId(user_id))
+
         # Add fields hệ thống
+        created_at = datetime.utcnow()
         post_dict.update({
             "user_id": ObjectId(user_id),
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow(),
+            "author": author_snapshot,
+            "hot_score": hot_score(0, created_at),
+            "created_at": created_at,
+            "updated_at": created_at,
             "deleted_at": None
         })
 
         # Save post
         post = await self.post_repo.create(post_dict)
+        await self.post_tag_service.sync_source(post["_id"], post["_id"], post["content"],
+                                                public=post["privacy"] == "public", is_new=True)
+        await feed_cache.invalidate()
 
         media_public = [
             MediaPublic(id=m.id, type=m.type, url=m.url, )
@@ -237,7 +434,7 @@ class PostService:
     ) -> PostCreateResponse:
 
         # 1. Lấy thông tin bài viết hiện tại
-        post = await self.post_repo.get_by_id(post_id)
+        post = await self.post_repo.get_by_id(post_id, POST_OWNER_FIELDS)
         if not post:
             raise NotFoundError()
 
@@ -276,10 +473,18 @@ class PostService:
         # 5. Thực hiện update
         post = await self.post_repo.update(update_data, post_id)
 
+        # Cập nhật chỉ mục hashtag / mention (chỉ phần thay đổi)
+        public = post["privacy"] == "public"
+        if privacy is not None:
+            await self.post_tag_service.set_public(post_id, public)
+        if content is not None:
+            await self.post_tag_service.sync_source(post_id, post_id, content, public=public)
+        await feed_cache.invalidate()
+
         # 6. Lấy thông tin media đầy đủ để trả về
         media_public = []
         if final_media_ids:
-            medias = await self.media_repo.get_by_ids(final_media_ids)
+            medias = await self.media_repo.get_by_ids(final_media_ids, MEDIA_PUBLIC_FIELDS)
             for m in medias:
                 url = m["url"]
                 if url and not url.startswith("http"):
@@ -300,7 +505,7 @@ class PostService:
     # Logic delete post ================================================================================================
     async def delete_post(self, post_id: str, user_id: str) -> bool:
 
-        post = await self.post_repo.get_by_id(post_id)
+        post = await self.post_repo.get_by_id(post_id, POST_OWNER_FIELDS)
         if not post:
             raise NotFoundError()
 
@@ -309,10 +514,13 @@ class PostService:
 
         media_ids = post.get("media_ids", [])
         if media_ids:
-            medias = await self.media_repo.get_by_ids(media_ids)
+            medias = await self.media_repo.get_by_ids(media_ids, MEDIA_PUBLIC_FIELDS)
             delete_media = await self.media_repo.delete_many(media_ids)
 
         delete_post = await self.post_repo.delete(post_id)
+        await self.post_tag_service.remove_post(post_id)
+        await post_views.forget(post_id)
+        await feed_cache.invalidate()
         return True
 
     async def get_user_posts(
@@ -323,18 +531,13 @@ class PostService:
             limit: int = 5
     ) -> PaginatedPostsResponse:
 
-        # Logic phân quyền riêng tư
-        if str(current_user_id) == str(user_id):
-            privacy_filter = None  # Chính chủ: Lấy tất cả (Public, Friends, Private)
-        else:
-            privacy_filter = ["public"]  # Người khác: Chỉ lấy bài Public
-
         # 1. Lấy danh sách bài viết từ repo
         posts = await self.post_repo.get_posts_by_user(
             user_id=user_id,
-            privacy_filter=privacy_filter,
+            privacy_filter=self._privacy_filter(user_id, current_user_id),
             cursor=cursor,
-            limit=limit + 1
+            limit=limit + 1,
+            projection=POST_PUBLIC_FIELDS
         )
 
         # Check xem còn bài nữa không
@@ -344,90 +547,10 @@ class PostService:
 
         next_cursor = str(posts[-1]["_id"]) if posts else None
 
-        # 2. Gom danh sách id tác giả để query 1 lần
-        author_ids = set()
-        for p in posts:
-            author_ids.add(p["user_id"])
-
-        # 3. Lấy thông tin user và gom id avatar
-        users = await self.user_profile_repo.get_public_by_ids(author_ids)
-        print(f"user: {users}")
-        avatar_ids = [user.get("avatar") for user in users if user.get("avatar")]
-        print(f"test {avatar_ids}")
-
-        # 4. Lấy thông tin media cho các avatar
-        avatars = await self.media_repo.get_by_ids(avatar_ids)
-        print(f"avatar: {avatars}")
-        avatar_map = {}
-        for avatar in avatars:
-            key = str(avatar["_id"])
-            value = avatar["url"]
-            if value and not value.startswith("http"):
-                value = f"{settings.SERVER_BASE_URL}/{value.lstrip('/')}"
-            avatar_map[key] = value
-        print(f"avatar {avatar_map}")
-
-        # 5. Map thông tin user kèm url avatar
-        user_map = {}
-        for user in users:
-            uid = user["user_id"]
-            avatar_id = user.get("avatar")
-            public_user = UserPublic(
-                id=uid,
-                display_name=user["display_name"],
-                avatar=avatar_map.get(str(avatar_id)) if avatar_id else None,
-            )
-            user_map[uid] = public_user
-        print(f"usermap {user_map}")
-
-        # 6. Gom danh sách id của media trong bài viết
-        media_ids = []
-        for post in posts:
-            for media in post.get("media_ids", []):
-                media_ids.append(media)
-
-        # 7. Lấy thông tin media
-        medias = await self.media_repo.get_by_ids(media_ids)
-        print(f"media {medias}")
-
-        # 8. Map media
-        media_map = {}
-        for media in medias:
-            media_id = media["_id"]
-            url = media["url"]
-            if url and not url.startswith("http"):
-                url = f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
-
-            public_media = MediaPublic(
-                id=media_id,
-                type=media["type"],
-                url=url
-            )
-            media_map[media_id] = public_media
-
-        # 9. Tạo response
-        responses = []
-        for post in posts:
-            author = user_map.get(post["user_id"])
-            print(f"author: {author}")
-
-            post_medias = []
-            for media_id in post.get("media_ids", []):
-                media = media_map.get(media_id)
-                if media:
-                    post_medias.append(media)
-            print(f"ảnh {post_medias}")
-
-            responses.append(PostsListResponse(
-                _id=post["_id"],
-                content=post["content"],
-                media=post_medias,
-                author=author,
-                privacy=post["privacy"],
-                created_at=post["created_at"]
-            ))
+        # 2. Gắn tác giả và media cho bài viết
+        responses = await self._build_post_responses(posts)
 
-        # 10. Trả về kèm pagination info
+        # 3. Trả về kèm pagination info
         return PaginatedPostsResponse(
             data=responses,
             pagination=PaginationInfo(
@@ -437,5 +560,31 @@ class PostService:
             )
         )
 
+    # Stream bài viết của 1 user dạng NDJSON ===========================================================================
+    def stream_user_posts(
+            self,
+            user_id: str,
+            current_user_id: str,
+            cursor: Optional[str] = None,
+            limit: int = 5
+    ) -> AsyncIterator[bytes]:
+        if not ObjectId.is_valid(user_id):
+            raise NotFoundError()
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
 
+        documents = self.post_repo.iter_posts_by_user(
+            user_id=user_id,
+            privacy_filter=self._privacy_filter(user_id, current_user_id),
+            cursor=cursor,
+            limit=limit + 1,
+            projection=POST_PUBLIC_FIELDS
+        )
+        return stream_page(documents, limit, self._build_post_responses)
 
+    # Logic phân quyền riêng tư ========================================================================================
+    @staticmethod
+    def _privacy_filter(user_id: str, current_user_id: str) -> Optional[List[str]]:
+        if str(current_user_id) == str(user_id):
+            return None  # Chính chủ: Lấy tất cả (Public, Friends, Private)
+        return ["public"]  # Người khác: Chỉ lấy bài Public
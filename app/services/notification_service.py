@@ -2,14 +2,17 @@ import asyncio
 import json
 import logging
 from datetime import datetime
-from typing import AsyncGenerator, Dict, Any
+from typing import AsyncGenerator, AsyncIterator, Dict, Any, List
 
+from bson import ObjectId
 from fastapi import Request
 
 from app.core.websocket import manager, NOTIFICATION_CHANNEL
+from app.exceptions.post import InvalidCursorError
 from app.repositories.notification_repository import NotificationRepository
 from app.schemas.notification import Notification, NotificationCreate, NotificationResponse
 from app.schemas.posts import UserPublic
+from app.utils.ndjson import stream_page
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +74,20 @@ class NotificationService:
             limit=limit,
             cursor=cursor
         )
+        return await self._build_notifications(notifications_data)
+
+
+    # Stream danh sách thông báo dạng NDJSON ===========================================================================
+    def stream_notifications_for_user(self, user_id: str, limit: int, cursor: str | None) -> AsyncIterator[bytes]:
+        if cursor and not ObjectId.is_valid(cursor):
+            raise InvalidCursorError()
+
+        documents = self.notification_repo.iter_by_recipient(recipient_id=user_id, limit=limit + 1, cursor=cursor)
+        return stream_page(documents, limit, self._build_notifications)
+
+
+    @staticmethod
+    async def _build_notifications(notifications_data: List[Dict[str, Any]]) -> list[Notification]:
         notifications: list[Notification] = []
 
         for notification_doc in notifications_data:
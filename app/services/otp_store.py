@@ -0,0 +1,93 @@
+import secrets
+from typing import Optional
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.exceptions.auth import OTPKhongTonTai, OTPKhongChinhXac, OTPQuaNhieuLan
+
+
+# Cấp OTP: còn cooldown thì trả về số giây phải chờ, ngược lại ghi đè OTP cũ (hash code/attempts) + đặt cooldown
+# KEYS[1] = key OTP, KEYS[2] = key cooldown | ARGV = code, ttl, cooldown
+_ISSUE_SCRIPT = """
+local wait = redis.call('TTL', KEYS[2])
+if wait > 0 then
+    return wait
+end
+redis.call('DEL', KEYS[1])
+redis.call('HSET', KEYS[1], 'code', ARGV[1], 'attempts', 0)
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+redis.call('SET', KEYS[2], 1, 'EX', tonumber(ARGV[3]))
+return 0
+"""
+
+# Xác minh OTP: đúng thì xóa luôn (chỉ dùng được 1 lần), sai thì tăng số lần thử, quá giới hạn thì hủy OTP
+# KEYS[1] = key OTP | ARGV = code, max_attempts
+# Trả về: 1 = đúng, 0 = sai, -1 = không tồn tại / hết hạn, -2 = sai quá số lần cho phép
+_VERIFY_SCRIPT = """
+if redis.call('TYPE', KEYS[1]).ok ~= 'hash' then
+    return -1
+end
+if redis.call('HGET', KEYS[1], 'code') == ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 1
+end
+local attempts = redis.call('HINCRBY', KEYS[1], 'attempts', 1)
+if attempts >= tonumber(ARGV[2]) then
+    redis.call('DEL', KEYS[1])
+    return -2
+end
+return 0
+"""
+
+
+class OTPStore:
+    """
+    Lưu OTP trên Redis, mỗi lần cấp / xác minh chỉ tốn 1 round trip (Lua script chạy atomic phía Redis).
+    purpose: "email" (xác minh email) hoặc "forgot-password" (khôi phục mật khẩu).
+    """
+
+    def __init__(self, redis_client: redis.Redis):
+        self.redis_client = redis_client
+        self._issue = redis_client.register_script(_ISSUE_SCRIPT)
+        self._verify = redis_client.register_script(_VERIFY_SCRIPT)
+
+
+    @staticmethod
+    def _key(purpose: str, email: str) -> str:
+        return f"auth:otp:{purpose}:{email}"
+
+
+    @staticmethod
+    def generate_code() -> str:
+        return f"{secrets.randbelow(1_000_000):06d}"
+
+
+    # Cấp OTP mới ======================================================================================================
+    async def issue(self, purpose: str, email: str) -> tuple[Optional[str], int]:
+        """
+        Trả về (otp_code, 0) nếu cấp thành công, (None, số giây phải chờ) nếu đang trong thời gian cooldown.
+        """
+        otp_code = self.generate_code()
+        key = self._key(purpose, email)
+        retry_after = await self._issue(
+            keys=[key, f"{key}:cooldown"],
+            args=[otp_code, settings.OTP_TTL_SECONDS, settings.OTP_RESEND_COOLDOWN_SECONDS]
+        )
+        if int(retry_after) > 0:
+            return None, int(retry_after)
+        return otp_code, 0
+
+
+    # Xác minh OTP (đúng thì OTP bị xóa) ===============================================================================
+    async def verify(self, purpose: str, email: str, otp: str) -> None:
+        result = int(await self._verify(
+            keys=[self._key(purpose, email)],
+            args=[otp, settings.OTP_MAX_ATTEMPTS]
+        ))
+        if result == 1:
+            return
+        if result == -1:
+            raise OTPKhongTonTai()
+        if result == -2:
+            raise OTPQuaNhieuLan()
+        raise OTPKhongChinhXac()
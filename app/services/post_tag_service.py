@@ -0,0 +1,46 @@
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+
+from app.core.trending import trending_tags
+from app.repositories.post_tag_repository import PostTagRepository
+from app.utils.hashtags import extract_index_keys
+
+
+class PostTagService:
+    """
+    Cập nhật chỉ mục hashtag / mention lúc ghi (tạo / sửa / xóa bài viết, tạo bình luận).
+    Chỉ ghi phần thay đổi: so key đang có của nguồn với key tách từ nội dung mới.
+    """
+
+    def __init__(self, post_tag_repo: PostTagRepository):
+        self.post_tag_repo = post_tag_repo
+
+    # Đồng bộ key của 1 nguồn (bài viết hoặc bình luận) theo nội dung hiện tại =========================================
+    async def sync_source(self, post_id: Any, source_id: Any, content: Optional[str], public: bool,
+                          is_new: bool = False) -> None:
+        post_id, source_id = ObjectId(post_id), ObjectId(source_id)
+        keys = extract_index_keys(content)
+
+        # Bài viết / bình luận công khai mới tạo => đếm hashtag cho bảng thịnh hành (chỉ cộng trong bộ nhớ)
+        if is_new and public:
+            trending_tags.record(key[1:] for key in keys if key.startswith("#"))
+
+        # Nguồn mới tạo thì chưa có key nào, không cần đọc lại chỉ mục
+        current = [] if is_new else await self.post_tag_repo.get_keys(post_id, source_id)
+
+        added = [key for key in keys if key not in current]
+        removed = [key for key in current if key not in keys]
+        await self.post_tag_repo.add(post_id, source_id, added, public)
+        await self.post_tag_repo.remove(post_id, source_id, removed)
+
+    async def set_public(self, post_id: Any, public: bool) -> None:
+        await self.post_tag_repo.set_public(ObjectId(post_id), public)
+
+    async def remove_post(self, post_id: Any) -> None:
+        await self.post_tag_repo.delete_by_post(ObjectId(post_id))
+
+    # 1 trang id bài viết theo key (lấy dư 1 để biết còn trang sau) ====================================================
+    async def get_post_entries(self, key: str, cursor: Optional[str] = None,
+                               limit: int = 5) -> List[Dict[str, Any]]:
+        return await self.post_tag_repo.get_public_entries(key, cursor=cursor, limit=limit)
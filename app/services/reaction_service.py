@@ -0,0 +1,87 @@
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+
+from app.core.counters import engagement_counters
+from app.core.reaction_cache import reaction_membership_cache
+from app.exceptions.post import NotFoundError
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.posts_repository import PostRepository
+from app.repositories.projections import COMMENT_TARGET_FIELDS, POST_OWNER_FIELDS
+from app.repositories.reaction_repository import ReactionRepository
+from app.schemas.reaction import MyReactionsResponse, ReactionResponse, ReactionTarget, ReactionType
+from app.services.engagement_service import comment_counter, post_counter
+
+
+class ReactionService:
+    def __init__(self, reaction_repo: ReactionRepository, post_repo: PostRepository,
+                 comment_repo: CommentRepository):
+        self.reaction_repo = reaction_repo
+        self.post_repo = post_repo
+        self.comment_repo = comment_repo
+
+    # Thả / đổi cảm xúc ================================================================================================
+    async def react(self, user_id: str, target_type: ReactionTarget, target_id: str,
+                    reaction: ReactionType) -> ReactionResponse:
+        counter = await self._counter_of(user_id, target_type, target_id)
+
+        previous, version = await self.reaction_repo.upsert(target_type.value, target_id, user_id, reaction.value)
+
+        # Số đếm chỉ cộng vào Redis, ghi xuống bài viết / bình luận định kỳ
+        if previous != reaction.value:
+            deltas = {counter(f"reactions.{reaction.value}"): 1}
+            if previous:
+                deltas[counter(f"reactions.{previous}")] = -1
+            await engagement_counters.incr_many(deltas)
+
+        await reaction_membership_cache.set(user_id, target_type.value, target_id, reaction.value, version)
+        return ReactionResponse(target_type=target_type, target_id=target_id, type=reaction)
+
+    # Bỏ cảm xúc =======================================================================================================
+    async def unreact(self, user_id: str, target_type: ReactionTarget, target_id: str) -> ReactionResponse:
+        counter = await self._counter_of(user_id, target_type, target_id)
+
+        removed, version = await self.reaction_repo.remove(target_type.value, target_id, user_id)
+        if removed:
+            await engagement_counters.incr(counter(f"reactions.{removed}"), -1)
+            await reaction_membership_cache.set(user_id, target_type.value, target_id, None, version)
+        return ReactionResponse(target_type=target_type, target_id=target_id, type=None)
+
+    # Cảm xúc của tôi trên 1 trang bài viết / bình luận (1 lần HMGET, id chưa có trong cache mới đọc Mongo) ============
+    async def get_my_reactions(self, user_id: str, target_type: ReactionTarget,
+                               target_ids: List[str]) -> MyReactionsResponse:
+        target_ids = [i for i in target_ids if ObjectId.is_valid(i)]
+        found, missing = await reaction_membership_cache.get_many(user_id, target_type.value, target_ids)
+
+        if missing:
+            loaded = await self.reaction_repo.get_user_reactions(user_id, target_type.value, missing)
+            # Chưa từng thả => version 0, lần thả đầu tiên (version 1) vẫn ghi đè được
+            fetched: Dict[str, Tuple[Optional[str], int]] = {i: loaded.get(i, (None, 0)) for i in missing}
+            await reaction_membership_cache.set_many(user_id, target_type.value, fetched)
+            found.update({i: reaction for i, (reaction, _) in fetched.items()})
+
+        return MyReactionsResponse(
+            target_type=target_type,
+            reactions={i: reaction for i, reaction in found.items() if reaction}
+        )
+
+    # Kiểm tra bài viết / bình luận, trả về hàm tạo tên field đếm của đối tượng ========================================
+    async def _counter_of(self, user_id: str, target_type: ReactionTarget, target_id: str):
+        if not ObjectId.is_valid(target_id):
+            raise NotFoundError()
+
+        post_id = target_id
+        if target_type == ReactionTarget.COMMENT:
+            comment = await self.comment_repo.get_by_id(target_id, COMMENT_TARGET_FIELDS)
+            if not comment:
+                raise NotFoundError()
+            post_id = str(comment["post_id"])
+
+        # Bài viết không công khai thì chỉ chủ bài mới thả cảm xúc được
+        post = await self.post_repo.get_by_id(post_id, POST_OWNER_FIELDS)
+        if not post or (post.get("privacy") != "public" and str(post["user_id"]) != str(user_id)):
+            raise NotFoundError()
+
+        if target_type == ReactionTarget.COMMENT:
+            return lambda name: comment_counter(target_id, post_id, name)
+        return lambda name: post_counter(target_id, name)
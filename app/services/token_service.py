@@ -1,9 +1,10 @@
 import secrets
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import Any, Dict, Optional, Tuple
 from fastapi import HTTPException, status
 
-from app.exceptions.auth import RefreshTokenNotFoundError
+from app.core.config import settings
+from app.exceptions.auth import RefreshTokenNotFoundError, RefreshTokenReused
 from app.repositories.token_repository import TokenRepository
 
 class TokenService:
@@ -20,11 +21,47 @@ class TokenService:
         await self.token_repo.create_refresh_token(
             refresh_token=refresh_token,
             user_id=user['_id'],
-            expires_at=expires_at
+            expires_at=expires_at,
+            email=user.get('email')
         )
         
         return refresh_token
 
+    # hàm xử lí logic xoay vòng refresh token (thu hồi token cũ + cấp token mới) =======================================
+    async def rotate_refresh_token(self, token: str, expires_delta: timedelta = timedelta(days=30)
+                                   ) -> Tuple[str, Dict[str, Any]]:
+        new_refresh_token = secrets.token_urlsafe(64)
+        expires_at = datetime.now(timezone.utc) + expires_delta
+
+        old_token = await self.token_repo.rotate_refresh_token(token, new_refresh_token, expires_at)
+        if old_token:
+            return new_refresh_token, old_token
+
+        # Không xoay vòng được => chỉ lúc này mới tìm lại để biết lý do
+        token_obj = await self.token_repo.get_refresh_token(token)
+        if not token_obj:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid refresh token"
+            )
+        revoked_at = token_obj.get('revoked_at')
+        if revoked_at:
+            # Token đã được xoay vòng mà vẫn bị gửi lại (quá thời gian ân hạn) => có thể bị đánh cắp
+            # Trong thời gian ân hạn là nhiều request của cùng client làm mới cùng lúc
+            grace = timedelta(seconds=settings.REFRESH_TOKEN_REUSE_GRACE_SECONDS)
+            if token_obj.get('replaced_by') and datetime.utcnow() - revoked_at > grace:
+                raise RefreshTokenReused(user_id=token_obj['user_id'])
+            # Thu hồi do đăng xuất (không có replaced_by) hoặc vừa xoay vòng => 401 thường
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Refresh token has been revoked"
+            )
+
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Refresh token has expired"
+        )
+
     # hàm xử lí logic xác thực refresh token từ client =================================================================
     async def verify_refresh_token(self, token: str) -> str:
         # tìm kiếm token
@@ -58,3 +95,6 @@ class TokenService:
             raise RefreshTokenNotFoundError()
         return {"message": "Refresh token has been successfully revoked."}
 
+    # hàm xử lí logic thu hồi toàn bộ refresh token của user ===========================================================
+    async def revoke_all_refresh_tokens(self, user_id: Any) -> int:
+        return await self.token_repo.revoke_all_for_user(user_id)
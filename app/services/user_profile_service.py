@@ -9,12 +9,17 @@ from app.schemas.posts import MediaPublic
 from app.schemas.user_profile import UpdateProfileAvatar, UserProfileDetail, UpdateProfileCover
 
 from app.repositories.media_repository import MediaRepository
+from app.repositories.projections import MEDIA_PUBLIC_FIELDS, PROFILE_DETAIL_FIELDS, PROFILE_VALIDATOR_FIELDS, \
+    USER_EXISTS_FIELDS
 from app.repositories.user_profile_repository import UserProfileRepository
 from app.repositories.user_repository import UserRepository
 
 
 from app.services.upload_service import UploadService
+from app.services.author_snapshot_service import AuthorSnapshotService, schedule_author_snapshot_refresh
+from app.core.cache import invalidate_principal, invalidate_profile_card
 from app.core.config import settings
+from app.utils.etag import make_etag
 
 
 class UserProfileService:
@@ -22,11 +27,13 @@ class UserProfileService:
              user_profile_repo: UserProfileRepository,
              upload_service: UploadService,
              media_repo: MediaRepository,
-             user_repo: UserRepository):
+             user_repo: UserRepository,
+             author_snapshot_service: AuthorSnapshotService):
         self.user_profile_repo = user_profile_repo
         self.upload_service = upload_service
         self.media_repo = media_repo
         self.user_repo = user_repo
+        self.author_snapshot_service = author_snapshot_service
 
 
     async def update_profile_avatar(self, file: UploadFile, user_id: str) -> UpdateProfileAvatar:
@@ -42,6 +49,10 @@ class UserProfileService:
             user_id=user_id,
             avatar_id=media["_id"]
         )
+        await invalidate_principal(user_id)
+        await invalidate_profile_card(user_id)
+        # Avatar mới => cập nhật lại thông tin tác giả lưu trong bài viết / bình luận (chạy nền)
+        schedule_author_snapshot_refresh(self.author_snapshot_service, user_id)
 
         return UpdateProfileAvatar(
             avatar=MediaPublic(
@@ -65,6 +76,8 @@ class UserProfileService:
             user_id=user_id,
             cover_id=media["_id"]
         )
+        await invalidate_principal(user_id)
+        await invalidate_profile_card(user_id)
 
         return UpdateProfileCover(
             cover=MediaPublic(
@@ -75,16 +88,24 @@ class UserProfileService:
         )
 
 
+    # ETag trang cá nhân (đổi avatar / cover => updated_at đổi) ========================================================
+    async def get_profile_etag(self, user_id: str) -> Optional[str]:
+        profile = await self.user_profile_repo.get_by_user_id(user_id, PROFILE_VALIDATOR_FIELDS)
+        if not profile:
+            return None
+        return make_etag("profile", user_id, profile.get("updated_at"), profile.get("card_version", 0))
+
+
     async def get_profile_by_id(self, user_id: str) -> UserProfileDetail:
-        user = await self.user_repo.get_by_id(user_id)
+        user = await self.user_repo.get_by_id(user_id, USER_EXISTS_FIELDS)
         if not user:
             raise NotFoundError()
 
-        profile_user = await self.user_profile_repo.get_by_user_id(user_id)
+        profile_user = await self.user_profile_repo.get_by_user_id(user_id, PROFILE_DETAIL_FIELDS)
 
         avatar_public = None
         if profile_user["avatar"]:
-            media = await self.media_repo.get_by_id(profile_user["avatar"])
+            media = await self.media_repo.get_by_id(profile_user["avatar"], MEDIA_PUBLIC_FIELDS)
             if media:
                 avatar_public = MediaPublic(
                     id = media["_id"],
@@ -94,7 +115,7 @@ class UserProfileService:
 
         cover_public = None
         if profile_user.get("cover"):
-            media = await self.media_repo.get_by_id(profile_user["cover"])
+            media = await self.media_repo.get_by_id(profile_user["cover"], MEDIA_PUBLIC_FIELDS)
             if media:
                 cover_public = MediaPublic(
                     id=media["_id"],
@@ -2,7 +2,7 @@ from typing import List, Optional, Dict, Any
 from fastapi import HTTPException, status
 from app.repositories.user_repository import UserRepository
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import hash_password, verify_password
+from app.core.security import password_hasher
 
 
 class UserService:
@@ -21,14 +21,14 @@ class UserService:
             raise HTTPException(status_code=404, detail="User not found")
 
         # Kiểm tra password cũ
-        if not verify_password(old_password, user["hashed_password"]):
+        if not await password_hasher.verify(old_password, user["hashed_password"]):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Incorrect old password"
             )
 
         # Hash password mới
-        hashed = hash_password(new_password)
+        hashed = await password_hasher.hash(new_password)
 
         # Update vào MongoDB
         updated_user = await self.user_repo.update(
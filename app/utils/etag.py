@@ -0,0 +1,43 @@
+import hashlib
+from typing import Any, Dict, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    ETag yếu (W/"...") tính từ các giá trị đánh dấu phiên bản (updated_at, version, số bình luận...),
+    không phải từ nội dung response nên không cần build response mới biết ETag.
+    """
+    raw = "|".join("" if part is None else str(part) for part in parts)
+    return f'W/"{hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    # If-None-Match so sánh yếu: bỏ tiền tố W/ ở cả 2 phía
+    current = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == current for candidate in header.split(","))
+
+
+def etag_headers(etag: Optional[str]) -> Dict[str, str]:
+    if not etag:
+        return {}
+    # Client được giữ bản cũ nhưng phải hỏi lại server (If-None-Match) trước khi dùng
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=etag_headers(etag))
+
+
+def set_etag(response: Response, etag: Optional[str]) -> None:
+    response.headers.update(etag_headers(etag))
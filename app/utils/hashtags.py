@@ -0,0 +1,41 @@
+import re
+import unicodedata
+from typing import List, Optional
+
+# Giới hạn để 1 bài viết spam hashtag không làm phình collection chỉ mục
+MAX_TAG_LENGTH = 50
+MAX_KEYS_PER_TEXT = 30
+
+# #tag: chữ / số / _ (có dấu tiếng Việt), không nằm giữa 1 từ (vd "trang#muc" trong url không tính)
+_HASHTAG_RE = re.compile(r"(?<![\w#&])#(\w+)")
+# @mention: client chèn id người dùng (24 ký tự hex) khi chọn người trong danh sách gợi ý
+_MENTION_RE = re.compile(r"(?<![\w@])@([0-9a-fA-F]{24})(?![0-9a-fA-F])")
+
+
+def normalize_tag(tag: str) -> Optional[str]:
+    """
+    "#XinChào" và "xinchào" là cùng 1 tag. Trả về None nếu không phải tag hợp lệ.
+    """
+    tag = unicodedata.normalize("NFC", tag.strip().lstrip("#")).lower()
+    if not tag or len(tag) > MAX_TAG_LENGTH or not re.fullmatch(r"\w+", tag):
+        return None
+    return tag
+
+
+def tag_key(tag: str) -> str:
+    return f"#{tag}"
+
+
+def mention_key(user_id: str) -> str:
+    return f"@{str(user_id).lower()}"
+
+
+# Tách hashtag + mention trong nội dung thành các key của chỉ mục (không trùng, giữ thứ tự xuất hiện) ==================
+def extract_index_keys(text: Optional[str]) -> List[str]:
+    if not text:
+        return []
+
+    text = unicodedata.normalize("NFC", text)
+    keys = [tag_key(tag.lower()) for tag in _HASHTAG_RE.findall(text) if len(tag) <= MAX_TAG_LENGTH]
+    keys += [mention_key(user_id) for user_id in _MENTION_RE.findall(text)]
+    return list(dict.fromkeys(keys))[:MAX_KEYS_PER_TEXT]
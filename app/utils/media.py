@@ -0,0 +1,12 @@
+from typing import Optional
+
+from app.core.config import settings
+
+
+def build_media_url(url: Optional[str]) -> Optional[str]:
+    """
+    Đường dẫn media lưu trên server (tương đối) thì gắn thêm SERVER_BASE_URL, url đầy đủ (http...) giữ nguyên.
+    """
+    if url and not url.startswith("http"):
+        return f"{settings.SERVER_BASE_URL}/{url.lstrip('/')}"
+    return url
@@ -0,0 +1,66 @@
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from fastapi import Request
+from pydantic import BaseModel
+
+from app.schemas.posts import PaginationInfo
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Số document gom lại để gắn tác giả / media trong 1 lượt (1 lượt = vài query $in)
+STREAM_CHUNK_SIZE = 10
+
+
+def wants_ndjson(request: Request) -> bool:
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+# Stream 1 trang dạng NDJSON: mỗi dòng 1 item, dòng cuối là {"pagination": {...}} ======================================
+async def stream_page(
+        documents: AsyncIterator[Dict[str, Any]],
+        limit: int,
+        hydrate: Callable[[List[Dict[str, Any]]], Awaitable[List[BaseModel]]],
+        chunk_size: int = STREAM_CHUNK_SIZE,
+        cursor_of: Optional[Callable[[Dict[str, Any]], str]] = None,
+        on_page: Optional[Callable[[List[Any]], Awaitable[None]]] = None
+) -> AsyncIterator[bytes]:
+    """
+    documents phải trả về tối đa limit + 1 document (document thừa chỉ để biết còn trang sau hay không).
+    Cứ đủ chunk_size document thì hydrate rồi ghi ra ngay, không giữ cả trang trong bộ nhớ.
+    cursor_of tạo next_cursor từ document cuối (mặc định là _id).
+    on_page nhận _id của mọi document đã stream, gọi sau dòng pagination (không làm chậm client).
+    """
+    chunk: List[Dict[str, Any]] = []
+    ids: List[Any] = []
+    count = 0
+    has_more = False
+    last = None
+
+    async with aclosing(documents):
+        async for document in documents:
+            if count == limit:
+                has_more = True
+                break
+
+            count += 1
+            last = document
+            ids.append(document["_id"])
+            chunk.append(document)
+            if len(chunk) >= chunk_size:
+                for item in await hydrate(chunk):
+                    yield item.model_dump_json(by_alias=True).encode() + b"\n"
+                chunk = []
+
+    if chunk:
+        for item in await hydrate(chunk):
+            yield item.model_dump_json(by_alias=True).encode() + b"\n"
+
+    next_cursor = None
+    if last is not None:
+        next_cursor = cursor_of(last) if cursor_of else str(last["_id"])
+    pagination = PaginationInfo(next_cursor=next_cursor, has_more=has_more, limit=limit)
+    yield b'{"pagination":' + pagination.model_dump_json().encode() + b"}\n"
+
+    if on_page and ids:
+        await on_page(ids)
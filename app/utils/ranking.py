@@ -0,0 +1,29 @@
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+# Điểm "hot" của bài viết = log10(số tương tác) + thời điểm đăng / HOT_DECAY_SECONDS
+# Bài đăng sau 12.5h chỉ cần 1/10 số tương tác là xếp ngang bài cũ => điểm cũ không phải tính lại theo thời gian,
+# chỉ cập nhật khi có tương tác mới
+HOT_DECAY_SECONDS = 45000
+
+# Các field cộng lại thành số tương tác
+ENGAGEMENT_FIELDS = ("comments_count", "reactions_count")
+
+
+def hot_score(engagement: int, created_at: datetime) -> float:
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return math.log10(max(engagement, 1)) + created_at.timestamp() / HOT_DECAY_SECONDS
+
+
+def hot_score_expression() -> Dict[str, Any]:
+    """
+    Cùng công thức với hot_score() dưới dạng biểu thức Mongo, dùng trong update pipeline
+    để tính lại điểm ngay trên server (không phải đọc bài viết trước khi ghi).
+    """
+    engagement = {"$add": [{"$ifNull": [f"${field}", 0]} for field in ENGAGEMENT_FIELDS]}
+    return {"$add": [
+        {"$log10": {"$max": [engagement, 1]}},
+        {"$divide": [{"$toLong": "$created_at"}, HOT_DECAY_SECONDS * 1000]},
+    ]}
@@ -0,0 +1,31 @@
+import asyncio
+import logging
+import sys
+import os
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.mongo_database import mongodb_client
+from app.repositories.posts_repository import PostRepository
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+
+async def backfill():
+    """
+    Tính hot_score cho bài viết tạo trước khi có feed sort=top (bài mới được tính lúc tạo / khi có bình luận).
+    Chạy lại nhiều lần không sao: chỉ cập nhật bài chưa có hot_score.
+    """
+    try:
+        await mongodb_client.connect()
+        updated = await PostRepository().backfill_hot_score()
+        logger.info(f"Đã tính hot_score cho {updated} bài viết")
+    except Exception as e:
+        logger.error(f"Lỗi khi tính hot_score: {e}")
+    finally:
+        await mongodb_client.close()
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(backfill())
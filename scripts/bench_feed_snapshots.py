@@ -0,0 +1,119 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from bson import ObjectId
+from app.core.mongo_database import mongodb_client
+from app.repositories.media_repository import MediaRepository
+from app.repositories.user_profile_repository import UserProfileRepository
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+AUTHORS = 50
+POSTS = 1000
+PAGE_SIZE = 20
+PAGES = 200
+
+
+async def _seed(db, run_id: ObjectId):
+    """
+    Tạo tác giả (profile + avatar) và bài viết có sẵn bản chụp tác giả, đánh dấu bằng bench_run để dọn sau.
+    """
+    now = datetime.now(timezone.utc)
+    avatars = [{"_id": ObjectId(), "type": "image", "url": f"avatars/bench-{i}.png", "created_at": now,
+                "bench_run": run_id} for i in range(AUTHORS)]
+    profiles = [{"user_id": ObjectId(), "display_name": f"Bench {i}", "avatar": avatars[i]["_id"], "card_version": 1,
+                 "created_at": now, "bench_run": run_id} for i in range(AUTHORS)]
+    posts = []
+    for i in range(POSTS):
+        profile = profiles[i % AUTHORS]
+        posts.append({
+            "user_id": profile["user_id"], "content": f"bench post {i}", "privacy": "bench", "media_ids": [],
+            "author": {"display_name": profile["display_name"], "avatar": avatars[i % AUTHORS]["url"], "version": 1},
+            "created_at": now, "bench_run": run_id
+        })
+    await db.get_collection("media").insert_many(avatars)
+    await db.get_collection("user_profiles").insert_many(profiles)
+    await db.get_collection("posts").insert_many(posts)
+
+
+async def _page_ids(posts_col, run_id: ObjectId):
+    cursors = []
+    cursor = None
+    for _ in range(PAGES):
+        query = {"bench_run": run_id}
+        if cursor:
+            query["_id"] = {"$lt": cursor}
+        page = [p["_id"] async for p in posts_col.find(query, {"_id": 1}).sort("_id", -1).limit(PAGE_SIZE)]
+        if len(page) < PAGE_SIZE:
+            cursor = None
+            continue
+        cursors.append(cursor)
+        cursor = page[-1]
+    return cursors
+
+
+async def _legacy_page(posts_col, profile_repo, media_repo, run_id, cursor):
+    """
+    Cách cũ: posts -> profiles -> avatars (3 query nối tiếp).
+    """
+    query = {"bench_run": run_id}
+    if cursor:
+        query["_id"] = {"$lt": cursor}
+    posts = [p async for p in posts_col.find(query).sort("_id", -1).limit(PAGE_SIZE)]
+    profiles = await profile_repo.get_public_by_ids({p["user_id"] for p in posts})
+    await media_repo.get_by_ids([p["avatar"] for p in profiles if p.get("avatar")])
+
+
+async def _snapshot_page(posts_col, profile_repo, media_repo, run_id, cursor):
+    """
+    Cách mới: thông tin tác giả nằm sẵn trong bài viết (1 query).
+    """
+    query = {"bench_run": run_id}
+    if cursor:
+        query["_id"] = {"$lt": cursor}
+    [p async for p in posts_col.find(query).sort("_id", -1).limit(PAGE_SIZE)]
+
+
+async def _run(name, page_func, cursors, *args):
+    samples = []
+    for cursor in cursors:
+        started = time.perf_counter()
+        await page_func(*args, cursor)
+        samples.append((time.perf_counter() - started) * 1000)
+
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    logger.info(f"{name:<9} | {len(samples)} trang x {PAGE_SIZE} bài | "
+                f"trung bình: {statistics.mean(samples):.2f}ms | p95: {p95:.2f}ms")
+
+
+async def main():
+    await mongodb_client.connect()
+    db = mongodb_client.get_database()
+    posts_col = db.get_collection("posts")
+    profile_repo = UserProfileRepository()
+    media_repo = MediaRepository()
+    run_id = ObjectId()
+
+    try:
+        await _seed(db, run_id)
+        cursors = await _page_ids(posts_col, run_id)
+        await _run("legacy", _legacy_page, cursors, posts_col, profile_repo, media_repo, run_id)
+        await _run("snapshot", _snapshot_page, cursors, posts_col, profile_repo, media_repo, run_id)
+    finally:
+        for name in ("posts", "user_profiles", "media"):
+            await db.get_collection(name).delete_many({"bench_run": run_id})
+        await mongodb_client.close()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,97 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.config import settings
+from app.core.counters import ShardedCounters
+from app.core.mongo_database import mongodb_client
+from app.core.redis_client import close_redis_pool, get_direct_redis_client
+from app.repositories.comment_repository import CommentRepository
+from app.repositories.posts_repository import PostRepository
+from app.services.engagement_service import EngagementService, post_counter
+from app.utils.ranking import hot_score
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Bài viết hot: EVENTS lượt thả cảm xúc dồn vào 1 bài viết từ CONCURRENCY request cùng lúc (cần Mongo + Redis thật)
+# - direct : mỗi lượt 1 câu update (cộng số đếm + tính lại hot_score) thẳng lên document bài viết như trước đây
+# - sharded: mỗi lượt 1 HINCRBY vào 1 trong N shard Redis, task nền ghi xuống Mongo mỗi FLUSH_SECONDS
+EVENTS = 5000
+CONCURRENCY = 200
+FLUSH_SECONDS = 0.5
+
+
+async def _direct(post_repo: PostRepository, post_id, latencies: list):
+    started = time.perf_counter()
+    await post_repo.apply_counters({post_id: {"reactions.like": 1, "reactions_count": 1}})
+    latencies.append(time.perf_counter() - started)
+
+
+async def _sharded(counters: ShardedCounters, post_id, latencies: list):
+    started = time.perf_counter()
+    await counters.incr(post_counter(str(post_id), "reactions.like"))
+    latencies.append(time.perf_counter() - started)
+
+
+async def _run(name: str, write, post_repo: PostRepository, post_id, drain=None):
+    latencies = []
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def one():
+        async with semaphore:
+            await write(post_id, latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(EVENTS)))
+    elapsed = time.perf_counter() - started
+    if drain:
+        await drain()
+    total = time.perf_counter() - started
+
+    latencies.sort()
+    post = await post_repo.collection.find_one({"_id": post_id}, {"reactions_count": 1})
+    logger.info(f"{name:<8} | {EVENTS / elapsed:>8,.0f} lượt/s | p50 {latencies[len(latencies) // 2] * 1000:6.2f}ms "
+                f"| p99 {latencies[int(len(latencies) * 0.99)] * 1000:6.2f}ms "
+                f"| ghi xong sau {total:.2f}s | reactions_count={post.get('reactions_count')}")
+
+
+async def main():
+    await mongodb_client.connect()
+    post_repo = PostRepository()
+    engagement = EngagementService(post_repo=post_repo, comment_repo=CommentRepository())
+    counters = ShardedCounters(namespace="bench:counters", shards=settings.COUNTER_SHARDS,
+                               flush_seconds=FLUSH_SECONDS, lock_seconds=30)
+
+    now = datetime.utcnow()
+    post_ids = []
+    try:
+        for _ in range(2):
+            result = await post_repo.collection.insert_one({
+                "user_id": None, "content": "bench hot post", "privacy": "private", "media_ids": [],
+                "hot_score": hot_score(0, now), "created_at": now, "updated_at": now, "deleted_at": None
+            })
+            post_ids.append(result.inserted_id)
+
+        await _run("direct", lambda post_id, latencies: _direct(post_repo, post_id, latencies),
+                   post_repo, post_ids[0])
+
+        counters.start(engagement.apply_counters)
+        await _run("sharded", lambda post_id, latencies: _sharded(counters, post_id, latencies),
+                   post_repo, post_ids[1], drain=counters.stop)
+    finally:
+        await post_repo.collection.delete_many({"_id": {"$in": post_ids}})
+        redis = await get_direct_redis_client()
+        await redis.delete(*[f"bench:counters:{i}" for i in range(settings.COUNTER_SHARDS)])
+        await close_redis_pool()
+        await mongodb_client.close()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.security import pwd_context, password_hasher
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+BURST_SIZE = 20
+TICK_INTERVAL = 0.005
+
+
+async def _measure_loop_lag(stop: asyncio.Event, samples: list):
+    """
+    Đo độ trễ của event loop: ngủ TICK_INTERVAL rồi xem bị đánh thức trễ bao nhiêu.
+    """
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        started = loop.time()
+        await asyncio.sleep(TICK_INTERVAL)
+        samples.append((loop.time() - started - TICK_INTERVAL) * 1000)
+
+
+async def _login_sync(hashed: str):
+    # Cách cũ: bcrypt chạy thẳng trong coroutine
+    return pwd_context.verify("benchmark-password", hashed)
+
+
+async def _login_executor(hashed: str):
+    # Cách mới: bcrypt chạy trên thread pool
+    return await password_hasher.verify("benchmark-password", hashed)
+
+
+async def run_burst(name: str, login_func, hashed: str):
+    stop = asyncio.Event()
+    samples: list = []
+    ticker = asyncio.create_task(_measure_loop_lag(stop, samples))
+    await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(*[login_func(hashed) for _ in range(BURST_SIZE)])
+    elapsed = time.perf_counter() - started
+
+    stop.set()
+    await ticker
+
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    logger.info(
+        f"{name:<10} | {BURST_SIZE} login trong {elapsed:.2f}s | "
+        f"ticks: {len(samples)} | lag trung bình: {statistics.mean(samples or [0]):.1f}ms | "
+        f"p99: {p99:.1f}ms | max: {max(samples or [0]):.1f}ms"
+    )
+
+
+async def main():
+    hashed = pwd_context.hash("benchmark-password")
+    logger.info(f"bcrypt rounds: {pwd_context.to_dict()['bcrypt__default_rounds']}, "
+                f"workers: {password_hasher.max_workers}")
+
+    await run_burst("sync", _login_sync, hashed)
+    await run_burst("executor", _login_executor, hashed)
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
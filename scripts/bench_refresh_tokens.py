@@ -0,0 +1,80 @@
+import asyncio
+import logging
+import os
+import secrets
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from bson import ObjectId
+from app.core.mongo_database import mongodb_client
+from app.repositories.token_repository import TokenRepository
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+ROTATIONS = 500
+
+
+async def _legacy_refresh(repo: TokenRepository, users_col, token: str) -> str:
+    """
+    Luồng cũ: get (find) -> revoke (find + update) -> lấy user (find) -> create (find + insert).
+    """
+    token_obj = await repo.get_refresh_token(token)
+    found = await repo.collection.find_one({"token": repo._hash_token(token)})
+    await repo.collection.update_one({"_id": found["_id"]}, {"$set": {"revoked_at": datetime.utcnow()}})
+    await users_col.find_one({"_id": token_obj["user_id"]})
+
+    new_token = secrets.token_urlsafe(64)
+    await repo.collection.find_one({"token": repo._hash_token(new_token)})
+    await repo.collection.insert_one({
+        "token": repo._hash_token(new_token),
+        "user_id": token_obj["user_id"],
+        "expires_at": datetime.now(timezone.utc) + timedelta(days=30)
+    })
+    return new_token
+
+
+async def _rotate_refresh(repo: TokenRepository, users_col, token: str) -> str:
+    """
+    Luồng mới: 1 find_one_and_update + 1 insert.
+    """
+    new_token = secrets.token_urlsafe(64)
+    await repo.rotate_refresh_token(token, new_token, datetime.now(timezone.utc) + timedelta(days=30))
+    return new_token
+
+
+async def _run(name: str, refresh_func, repo: TokenRepository, users_col, user_id: ObjectId):
+    token = secrets.token_urlsafe(64)
+    await repo.create_refresh_token(token, user_id, datetime.now(timezone.utc) + timedelta(days=30),
+                                    email="bench@example.com")
+
+    started = time.perf_counter()
+    for _ in range(ROTATIONS):
+        token = await refresh_func(repo, users_col, token)
+    elapsed = time.perf_counter() - started
+
+    logger.info(f"{name:<7} | {ROTATIONS} lần refresh trong {elapsed:.2f}s | "
+                f"{ROTATIONS / elapsed:,.0f} refresh/s | {elapsed / ROTATIONS * 1000:.2f}ms/refresh")
+
+
+async def main():
+    await mongodb_client.connect()
+    db = mongodb_client.get_database()
+    users_col = db.get_collection("users")
+    repo = TokenRepository()
+    user_id = ObjectId()
+
+    try:
+        await _run("legacy", _legacy_refresh, repo, users_col, user_id)
+        await _run("rotate", _rotate_refresh, repo, users_col, user_id)
+    finally:
+        await repo.collection.delete_many({"user_id": user_id})
+        await mongodb_client.close()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
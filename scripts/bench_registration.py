@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timezone
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from bson import ObjectId
+from app.core.mongo_database import mongodb_client
+from app.repositories.user_profile_repository import UserProfileRepository
+from app.repositories.user_repository import UserRepository
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+REGISTRATIONS = 500
+EMAIL_DOMAIN = "bench-register.example.com"
+
+
+def _documents(email: str, user_id=None):
+    # Bỏ qua bcrypt: chỉ đo phần ghi DB
+    now = datetime.now(timezone.utc)
+    user = {"email": email, "password": "x", "status": "pending", "email_verified": False,
+            "created_at": now, "updated_at": now}
+    if user_id:
+        user["_id"] = user_id
+    profile = {"user_id": user_id, "first_name": "Bench", "last_name": "User", "display_name": "User Bench",
+               "avatar": None, "cover_photo": None, "created_at": now, "updated_at": now}
+    return user, profile
+
+
+async def _legacy_register(user_repo: UserRepository, profile_repo: UserProfileRepository, email: str):
+    """
+    Luồng cũ: get_by_email -> insert user -> insert profile (3 round trip nối tiếp).
+    """
+    if await user_repo.get_by_email(email):
+        return
+    user, profile = _documents(email)
+    created = await user_repo.create(user)
+    profile["user_id"] = created["_id"]
+    await profile_repo.create(profile)
+
+
+async def _concurrent_register(user_repo: UserRepository, profile_repo: UserProfileRepository, email: str):
+    """
+    Luồng mới: tạo ID phía app, 2 lệnh insert chạy song song (độ trễ ~1 round trip).
+    """
+    user, profile = _documents(email, ObjectId())
+    await asyncio.gather(user_repo.create(user), profile_repo.create(profile))
+
+
+async def _run(name: str, register_func, user_repo: UserRepository, profile_repo: UserProfileRepository):
+    started = time.perf_counter()
+    for i in range(REGISTRATIONS):
+        await register_func(user_repo, profile_repo, f"{name}-{i}@{EMAIL_DOMAIN}")
+    elapsed = time.perf_counter() - started
+
+    logger.info(f"{name:<10} | {REGISTRATIONS} lần đăng ký trong {elapsed:.2f}s | "
+                f"{REGISTRATIONS / elapsed:,.0f} đăng ký/s | {elapsed / REGISTRATIONS * 1000:.2f}ms/đăng ký")
+
+
+async def _cleanup(user_repo: UserRepository, profile_repo: UserProfileRepository):
+    user_ids = await user_repo.collection.distinct("_id", {"email": {"$regex": f"@{EMAIL_DOMAIN}$"}})
+    await profile_repo.collection.delete_many({"user_id": {"$in": user_ids}})
+    await user_repo.collection.delete_many({"_id": {"$in": user_ids}})
+
+
+async def main():
+    await mongodb_client.connect()
+    user_repo = UserRepository()
+    profile_repo = UserProfileRepository()
+
+    try:
+        await _cleanup(user_repo, profile_repo)
+        await _run("legacy", _legacy_register, user_repo, profile_repo)
+        await _run("concurrent", _concurrent_register, user_repo, profile_repo)
+    finally:
+        await _cleanup(user_repo, profile_repo)
+        await mongodb_client.close()
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from bson import ObjectId
+from pydantic import TypeAdapter
+from app.core.responses import MsgPackResponse, ORJSONResponse
+from app.schemas.comment import CommentResponse
+from app.schemas.message import PaginatedMessagesResponse
+from app.schemas.notification import Notification
+from app.schemas.posts import PaginatedPostsResponse, PaginationInfo
+from app.schemas.response import ResponseModel
+from app.services.comment_service import CommentService
+from app.services.message_service import MessageService
+from app.services.news_service import PostService
+from app.services.notification_service import NotificationService
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Đo chi phí build + serialize 1 trang response cho từng endpoint (không cần Mongo / Redis):
+# - legacy : build model -> FastAPI validate lại qua response_model -> jsonable -> json.dumps
+# - orjson : build model -> ORJSONResponse (trả Response trực tiếp, không validate lại)
+# - msgpack: build model -> MsgPackResponse
+PAGE_SIZE = 50
+ROUNDS = 200
+
+
+# Dữ liệu giả giống document trong Mongo ===============================================================================
+def _posts():
+    return [{"_id": ObjectId(), "user_id": ObjectId(), "content": f"bài viết {i} " * 20, "privacy": "public",
+             "media_ids": [ObjectId() for _ in range(3)], "created_at": datetime.utcnow(),
+             "author": {"display_name": f"Tác giả {i}", "avatar": f"avatars/{i}.png", "version": 1}}
+            for i in range(PAGE_SIZE)]
+
+
+def _comments():
+    return [{"_id": ObjectId(), "post_id": ObjectId(), "user_id": ObjectId(), "root_id": None,
+             "content": f"bình luận {i} " * 5, "has_replies": i % 3 == 0, "created_at": datetime.utcnow(),
+             "author": {"display_name": f"Người dùng {i}", "avatar": None, "version": 1}}
+            for i in range(PAGE_SIZE)]
+
+
+def _messages():
+    conversation_id = ObjectId()
+    return [{"_id": ObjectId(), "conversation_id": conversation_id, "sender_id": ObjectId(),
+             "content": f"tin nhắn {i}", "created_at": datetime.utcnow()} for i in range(PAGE_SIZE)]
+
+
+def _notifications():
+    return [{"_id": ObjectId(), "recipient_id": str(ObjectId()), "type": "NEW_COMMENT", "message": "đã bình luận",
+             "actor": {"id": str(ObjectId()), "display_name": f"Người dùng {i}", "avatar": None},
+             "entity_ref": {"post_id": str(ObjectId()), "comment_id": str(ObjectId())}, "is_read": False,
+             "created_at": datetime.utcnow()} for i in range(PAGE_SIZE)]
+
+
+class _Loader:
+    """
+    EntityLoader giả: media lấy từ dict có sẵn, tác giả đã nằm trong bản chụp nên không cần thẻ.
+    """
+
+    def __init__(self, posts):
+        self.media = {m: {"_id": m, "type": "image", "url": f"posts/{m}.png"} for p in posts for m in p["media_ids"]}
+
+    async def load_cards(self, user_ids):
+        return {}
+
+    async def load_media(self, media_ids):
+        return {m: self.media[m] for m in media_ids}
+
+
+class _CommentRepo:
+    def __init__(self, comments):
+        self.comments = comments
+
+    async def get_root_comments(self, post_id, limit=10, cursor=None, projection=None):
+        return self.comments
+
+
+# Giống FastAPI khi endpoint trả model: validate lại theo response_model rồi json.dumps ================================
+def _fastapi_render(adapter: TypeAdapter, content) -> bytes:
+    value = adapter.validate_python(content, from_attributes=True)
+    primitive = adapter.dump_python(value, mode="json", by_alias=True)
+    return json.dumps(primitive, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode()
+
+
+def _measure(name: str, render, content) -> float:
+    started = time.perf_counter()
+    size = 0
+    for _ in range(ROUNDS):
+        size = len(render(content))
+    per_page = (time.perf_counter() - started) / ROUNDS * 1000
+    logger.info(f"{name:<40} | {per_page:7.3f}ms/trang | {size:,} bytes")
+    return per_page
+
+
+async def _bench(endpoint: str, adapter: TypeAdapter, build):
+    # Bước build model giống nhau ở cả 3 cách, đo riêng để thấy tỉ trọng của phần serialize
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        content = await build()
+    logger.info(f"{endpoint + ' build':<40} | {(time.perf_counter() - started) / ROUNDS * 1000:7.3f}ms/trang")
+
+    legacy_ms = _measure(f"{endpoint} legacy", lambda c: _fastapi_render(adapter, c), content)
+    orjson_ms = _measure(f"{endpoint} orjson", lambda c: ORJSONResponse(c).body, content)
+    _measure(f"{endpoint} msgpack", lambda c: MsgPackResponse(c).body, content)
+    logger.info(f"{endpoint:<40} | serialize nhanh hơn x{legacy_ms / orjson_ms:.1f} (orjson so với legacy)")
+
+
+async def main():
+    posts, comments, messages, notifications = _posts(), _comments(), _messages(), _notifications()
+    loader = _Loader(posts)
+
+    post_service = PostService(post_repo=None, media_service=None, user_profile_repo=None, media_repo=None,
+                               entity_loader=loader, post_tag_service=None, author_snapshot_service=None)
+    comment_service = CommentService(comment_repo=_CommentRepo(comments), post_repo=None, user_profile_repo=None,
+                                     media_repo=None, notification_service=None, entity_loader=loader,
+                                     post_tag_service=None, author_snapshot_service=None)
+
+    async def build_posts():
+        data = await post_service._build_post_responses(posts)
+        return PaginatedPostsResponse(data=data, pagination=PaginationInfo(next_cursor=None, has_more=False, limit=50))
+
+    async def build_comments():
+        return ResponseModel(data=await comment_service.get_root_comments_for_post(str(ObjectId())))
+
+    async def build_messages():
+        return PaginatedMessagesResponse(data=await MessageService._build_messages(messages),
+                                         pagination=PaginationInfo(next_cursor=None, has_more=False, limit=50))
+
+    async def build_notifications():
+        return ResponseModel(data=await NotificationService._build_notifications(notifications))
+
+    await _bench("GET /posts/", TypeAdapter(PaginatedPostsResponse), build_posts)
+    await _bench("GET /comments/{post_id}", TypeAdapter(ResponseModel[List[CommentResponse]]), build_comments)
+    await _bench("GET /conversations/../messages", TypeAdapter(PaginatedMessagesResponse), build_messages)
+    await _bench("GET /notifications/", TypeAdapter(ResponseModel[List[Notification]]), build_notifications)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,51 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core import security
+from app.core.revocation import revocation_registry
+from app.core.security import create_access_token, verify_scoped_token
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+ITERATIONS = 20000
+
+
+class _NoRedis:
+    """
+    Redis giả: benchmark chạy với danh sách thu hồi local nên không được gọi tới Redis.
+    """
+
+    async def exists(self, key):
+        raise RuntimeError("Không được gọi Redis khi revocation registry đã sẵn sàng")
+
+
+async def _run(name: str, token: str, clear_cache: bool):
+    redis_client = _NoRedis()
+    started = time.perf_counter()
+    for _ in range(ITERATIONS):
+        if clear_cache:
+            security._verified_token_cache.clear()
+        await verify_scoped_token(token, "access_token", redis_client)
+    elapsed = time.perf_counter() - started
+    logger.info(f"{name:<5} | {ITERATIONS} lần verify trong {elapsed:.3f}s | "
+                f"{ITERATIONS / elapsed:,.0f} token/s | {elapsed / ITERATIONS * 1e6:.1f}µs/token")
+
+
+async def main():
+    # Kiểm tra thu hồi dùng danh sách local (giống khi listener đang chạy)
+    revocation_registry.is_ready = True
+    token = create_access_token(data={"sub": "652f1c0e9b1e8a3f4c2d1a0b", "email": "bench@example.com"})
+
+    await _run("cold", token, clear_cache=True)
+    await _run("warm", token, clear_cache=False)
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
@@ -0,0 +1,82 @@
+import logging
+import os
+import random
+import sys
+import time
+from collections import Counter
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from app.core.trending import TrendingTracker
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Đo tốc độ ghi nhận hashtag và độ chính xác của count-min sketch + top-K so với đếm chính xác (không cần Redis):
+# - Luồng hashtag giả phân bố Zipf (vài tag rất hot, rất nhiều tag hiếm) giống dữ liệu thật
+# - Mỗi FLUSH_EVERY sự kiện thì drain() như task nền, số đếm được cộng dồn như ZINCRBY trên Redis
+EVENTS = 500_000
+VOCABULARY = 50_000
+ZIPF_EXPONENT = 1.1
+FLUSH_EVERY = 20_000
+TOP_K = (10, 20, 50)
+SEED = 42
+
+
+def _stream():
+    rng = random.Random(SEED)
+    tags = [f"tag{i}" for i in range(VOCABULARY)]
+    weights = [1 / (rank + 1) ** ZIPF_EXPONENT for rank in range(VOCABULARY)]
+    # Xáo thứ tự để tag hot không phải lúc nào cũng là tag0, tag1...
+    rng.shuffle(tags)
+    return rng.choices(tags, weights=weights, k=EVENTS)
+
+
+def _tracker(candidates: int, width: int) -> TrendingTracker:
+    return TrendingTracker(namespace="bench", bucket_seconds=300, window_seconds=86400, half_life_seconds=21600,
+                           flush_seconds=10, candidates=candidates, bucket_max_keys=1000, cache_seconds=30,
+                           top_k=50, sketch_width=width)
+
+
+def _run(events, candidates: int, width: int):
+    tracker = _tracker(candidates, width)
+    merged = Counter()
+    started = time.perf_counter()
+    for i in range(0, len(events), FLUSH_EVERY):
+        for tag in events[i:i + FLUSH_EVERY]:
+            tracker.record((tag,), timestamp=0)
+        for counts in tracker.drain().values():
+            merged.update(counts)
+    elapsed = time.perf_counter() - started
+    return merged, elapsed
+
+
+def _report(name: str, merged: Counter, exact: Counter, elapsed: float):
+    logger.info(f"{name:<28} | {EVENTS / elapsed:>10,.0f} sự kiện/s")
+    for k in TOP_K:
+        true_top = [tag for tag, _ in exact.most_common(k)]
+        found_top = {tag for tag, _ in merged.most_common(k)}
+        recall = len(found_top.intersection(true_top)) / k
+        errors = [abs(merged[tag] - exact[tag]) / exact[tag] for tag in true_top]
+        logger.info(f"{'':<28} | top {k:<3}: recall {recall:6.1%} | sai số đếm TB {sum(errors) / k:6.2%} "
+                    f"| lớn nhất {max(errors):6.2%}")
+
+
+def main():
+    events = _stream()
+    exact = Counter(events)
+    logger.info(f"{EVENTS:,} sự kiện, {len(exact):,} hashtag khác nhau, drain mỗi {FLUSH_EVERY:,} sự kiện")
+
+    # Mốc so sánh: đếm chính xác bằng dict (bộ nhớ tăng theo số hashtag khác nhau)
+    started = time.perf_counter()
+    baseline = Counter()
+    for tag in events:
+        baseline[tag] += 1
+    logger.info(f"{'dict (chính xác)':<28} | {EVENTS / (time.perf_counter() - started):>10,.0f} sự kiện/s")
+
+    for candidates, width in ((200, 2048), (200, 8192), (500, 8192)):
+        merged, elapsed = _run(events, candidates, width)
+        _report(f"sketch {width}x4, top {candidates}", merged, exact, elapsed)
+
+
+if __name__ == "__main__":
+    main()
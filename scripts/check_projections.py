@@ -0,0 +1,274 @@
+import asyncio
+import logging
+import os
+import sys
+from datetime import datetime, timezone
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from bson import ObjectId
+import app.core.dependencies as dependencies
+from app.core.cache import profile_card_cache
+from app.services.comment_service import CommentService
+from app.services.conversation_service import ConversationService
+from app.services.entity_loader import EntityLoader
+from app.services.message_service import MessageService
+from app.services.news_service import PostService
+from app.services.user_profile_service import UserProfileService
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+
+# Kiểm tra projection trong app/repositories/projections.py có đủ field cho response hay không:
+# chạy từng luồng đọc 2 lần trên cùng dữ liệu giả (không cần Mongo), 1 lần repository trả document đầy đủ,
+# 1 lần repository áp projection được truyền vào. Thiếu field => lỗi KeyError / validate hoặc response khác nhau.
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+# Áp projection kiểu inclusion của Mongo (hỗ trợ "a.b" 1 cấp, kể cả trên mảng document con) ============================
+def apply_projection(document, projection):
+    if projection is None:
+        return document
+
+    nested = {}
+    result = {"_id": document["_id"]} if projection.get("_id", 1) else {}
+    for field in projection:
+        head, _, rest = field.partition(".")
+        if head not in document:
+            continue
+        if rest:
+            nested.setdefault(head, {})[rest] = 1
+        elif head != "_id":
+            result[head] = document[head]
+
+    for head, fields in nested.items():
+        value = document[head]
+        if isinstance(value, list):
+            result[head] = [{k: item[k] for k in fields if k in item} for item in value]
+        else:
+            result[head] = {k: value[k] for k in fields if k in value}
+    return result
+
+
+class FakeRepository:
+    """
+    Repository trong bộ nhớ: strict=True thì áp projection được truyền vào, ngược lại trả document đầy đủ.
+    """
+
+    def __init__(self, documents, strict: bool):
+        self.documents = documents
+        self.strict = strict
+        self.projections = set()
+
+    def _project(self, documents, projection):
+        self.projections.add(repr(projection))
+        if not self.strict:
+            return [dict(d) for d in documents]
+        return [apply_projection(d, projection) for d in documents]
+
+    def _one(self, documents, projection):
+        found = self._project(documents[:1], projection)
+        return found[0] if found else None
+
+    def _by(self, field, values):
+        values = {ObjectId(v) for v in values}
+        return [d for d in self.documents if d.get(field) in values]
+
+
+class FakePostRepository(FakeRepository):
+    async def get_all_posts(self, cursor=None, limit=5, projection=None):
+        return self._project(self.documents[:limit], projection)
+
+    async def get_by_id(self, post_id, projection=None):
+        return self._one(self._by("_id", [post_id]), projection)
+
+    async def get_posts_by_user(self, user_id, privacy_filter=None, cursor=None, limit=5, projection=None):
+        return self._project(self._by("user_id", [user_id])[:limit], projection)
+
+
+class FakeUserProfileRepository(FakeRepository):
+    async def get_by_user_id(self, user_id, projection=None):
+        return self._one(self._by("user_id", [user_id]), projection)
+
+    async def get_public_by_ids(self, user_ids, projection=None):
+        return self._project(self._by("user_id", user_ids), projection)
+
+
+class FakeMediaRepository(FakeRepository):
+    async def get_by_id(self, media_id, projection=None):
+        return self._one(self._by("_id", [media_id]), projection)
+
+    async def get_by_ids(self, media_ids, projection=None):
+        return self._project(self._by("_id", media_ids), projection)
+
+
+class FakeUserRepository(FakeRepository):
+    async def get_by_id(self, user_id, projection=None):
+        return self._one(self._by("_id", [user_id]), projection)
+
+    async def get_by_ids(self, user_ids, projection=None):
+        return self._project(self._by("_id", user_ids), projection)
+
+
+class FakeCommentRepository(FakeRepository):
+    async def get_root_comments(self, post_id, limit=10, cursor=None, projection=None):
+        return self._project([d for d in self._by("post_id", [post_id]) if d["root_id"] is None], projection)
+
+    async def get_replies(self, root_id, limit=50, cursor=None, projection=None):
+        return self._project(self._by("root_id", [root_id]), projection)
+
+
+class FakeConversationRepository(FakeRepository):
+    async def get_conversations_for_user(self, user_id, projection=None):
+        return self._project(self.documents, projection)
+
+    async def get_by_id(self, conversation_id, projection=None):
+        return self._one(self._by("_id", [conversation_id]), projection)
+
+
+class FakeMessageRepository(FakeRepository):
+    async def get_by_conversation(self, conversation_id, cursor=None, limit=50, projection=None):
+        return self._project(self._by("conversation_id", [conversation_id])[:limit], projection)
+
+    async def get_by_id(self, message_id, projection=None):
+        return self._one(self._by("_id", [message_id]), projection)
+
+
+# Dữ liệu giả có đủ mọi field (kể cả field không bao giờ trả về như dob, gender, password) =============================
+def _seed():
+    users = [{"_id": ObjectId(), "email": f"user{i}@example.com", "hashed_password": "x", "status": "active",
+              "email_verified": True, "created_at": NOW, "updated_at": NOW} for i in range(3)]
+    avatars = [{"_id": ObjectId(), "type": "image", "url": f"avatars/{i}.png", "public_id": f"p{i}",
+                "size": 1024, "created_at": NOW} for i in range(3)]
+    cover = {"_id": ObjectId(), "type": "image", "url": "covers/0.png", "public_id": "c0", "size": 2048,
+             "created_at": NOW}
+    profiles = [{"_id": ObjectId(), "user_id": u["_id"], "first_name": "Van", "last_name": f"Nguyen {i}",
+                 "display_name": f"Nguyen Van {i}", "avatar": avatars[i]["_id"], "cover": cover["_id"],
+                 "date_of_birth": NOW, "gender": "other", "card_version": 2, "created_at": NOW, "updated_at": NOW}
+                for i, u in enumerate(users)]
+    post_media = {"_id": ObjectId(), "type": "image", "url": "posts/0.png", "public_id": "m0", "size": 4096,
+                  "created_at": NOW}
+
+    posts = [
+        # Bài mới: đã lưu sẵn thông tin tác giả
+        {"_id": ObjectId(), "user_id": users[0]["_id"], "content": "snapshot", "privacy": "public",
+         "media_ids": [post_media["_id"]], "author": {"display_name": "Nguyen Van 0", "avatar": "avatars/0.png",
+                                                      "version": 2},
+         "comments_count": 3, "reactions_count": 2, "reactions": {"like": 1, "love": 1}, "views": 7,
+         "hot_score": 1.5, "created_at": NOW, "updated_at": NOW, "deleted_at": None},
+        # Bài cũ: phải tra thẻ tác giả
+        {"_id": ObjectId(), "user_id": users[1]["_id"], "content": "legacy", "privacy": "public", "media_ids": [],
+         "comments_count": 0, "created_at": NOW, "updated_at": NOW, "deleted_at": None},
+    ]
+
+    root = {"_id": ObjectId(), "post_id": posts[0]["_id"], "user_id": users[1]["_id"], "content": "root",
+            "has_replies": True, "root_id": None, "reply_to_comment_id": None, "reply_to_user_id": None,
+            "author": None, "reply_to_author": None, "reactions_count": 1, "reactions": {"haha": 1},
+            "created_at": NOW, "updated_at": NOW}
+    replies = [
+        {"_id": ObjectId(), "post_id": posts[0]["_id"], "user_id": users[2]["_id"], "content": "reply",
+         "has_replies": False, "root_id": root["_id"], "reply_to_comment_id": root["_id"],
+         "reply_to_user_id": users[1]["_id"], "author": {"display_name": "Nguyen Van 2", "avatar": None, "version": 2},
+         "reply_to_author": {"display_name": "Nguyen Van 1", "version": 2}, "reactions_count": 1,
+         "reactions": {"like": 1}, "created_at": NOW, "updated_at": NOW},
+        {"_id": ObjectId(), "post_id": posts[0]["_id"], "user_id": users[0]["_id"], "content": "legacy reply",
+         "has_replies": False, "root_id": root["_id"], "reply_to_comment_id": root["_id"],
+         "reply_to_user_id": users[1]["_id"], "created_at": NOW, "updated_at": NOW},
+    ]
+
+    conversation = {"_id": ObjectId(), "is_group": False, "created_at": NOW, "updated_at": NOW, "deleted_by": [],
+                    "participants": [{"user_id": users[0]["_id"], "joined_at": NOW},
+                                     {"user_id": users[1]["_id"], "joined_at": NOW}]}
+    messages = [{"_id": ObjectId(), "conversation_id": conversation["_id"], "sender_id": users[i % 2]["_id"],
+                 "content": f"message {i}", "created_at": NOW, "updated_at": NOW} for i in range(3)]
+
+    return {
+        "users": users, "profiles": profiles, "media": avatars + [cover, post_media], "posts": posts,
+        "comments": [root] + replies, "conversations": [conversation], "messages": messages,
+    }
+
+
+# Chạy toàn bộ luồng đọc, trả về {tên luồng: response đã serialize} ====================================================
+async def _collect(data, strict: bool):
+    # Thẻ người dùng nằm trong L1 sẽ che mất lần query có projection
+    profile_card_cache.local.clear()
+
+    users = FakeUserRepository(data["users"], strict)
+    profiles = FakeUserProfileRepository(data["profiles"], strict)
+    media = FakeMediaRepository(data["media"], strict)
+    posts = FakePostRepository(data["posts"], strict)
+    comments = FakeCommentRepository(data["comments"], strict)
+    conversations = FakeConversationRepository(data["conversations"], strict)
+    messages = FakeMessageRepository(data["messages"], strict)
+
+    def loader():
+        return EntityLoader(user_profile_repo=profiles, media_repo=media, user_repo=users)
+
+    post_service = PostService(post_repo=posts, media_service=None, user_profile_repo=profiles, media_repo=media,
+                               entity_loader=loader(), post_tag_service=None, author_snapshot_service=None)
+    comment_service = CommentService(comment_repo=comments, post_repo=posts, user_profile_repo=profiles,
+                                     media_repo=media, notification_service=None, entity_loader=loader(),
+                                     post_tag_service=None, author_snapshot_service=None)
+    conversation_service = ConversationService(conversation_repo=conversations, user_profile_repo=profiles,
+                                               media_repo=media, message_repo=messages, entity_loader=loader())
+    message_service = MessageService(message_repo=messages, conversation_service=conversation_service,
+                                     conversation_repo=conversations)
+    profile_service = UserProfileService(profiles, None, media_repo=media, user_repo=users,
+                                         author_snapshot_service=None)
+
+    # _load_principal tự tạo repository nên thay tạm bằng bản giả
+    dependencies.UserRepository = lambda: users
+    dependencies.UserProfileRepository = lambda: profiles
+    dependencies.MediaRepository = lambda: media
+
+    user_id = str(data["users"][0]["_id"])
+    root = data["comments"][0]
+    results = {
+        "posts.list": await post_service.get_all_posts(limit=5),
+        "posts.user": await post_service.get_user_posts(user_id, user_id, limit=5),
+        "posts.detail": await post_service.get_detail_post(str(data["posts"][1]["_id"])),
+        "comments.root": await comment_service.get_root_comments_for_post(str(root["post_id"])),
+        "comments.replies": await comment_service.get_replies_for_comment_thread(str(root["_id"])),
+        "conversations.list": await conversation_service.get_conversations_for_user(user_id),
+        "messages.list": await message_service.get_messages(str(data["conversations"][0]["_id"])),
+        "profile.detail": await profile_service.get_profile_by_id(user_id),
+        "auth.principal": await dependencies._load_principal(user_id),
+    }
+
+    serialized = {}
+    for name, value in results.items():
+        if isinstance(value, list):
+            serialized[name] = [item.model_dump(mode="json", by_alias=True) for item in value]
+        elif hasattr(value, "model_dump"):
+            serialized[name] = value.model_dump(mode="json", by_alias=True)
+        else:
+            serialized[name] = value
+
+    used = sum(len(repo.projections) for repo in (users, profiles, media, posts, comments, conversations, messages))
+    return serialized, used
+
+
+async def main():
+    data = _seed()
+    expected, _ = await _collect(data, strict=False)
+    try:
+        actual, used = await _collect(data, strict=True)
+    except (KeyError, TypeError, ValueError) as e:
+        logger.error(f"Projection thiếu field: {type(e).__name__}: {e}")
+        sys.exit(1)
+
+    failed = [name for name in expected if expected[name] != actual[name]]
+    for name in expected:
+        logger.info(f"{name:<20} | {'khác' if name in failed else 'khớp'}")
+
+    if failed:
+        for name in failed:
+            logger.error(f"{name}: đầy đủ={expected[name]} | projection={actual[name]}")
+        sys.exit(1)
+    logger.info(f"Tất cả {len(expected)} luồng đọc khớp ({used} projection khác nhau được dùng)")
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())
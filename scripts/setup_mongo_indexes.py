@@ -58,7 +58,10 @@ async def create_indexes():
         await tokens_col.create_index("user_id")
         logger.info("  - Đã tạo index cho 'user_id'")
 
-        # TTL Index (Time To Live): Tự động xóa token khi hết hạ
+        # TTL Index (Time To Live): Tự động xóa token khi hết hạn
+        await tokens_col.create_index("expires_at", expireAfterSeconds=0)
+        logger.info("  - Đã tạo TTL index cho 'expires_at'")
+
         # ==========================================
         # 4. Collection: posts
         # ==========================================
@@ -69,10 +72,20 @@ async def create_indexes():
         await posts_col.create_index([("user_id", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])
         logger.info("  - Đã tạo compound index (user_id, created_at) cho trang cá nhân")
 
+        # Index lấy bài viết của 1 tác giả theo _id (trang cá nhân + cập nhật lại thông tin tác giả theo lô)
+        await posts_col.create_index([("user_id", pymongo.ASCENDING), ("_id", pymongo.DESCENDING)])
+        logger.info("  - Đã tạo compound index (user_id, _id)")
+
         # Index cho News Feed public (Lấy bài public, sắp xếp mới nhất)
         await posts_col.create_index([("privacy", pymongo.ASCENDING), ("created_at", pymongo.DESCENDING)])
         logger.info("  - Đã tạo compound index (privacy, created_at) cho Public Feed")
 
+        # Index cho feed sort=top (bài public xếp theo điểm hot, phân trang theo (hot_score, _id))
+        await posts_col.create_index(
+            [("privacy", pymongo.ASCENDING), ("hot_score", pymongo.DESCENDING), ("_id", pymongo.DESCENDING)]
+        )
+        logger.info("  - Đã tạo compound index (privacy, hot_score, _id) cho feed sort=top")
+
         # Text Index cho tìm kiếm nội dung bài viết
         await posts_col.create_index([("content", pymongo.TEXT)])
         logger.info("  - Đã tạo text index cho 'content' để tìm kiếm")
@@ -108,6 +121,57 @@ async def create_indexes():
         await comments_col.create_index([("root_id", pymongo.ASCENDING), ("created_at", pymongo.ASCENDING)])
         logger.info("  - Đã tạo compound index ({root_id: 1, created_at: 1}) cho replies trong luồng")
 
+        # Index lấy id bình luận mới nhất của bài viết (ETag danh sách bình luận)
+        await comments_col.create_index([("post_id", pymongo.ASCENDING), ("_id", pymongo.DESCENDING)])
+        logger.info("  - Đã tạo compound index ({post_id: 1, _id: -1}) cho ETag bình luận")
+
+        # Index 3, 4: Tìm bình luận của 1 user / trả lời 1 user (cập nhật lại thông tin tác giả khi đổi avatar)
+        await comments_col.create_index([("user_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)])
+        await comments_col.create_index(
+            [("reply_to_user_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)],
+            partialFilterExpression={"reply_to_user_id": {"$type": "objectId"}}
+        )
+        logger.info("  - Đã tạo index ({user_id: 1, _id: 1}) và ({reply_to_user_id: 1, _id: 1}) cho cập nhật tác giả")
+
+        # ==========================================
+        # 7. Collection: post_tags (chỉ mục hashtag / mention => bài viết)
+        # ==========================================
+        logger.info("Đang xử lý collection: post_tags")
+        post_tags_col = db.get_collection("post_tags")
+
+        # Mỗi (key, bài viết) chỉ 1 bản ghi, upsert khi thêm nguồn mới
+        await post_tags_col.create_index([("key", pymongo.ASCENDING), ("post_id", pymongo.ASCENDING)], unique=True)
+        logger.info("  - Đã tạo unique index ({key: 1, post_id: 1})")
+
+        # Feed theo hashtag / mention: {key, public: true} sort _id DESC
+        await post_tags_col.create_index(
+            [("key", pymongo.ASCENDING), ("_id", pymongo.DESCENDING)],
+            partialFilterExpression={"public": True}
+        )
+        logger.info("  - Đã tạo partial index ({key: 1, _id: -1}) cho bài viết công khai")
+
+        # Sửa / xóa bài viết: tìm key theo bài viết
+        await post_tags_col.create_index([("post_id", pymongo.ASCENDING), ("sources", pymongo.ASCENDING)])
+        logger.info("  - Đã tạo index ({post_id: 1, sources: 1})")
+
+        # ==========================================
+        # 8. Collection: reactions
+        # ==========================================
+        logger.info("Đang xử lý collection: reactions")
+        reactions_col = db.get_collection("reactions")
+
+        # Mỗi user tối đa 1 cảm xúc trên 1 bài viết / bình luận
+        await reactions_col.create_index(
+            [("target_type", pymongo.ASCENDING), ("target_id", pymongo.ASCENDING), ("user_id", pymongo.ASCENDING)],
+            unique=True
+        )
+        logger.info("  - Đã tạo unique index ({target_type: 1, target_id: 1, user_id: 1})")
+
+        # Cảm xúc của 1 user trên 1 trang bài viết / bình luận (khi cache Redis chưa có)
+        await reactions_col.create_index(
+            [("user_id", pymongo.ASCENDING), ("target_type", pymongo.ASCENDING), ("target_id", pymongo.ASCENDING)]
+        )
+        logger.info("  - Đã tạo index ({user_id: 1, target_type: 1, target_id: 1})")
 
         logger.info("=" * 50)
         logger.info("HOÀN TẤT! Tất cả indexes đã được tạo thành công.")
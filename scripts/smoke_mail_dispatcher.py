@@ -0,0 +1,64 @@
+"""
+Chạy thử mail dispatcher với SMTP server giả (aiosmtpd) ngay trong tiến trình, không gửi email thật.
+Cần cài thêm: pip install aiosmtpd
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+from aiosmtpd.controller import Controller
+from app.core.config import settings
+from app.core.email import send_verification_email
+from app.core.mail_dispatcher import mail_dispatcher
+
+# Cấu hình logging
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+logger = logging.getLogger(__name__)
+logging.getLogger("mail.log").setLevel(logging.WARNING)
+
+SMTP_PORT = 1025
+EMAIL_COUNT = 500
+
+
+class _CountingHandler:
+    def __init__(self):
+        self.received = 0
+        self.sessions = set()
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        self.sessions.add(id(session))
+        return "250 OK"
+
+
+async def main():
+    # Trỏ dispatcher về SMTP server local, không TLS / không đăng nhập
+    settings.MAIL_SERVER = "127.0.0.1"
+    settings.MAIL_PORT = SMTP_PORT
+    settings.MAIL_STARTTLS = False
+    settings.MAIL_SSL_TLS = False
+    settings.MAIL_USE_CREDENTIALS = False
+
+    handler = _CountingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=SMTP_PORT)
+    controller.start()
+
+    mail_dispatcher.start()
+    started = time.perf_counter()
+    for i in range(EMAIL_COUNT):
+        send_verification_email(email_to=f"user{i}@example.com", otp_code="123456", name=f"User {i}")
+    await mail_dispatcher.stop(timeout=60)
+    elapsed = time.perf_counter() - started
+    controller.stop()
+
+    logger.info(f"{handler.received}/{EMAIL_COUNT} email trong {elapsed:.2f}s | "
+                f"{handler.received / elapsed:,.0f} email/s | "
+                f"{len(handler.sessions)} phiên SMTP (dispatcher mở {mail_dispatcher.sessions_opened})")
+
+
+if __name__ == "__main__":
+    if sys.platform == "win32":
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(main())